@@ -1,47 +1,202 @@
 """AI tools for the Knowledge Base module."""
 from assistant.tools import AssistantTool, register_tool
 
+# Serializable fields of the list tools and the ones returned when none are requested
+CATEGORY_FIELDS = {
+    'name': lambda c: c.name,
+    'slug': lambda c: c.slug,
+    'description': lambda c: _clip(c.description),
+    'is_active': lambda c: c.is_active,
+    'parent_id': lambda c: str(c.parent_id) if c.parent_id else None,
+    'depth': lambda c: c.depth,
+    'articles': lambda c: c.article_count,
+    'published_articles': lambda c: c.published_count,
+    'views': lambda c: c.view_sum,
+}
+CATEGORY_DEFAULT_FIELDS = ['name', 'slug', 'is_active', 'articles']
+CATEGORY_COUNT_FIELDS = {'articles', 'published_articles', 'views'}
+
+ARTICLE_FIELDS = {
+    'title': lambda a: a.title,
+    'slug': lambda a: a.slug,
+    'category': lambda a: a.category.name if a.category else None,
+    'category_id': lambda a: str(a.category_id) if a.category_id else None,
+    'is_published': lambda a: a.is_published,
+    'view_count': lambda a: a.view_count,
+    'excerpt': lambda a: _clip(a.excerpt),
+    'content_length': lambda a: a.content_length,
+    'word_count': lambda a: a.word_count,
+    'updated_at': lambda a: a.updated_at.isoformat() if a.updated_at else None,
+}
+ARTICLE_DEFAULT_FIELDS = ['title', 'category', 'is_published', 'view_count']
+
+PAGING_PARAMETERS = {
+    "limit": {"type": "integer", "description": "Maximum rows per call (default 20, max 100)"},
+    "cursor": {"type": "string", "description": "next_cursor of the previous call, to continue the listing"},
+}
+
+
+def _clip(text):
+    from knowledge_base.tool_output import clip
+    return clip(text)
+
+
+def _serializer(fields, available):
+    def serialize(obj):
+        item = {"id": str(obj.id)}
+        item.update((field, available[field](obj)) for field in fields if field != 'id')
+        return item
+    return serialize
+
+
+def _batch_response(objs, errors, label, key):
+    if errors:
+        return {"error": "Nothing was saved; fix the listed items and retry the whole batch", "errors": errors}
+    return {key: len(objs), "items": [{"id": str(o.id), label: getattr(o, label), "slug": o.slug} for o in objs]}
+
 
 @register_tool
 class ListKBCategories(AssistantTool):
     name = "list_kb_categories"
-    description = "List knowledge base categories."
+    description = (
+        "List knowledge base categories, optionally with their article, published article and view totals. "
+        "Results are paged: pass next_cursor back as cursor while truncated or next_cursor is set."
+    )
     module_id = "knowledge_base"
     required_permission = "knowledge_base.view_kbcategory"
-    parameters = {"type": "object", "properties": {"is_active": {"type": "boolean"}}, "required": [], "additionalProperties": False}
+    parameters = {
+        "type": "object",
+        "properties": {
+            "is_active": {"type": "boolean"},
+            "fields": {"type": "array", "items": {"type": "string", "enum": sorted(CATEGORY_FIELDS)}},
+            **PAGING_PARAMETERS,
+        },
+        "required": [],
+        "additionalProperties": False,
+    }
 
     def execute(self, args, request):
         from knowledge_base.models import KBCategory
-        qs = KBCategory.objects.all()
+        from knowledge_base.queries import with_article_counts
+        from knowledge_base.tool_output import list_response, requested_fields
+        hub_id = request.session.get('hub_id')
+        fields = requested_fields(args, CATEGORY_FIELDS, CATEGORY_DEFAULT_FIELDS)
+        qs = KBCategory.objects.filter(hub_id=hub_id, is_deleted=False)
+        if 'description' not in fields:
+            qs = qs.defer('description')
+        if CATEGORY_COUNT_FIELDS.intersection(fields):
+            qs = with_article_counts(qs)
         if 'is_active' in args:
             qs = qs.filter(is_active=args['is_active'])
-        return {"categories": [{"id": str(c.id), "name": c.name, "slug": c.slug, "description": c.description, "is_active": c.is_active} for c in qs.order_by('order')]}
+        return list_response(qs, 'order', _serializer(fields, CATEGORY_FIELDS), 'categories', args)
 
 
 @register_tool
 class ListKBArticles(AssistantTool):
     name = "list_kb_articles"
-    description = "List knowledge base articles."
+    description = (
+        "List knowledge base articles (metadata only; use search_kb to read passages). "
+        "Results are paged: pass next_cursor back as cursor while truncated or next_cursor is set."
+    )
     module_id = "knowledge_base"
     required_permission = "knowledge_base.view_kbarticle"
     parameters = {
         "type": "object",
-        "properties": {"category_id": {"type": "string"}, "is_published": {"type": "boolean"}, "search": {"type": "string"}, "limit": {"type": "integer"}},
+        "properties": {
+            "category_id": {"type": "string", "description": "Only articles in this category or its subcategories"},
+            "is_published": {"type": "boolean"},
+            "search": {"type": "string"},
+            "fields": {"type": "array", "items": {"type": "string", "enum": sorted(ARTICLE_FIELDS)}},
+            **PAGING_PARAMETERS,
+        },
         "required": [],
         "additionalProperties": False,
     }
 
     def execute(self, args, request):
-        from knowledge_base.models import KBArticle
-        qs = KBArticle.objects.select_related('category').all()
+        from knowledge_base.queries import kb_articles_queryset, subtree_category
+        from knowledge_base.tool_output import list_response, requested_fields
+        hub_id = request.session.get('hub_id')
+        fields = requested_fields(args, ARTICLE_FIELDS, ARTICLE_DEFAULT_FIELDS)
+        category = None
         if args.get('category_id'):
-            qs = qs.filter(category_id=args['category_id'])
+            category = subtree_category(hub_id, args['category_id'])
+            if category is None:
+                return {"error": "Category not found"}
+        qs = kb_articles_queryset(hub_id, args.get('search', '').strip(), category=category)[0].defer('content')
+        if 'category' not in fields:
+            qs = qs.select_related(None)
         if 'is_published' in args:
             qs = qs.filter(is_published=args['is_published'])
-        if args.get('search'):
-            qs = qs.filter(title__icontains=args['search'])
-        limit = args.get('limit', 20)
-        return {"articles": [{"id": str(a.id), "title": a.title, "category": a.category.name if a.category else None, "is_published": a.is_published, "view_count": a.view_count} for a in qs[:limit]]}
+        return list_response(qs, 'title', _serializer(fields, ARTICLE_FIELDS), 'articles', args)
+
+
+@register_tool
+class SearchKB(AssistantTool):
+    name = "search_kb"
+    description = "Find the knowledge base passages that best answer a question. Returns the matching passage text with its article."
+    module_id = "knowledge_base"
+    required_permission = "knowledge_base.view_kbarticle"
+    parameters = {
+        "type": "object",
+        "properties": {"query": {"type": "string"}, "limit": {"type": "integer", "description": "Number of passages (default 5, max 20)"}},
+        "required": ["query"],
+        "additionalProperties": False,
+    }
+
+    def execute(self, args, request):
+        from knowledge_base import retrieval
+        hub_id = request.session.get('hub_id')
+        limit = max(1, min(int(args.get('limit') or retrieval.DEFAULT_LIMIT), 20))
+        return {"results": [{
+            "article_id": str(hit['article'].id), "title": hit['article'].title, "slug": hit['article'].slug,
+            "is_published": hit['article'].is_published, "passage": hit['text'], "score": round(hit['score'], 4),
+        } for hit in retrieval.search_passages(hub_id, args['query'], limit)]}
+
+
+@register_tool
+class GetKBArticle(AssistantTool):
+    name = "get_kb_article"
+    description = (
+        "Read one knowledge base article by id or slug. Returns its details and the passages most relevant to "
+        "query (or its opening passages without one), with query matches wrapped in ** and their character "
+        "offsets into the article text."
+    )
+    module_id = "knowledge_base"
+    required_permission = "knowledge_base.view_kbarticle"
+    parameters = {
+        "type": "object",
+        "properties": {
+            "article_id": {"type": "string"},
+            "slug": {"type": "string"},
+            "query": {"type": "string", "description": "What to look for in the article"},
+            "limit": {"type": "integer", "description": "Number of passages (default 3, max 10)"},
+        },
+        "required": [],
+        "additionalProperties": False,
+    }
+
+    def execute(self, args, request):
+        from knowledge_base import retrieval
+        from knowledge_base.queries import find_article
+        if not args.get('article_id') and not args.get('slug'):
+            return {"error": "Pass article_id or slug"}
+        a = find_article(request.session.get('hub_id'), args.get('article_id'), args.get('slug'))
+        if a is None:
+            return {"error": "Article not found"}
+        limit = max(1, min(int(args.get('limit') or retrieval.SNIPPET_LIMIT), 10))
+        snippets = retrieval.article_snippets(a, args.get('query', ''), limit + 1)
+        return {
+            "id": str(a.id), "title": a.title, "slug": a.slug, "category": a.category.name if a.category else None,
+            "is_published": a.is_published, "updated_at": a.updated_at.isoformat() if a.updated_at else None,
+            "content_length": a.content_length, "word_count": a.word_count,
+            "passages": [{
+                "position": s['position'], "start": s['start'], "end": s['end'],
+                "text": retrieval.mark(s['text'], s['matches'], s['start']),
+                "matches": s['matches'], "score": round(s['score'], 4),
+            } for s in snippets[:limit]],
+            "more_passages": len(snippets) > limit,
+        }
 
 
 @register_tool
@@ -53,16 +208,30 @@ class CreateKBCategory(AssistantTool):
     requires_confirmation = True
     parameters = {
         "type": "object",
-        "properties": {"name": {"type": "string"}, "description": {"type": "string"}},
+        "properties": {"name": {"type": "string"}, "description": {"type": "string"}, "parent_id": {"type": "string", "description": "Create the category inside this category"}},
         "required": ["name"],
         "additionalProperties": False,
     }
 
     def execute(self, args, request):
+        from knowledge_base import caching, slugs, stats, tree
         from knowledge_base.models import KBCategory
-        from django.utils.text import slugify
-        c = KBCategory.objects.create(name=args['name'], slug=slugify(args['name']), description=args.get('description', ''))
-        return {"id": str(c.id), "name": c.name, "created": True}
+        from knowledge_base.queries import subtree_category
+        hub_id = request.session.get('hub_id')
+        parent = None
+        if args.get('parent_id'):
+            parent = subtree_category(hub_id, args['parent_id'])
+            if parent is None:
+                return {"error": "Parent category not found"}
+        try:
+            tree.check_depth(parent)
+        except tree.TreeError as exc:
+            return {"error": str(exc)}
+        c = KBCategory(hub_id=hub_id, parent=parent, name=args['name'], description=args.get('description', ''))
+        slugs.save_unique(c, slugs.base_slug(c.name, 100))
+        stats.apply(hub_id, after=stats.category_contribution(c))
+        caching.bump_hub_version(hub_id)
+        return {"id": str(c.id), "name": c.name, "slug": c.slug, "created": True}
 
 
 @register_tool
@@ -83,7 +252,129 @@ class CreateKBArticle(AssistantTool):
     }
 
     def execute(self, args, request):
+        from knowledge_base import caching, revisions, search, slugs, stats
         from knowledge_base.models import KBArticle
-        from django.utils.text import slugify
-        a = KBArticle.objects.create(title=args['title'], slug=slugify(args['title']), content=args['content'], category_id=args.get('category_id'), is_published=args.get('is_published', False))
-        return {"id": str(a.id), "title": a.title, "created": True}
+        hub_id = request.session.get('hub_id')
+        a = KBArticle(hub_id=hub_id, title=args['title'], content=args['content'], category_id=args.get('category_id'), is_published=args.get('is_published', False))
+        slugs.save_unique(a, slugs.base_slug(a.title, 255))
+        revisions.record_created([a], request.session.get('local_user_id'))
+        search.index_article(a)
+        stats.apply(hub_id, after=stats.article_contribution(a), touched=True)
+        caching.bump_hub_version(hub_id)
+        return {"id": str(a.id), "title": a.title, "slug": a.slug, "created": True}
+
+
+@register_tool
+class BatchCreateKBCategories(AssistantTool):
+    name = "batch_create_kb_categories"
+    description = (
+        "Create up to 100 knowledge base categories at once. All items are validated first and either all "
+        "are created or none; slugs are made unique automatically."
+    )
+    module_id = "knowledge_base"
+    required_permission = "knowledge_base.add_kbcategory"
+    requires_confirmation = True
+    parameters = {
+        "type": "object",
+        "properties": {
+            "items": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"}, "slug": {"type": "string"}, "description": {"type": "string"},
+                        "parent_id": {"type": "string", "description": "Create the category inside this existing category"},
+                        "is_active": {"type": "boolean"},
+                    },
+                    "required": ["name"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["items"],
+        "additionalProperties": False,
+    }
+
+    def execute(self, args, request):
+        from knowledge_base import batches
+        objs, errors = batches.create_categories(request.session.get('hub_id'), args['items'])
+        return _batch_response(objs, errors, 'name', 'created')
+
+
+@register_tool
+class BatchCreateKBArticles(AssistantTool):
+    name = "batch_create_kb_articles"
+    description = (
+        "Create up to 100 knowledge base articles at once. All items are validated first and either all "
+        "are created or none; slugs are made unique automatically."
+    )
+    module_id = "knowledge_base"
+    required_permission = "knowledge_base.add_kbarticle"
+    requires_confirmation = True
+    parameters = {
+        "type": "object",
+        "properties": {
+            "items": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "title": {"type": "string"}, "content": {"type": "string"}, "slug": {"type": "string"},
+                        "category_id": {"type": "string"},
+                        "category": {"type": "string", "description": "Category slug, instead of category_id"},
+                        "is_published": {"type": "boolean"},
+                    },
+                    "required": ["title", "content"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["items"],
+        "additionalProperties": False,
+    }
+
+    def execute(self, args, request):
+        from knowledge_base import batches
+        objs, errors = batches.create_articles(
+            request.session.get('hub_id'), args['items'], request.session.get('local_user_id'),
+        )
+        return _batch_response(objs, errors, 'title', 'created')
+
+
+@register_tool
+class BatchUpdateKBArticles(AssistantTool):
+    name = "batch_update_kb_articles"
+    description = (
+        "Change the title, content, publication or category of up to 100 knowledge base articles at once. "
+        "Only the fields given are changed. All items are validated first and either all are saved or none."
+    )
+    module_id = "knowledge_base"
+    required_permission = "knowledge_base.change_kbarticle"
+    requires_confirmation = True
+    parameters = {
+        "type": "object",
+        "properties": {
+            "items": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string"}, "title": {"type": "string"}, "content": {"type": "string"},
+                        "is_published": {"type": "boolean"},
+                        "category_id": {"type": ["string", "null"], "description": "null removes the category"},
+                    },
+                    "required": ["id"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["items"],
+        "additionalProperties": False,
+    }
+
+    def execute(self, args, request):
+        from knowledge_base import batches
+        objs, errors = batches.update_articles(
+            request.session.get('hub_id'), args['items'], request.session.get('local_user_id'),
+        )
+        return _batch_response(objs, errors, 'title', 'updated')
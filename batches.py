@@ -0,0 +1,242 @@
+"""
+All-or-nothing batch writes for the assistant tools.
+
+A batch is validated completely before anything is written: category and
+parent references are resolved with one query per kind, slugs for the whole
+batch come from ``slugs.unique_slugs`` and every problem is reported with the
+index of its item. Only a batch without errors is written, with
+``bulk_create`` (or ``bulk_update``) inside a single transaction that also
+keeps the search index and hub statistics in step; the hub content version
+is bumped once afterwards.
+
+Every function returns ``(objects, errors)``; ``errors`` is a list of
+``{'index': n, 'error': message}`` and ``objects`` is empty when it is not.
+"""
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import bodies, caching, reader, revisions, search, slugs, stats, tree
+from .models import KBArticle, KBCategory
+
+MAX_BATCH_SIZE = 100
+
+ARTICLE_UPDATE_FIELDS = ('title', 'content', 'is_published', 'category_id')
+
+
+def _uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _text(item, field):
+    value = item.get(field)
+    return '' if value is None else str(value).strip()
+
+
+def _check_size(items):
+    if not items:
+        return [{'index': None, 'error': 'No items given'}]
+    if len(items) > MAX_BATCH_SIZE:
+        return [{'index': None, 'error': f'At most {MAX_BATCH_SIZE} items per batch'}]
+    return []
+
+
+def _by_index(errors):
+    """Errors in the order of the items they belong to."""
+    return sorted(errors, key=lambda error: error['index'])
+
+
+def _live_categories(hub_id, ids):
+    """``{id: category}`` of the hub's live categories among ``ids``, in one query."""
+    ids = {pk for pk in map(_uuid, ids) if pk is not None}
+    if not ids:
+        return {}
+    return {c.pk: c for c in KBCategory.objects.filter(hub_id=hub_id, is_deleted=False, pk__in=ids)}
+
+
+def _live_category_slugs(hub_id, category_slugs):
+    if not category_slugs:
+        return {}
+    return dict(
+        KBCategory.objects.filter(hub_id=hub_id, is_deleted=False, slug__in=category_slugs)
+        .values_list('slug', 'id')
+    )
+
+
+def _resolve_article_categories(hub_id, items, errors):
+    """Category id (or None) of every item, from ``category_id`` or a ``category`` slug."""
+    by_id = _live_categories(hub_id, [item['category_id'] for item in items if item.get('category_id')])
+    by_slug = _live_category_slugs(hub_id, {_text(item, 'category') for item in items if _text(item, 'category')})
+    resolved = []
+    for index, item in enumerate(items):
+        category_id = None
+        if item.get('category_id'):
+            category_id = _uuid(item['category_id'])
+            if category_id not in by_id:
+                errors.append({'index': index, 'error': f"Unknown category_id \"{item['category_id']}\""})
+        elif _text(item, 'category'):
+            category_id = by_slug.get(_text(item, 'category'))
+            if category_id is None:
+                errors.append({'index': index, 'error': f"Unknown category \"{_text(item, 'category')}\""})
+        resolved.append(category_id)
+    return resolved
+
+
+def create_articles(hub_id, items, user_id=None):
+    """
+    Create articles from dicts with ``title``, ``content`` and optional
+    ``slug``, ``category_id`` or ``category`` (a category slug) and ``is_published``.
+    """
+    errors = _check_size(items)
+    if errors:
+        return [], errors
+    category_ids = _resolve_article_categories(hub_id, items, errors)
+    objs, bases = [], []
+    for index, item in enumerate(items):
+        title = _text(item, 'title')
+        if not title:
+            errors.append({'index': index, 'error': 'Missing title'})
+            continue
+        objs.append(KBArticle(
+            hub_id=hub_id, title=title[:255], content=item.get('content') or '',
+            category_id=category_ids[index], is_published=bool(item.get('is_published', False)),
+        ))
+        bases.append(slugs.base_slug(_text(item, 'slug') or title, 255))
+    if errors:
+        return [], _by_index(errors)
+
+    for obj, slug in zip(objs, slugs.unique_slugs(KBArticle, hub_id, bases)):
+        obj.slug = slug
+        obj.refresh_content_stats()
+    with transaction.atomic():
+        offloaded = bodies.split_for_insert(objs)
+        KBArticle.objects.bulk_create(objs)
+        bodies.store_inserted(offloaded)
+        revisions.record_created(objs, user_id)
+        search.index_articles(objs)
+        stats.apply(hub_id, after=stats.total(stats.article_contribution(obj) for obj in objs), touched=True)
+    caching.bump_hub_version(hub_id)
+    return objs, []
+
+
+def create_categories(hub_id, items):
+    """
+    Create categories from dicts with ``name`` and optional ``slug``,
+    ``description``, ``parent_id`` (an existing category) and ``is_active``.
+    """
+    errors = _check_size(items)
+    if errors:
+        return [], errors
+    parents = _live_categories(hub_id, [item['parent_id'] for item in items if item.get('parent_id')])
+    objs, bases = [], []
+    for index, item in enumerate(items):
+        name = _text(item, 'name')
+        if not name:
+            errors.append({'index': index, 'error': 'Missing name'})
+            continue
+        parent = None
+        if item.get('parent_id'):
+            parent = parents.get(_uuid(item['parent_id']))
+            if parent is None:
+                errors.append({'index': index, 'error': f"Unknown parent_id \"{item['parent_id']}\""})
+                continue
+        try:
+            tree.check_depth(parent)
+        except tree.TreeError as exc:
+            errors.append({'index': index, 'error': str(exc)})
+            continue
+        obj = KBCategory(
+            hub_id=hub_id, parent=parent, name=name[:255], description=_text(item, 'description'),
+            is_active=bool(item.get('is_active', True)),
+        )
+        obj.path = tree.path_for(obj, parent)
+        obj.depth = 0 if parent is None else parent.depth + 1
+        objs.append(obj)
+        bases.append(slugs.base_slug(_text(item, 'slug') or name, 100))
+    if errors:
+        return [], _by_index(errors)
+
+    for obj, slug in zip(objs, slugs.unique_slugs(KBCategory, hub_id, bases)):
+        obj.slug = slug
+    with transaction.atomic():
+        KBCategory.objects.bulk_create(objs)
+        stats.apply(hub_id, after=stats.total(stats.category_contribution(obj) for obj in objs))
+    caching.bump_hub_version(hub_id)
+    return objs, []
+
+
+def update_articles(hub_id, items, user_id=None):
+    """
+    Change ``title``, ``content``, ``is_published`` and/or ``category_id``
+    (``None`` to uncategorize) of the articles named by each item's ``id``.
+    Slugs are left alone; title or content changes are recorded as revisions.
+    """
+    errors = _check_size(items)
+    if errors:
+        return [], errors
+    ids = [_uuid(item.get('id')) for item in items]
+    articles = {
+        a.pk: a for a in KBArticle.objects.filter(hub_id=hub_id, is_deleted=False, pk__in=[pk for pk in ids if pk])
+    }
+    categories = _live_categories(hub_id, [item['category_id'] for item in items if item.get('category_id')])
+    changes = []
+    for index, (pk, item) in enumerate(zip(ids, items)):
+        article = articles.get(pk)
+        if article is None:
+            errors.append({'index': index, 'error': f"Unknown article id \"{item.get('id')}\""})
+            continue
+        if any(changed.pk == pk for changed, _fields, _item in changes):
+            errors.append({'index': index, 'error': 'Article listed twice'})
+            continue
+        if 'title' in item and not _text(item, 'title'):
+            errors.append({'index': index, 'error': 'Missing title'})
+            continue
+        if item.get('category_id') and _uuid(item['category_id']) not in categories:
+            errors.append({'index': index, 'error': f"Unknown category_id \"{item['category_id']}\""})
+            continue
+        fields = [field for field in ARTICLE_UPDATE_FIELDS if field in item]
+        if not fields:
+            errors.append({'index': index, 'error': 'Nothing to change'})
+            continue
+        changes.append((article, fields, item))
+    if errors:
+        return [], _by_index(errors)
+
+    objs = [article for article, _fields, _item in changes]
+    bodies.attach(objs)
+    before = stats.total(stats.article_contribution(article) for article in objs)
+    now = timezone.now()
+    content_changed = []
+    for article, fields, item in changes:
+        old_title, old_content = article.title, article.content
+        if 'title' in fields:
+            article.title = _text(item, 'title')[:255]
+        if 'content' in fields:
+            article.content = item.get('content') or ''
+        if 'is_published' in fields:
+            article.is_published = bool(item['is_published'])
+        if 'category_id' in fields:
+            article.category_id = _uuid(item['category_id']) if item['category_id'] else None
+        article.updated_at = now
+        if (article.title, article.content) != (old_title, old_content):
+            content_changed.append(article)
+
+    with transaction.atomic():
+        for article in content_changed:
+            # save() keeps the excerpt, counts and out-of-row body in step
+            article.save()
+        KBArticle.objects.bulk_update(
+            [article for article in objs if article not in content_changed],
+            ['is_published', 'category', 'updated_at'],
+        )
+        for article in content_changed:
+            revisions.record(article, user_id)
+        search.index_articles(content_changed)
+        reader.forget(hub_id, [article.pk for article in objs])
+        stats.apply(hub_id, before=before, after=stats.total(stats.article_contribution(a) for a in objs), touched=True)
+    caching.bump_hub_version(hub_id)
+    return objs, []
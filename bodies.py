@@ -0,0 +1,147 @@
+"""
+Out-of-row storage for large article bodies.
+
+When ``KNOWLEDGE_BASE_BODY_OFFLOAD_THRESHOLD`` is set, article bodies of at
+least that many bytes (UTF-8) are stored zlib-compressed in
+``KBArticleBody`` and the ``content`` column of the article row is left
+empty, so list, count and sort queries never drag large bodies along.
+
+Reading ``article.content`` stays transparent: the body is fetched and
+decompressed the first time the attribute is accessed. Code that reads many
+bodies at once calls ``attach`` to load them with a single query.
+"""
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+
+COMPRESSION_LEVEL = 6
+OFFLOAD_BATCH_SIZE = 500
+
+
+def offload_threshold():
+    """Minimum body size in bytes that is stored out of row; 0 disables offloading."""
+    return getattr(settings, 'KNOWLEDGE_BASE_BODY_OFFLOAD_THRESHOLD', 0)
+
+
+def should_offload(content, threshold=None):
+    threshold = offload_threshold() if threshold is None else threshold
+    return bool(threshold) and len((content or '').encode()) >= threshold
+
+
+def compress(content):
+    return zlib.compress(content.encode(), COMPRESSION_LEVEL)
+
+
+def decompress(data):
+    return zlib.decompress(bytes(data)).decode()
+
+
+def load(article_id):
+    """The decompressed body of an offloaded article ('' when it has none)."""
+    from .models import KBArticleBody
+
+    data = KBArticleBody.objects.filter(article_id=article_id).values_list('data', flat=True).first()
+    return '' if data is None else decompress(data)
+
+
+def load_many(article_ids):
+    """``{article_id: body}`` for the given offloaded articles, in one query."""
+    from .models import KBArticleBody
+
+    article_ids = list(article_ids)
+    if not article_ids:
+        return {}
+    rows = KBArticleBody.objects.filter(article_id__in=article_ids).values_list('article_id', 'data')
+    return {article_id: decompress(data) for article_id, data in rows}
+
+
+def attach(articles):
+    """Load the bodies of every offloaded article in ``articles`` that has not read it yet."""
+    pending = [
+        article for article in articles
+        if article.__dict__.get('body_offloaded') and 'content' not in article.__dict__
+    ]
+    if not pending:
+        return
+    loaded = load_many(article.pk for article in pending)
+    for article in pending:
+        article.__dict__['content'] = loaded.get(article.pk, '')
+
+
+def store(article, content):
+    from .models import KBArticleBody
+
+    KBArticleBody.objects.update_or_create(
+        article_id=article.pk,
+        defaults={'hub_id': article.hub_id, 'data': compress(content), 'raw_length': len(content.encode())},
+    )
+
+
+def discard(article_id):
+    from .models import KBArticleBody
+
+    KBArticleBody.objects.filter(article_id=article_id).delete()
+
+
+def split_for_insert(articles):
+    """
+    Prepare unsaved articles for ``bulk_create``: large bodies are flagged and
+    blanked in the row. Returns ``[(article, content)]`` to pass to
+    ``store_inserted`` once the rows exist.
+    """
+    offloaded = []
+    for article in articles:
+        if should_offload(article.content):
+            offloaded.append((article, article.content))
+            article.body_offloaded = True
+            article.__dict__['content'] = ''
+    return offloaded
+
+
+def store_inserted(offloaded):
+    """Write the bodies set aside by ``split_for_insert`` and put them back on the instances."""
+    from .models import KBArticleBody
+
+    KBArticleBody.objects.bulk_create([
+        KBArticleBody(article_id=article.pk, hub_id=article.hub_id, data=compress(content), raw_length=len(content.encode()))
+        for article, content in offloaded
+    ], batch_size=OFFLOAD_BATCH_SIZE)
+    for article, content in offloaded:
+        article.__dict__['content'] = content
+
+
+def offload_existing(hub_id=None, threshold=None, batch_size=OFFLOAD_BATCH_SIZE):
+    """
+    Move the bodies of existing rows at or above ``threshold`` bytes out of
+    row, ``batch_size`` articles per transaction. Returns the number moved.
+    """
+    from .models import KBArticle, KBArticleBody
+
+    threshold = offload_threshold() if threshold is None else threshold
+    if not threshold:
+        return 0
+    # A character encodes to at most 4 bytes, so shorter bodies cannot qualify
+    candidates = KBArticle.objects.filter(body_offloaded=False, content_length__gte=-(-threshold // 4))
+    if hub_id is not None:
+        candidates = candidates.filter(hub_id=hub_id)
+    candidates = candidates.order_by('pk').values_list('pk', 'hub_id', 'content')
+
+    moved = 0
+    last_pk = None
+    while True:
+        page = candidates if last_pk is None else candidates.filter(pk__gt=last_pk)
+        rows = list(page[:batch_size])
+        if not rows:
+            return moved
+        last_pk = rows[-1][0]
+        rows = [row for row in rows if should_offload(row[2], threshold)]
+        if not rows:
+            continue
+        with transaction.atomic():
+            KBArticleBody.objects.bulk_create([
+                KBArticleBody(article_id=pk, hub_id=row_hub_id, data=compress(content), raw_length=len(content.encode()))
+                for pk, row_hub_id, content in rows
+            ])
+            KBArticle.objects.filter(pk__in=[pk for pk, *_rest in rows]).update(content='', body_offloaded=True)
+        moved += len(rows)
@@ -0,0 +1,107 @@
+"""
+Set-based bulk actions for the knowledge base datatables.
+
+A bulk action targets either the selected ids or every row matching the
+datatable's current search. Matching rows are walked in primary-key order
+``BULK_CHUNK_SIZE`` at a time and each chunk is changed with one UPDATE in its
+own short transaction, so even 100k-row operations only ever lock one chunk
+of rows. Hub statistics, the search index and the hub content version are
+kept in step per chunk.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching, reader, search, stats, tree
+from .models import KBArticle, KBCategory
+from .queries import kb_articles_queryset, kb_categories_queryset
+
+BULK_CHUNK_SIZE = 1000
+
+ARTICLE_ACTIONS = ('delete', 'publish', 'unpublish', 'move')
+CATEGORY_ACTIONS = ('delete', 'activate', 'deactivate')
+
+
+def target_queryset(model, hub_id, ids=None, search_query='', category=None):
+    """
+    The rows a bulk action applies to: ``ids`` when given, else every row
+    matching ``search_query`` (articles: within the subtree of ``category``).
+    """
+    if ids is not None:
+        return model.objects.filter(hub_id=hub_id, is_deleted=False, id__in=ids)
+    if model is KBArticle:
+        return kb_articles_queryset(hub_id, search_query, category=category)[0]
+    return kb_categories_queryset(hub_id, search_query, with_counts=False)[0]
+
+
+def _chunks(queryset, chunk_size):
+    """Yield lists of primary keys of ``queryset``, walking it by key."""
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        ids = list(page[:chunk_size])
+        if not ids:
+            return
+        yield ids
+        last_pk = ids[-1]
+
+
+def chunked_update(model, hub_id, queryset, updates, chunk_size=BULK_CHUNK_SIZE, on_chunk=None):
+    """
+    Apply ``updates`` to every row of ``queryset`` chunk by chunk and return the
+    number of rows changed. ``on_chunk(ids)`` runs inside each chunk's
+    transaction after its UPDATE.
+    """
+    contribution = stats.articles_contribution if model is KBArticle else stats.categories_contribution
+    affected = 0
+    for ids in _chunks(queryset, chunk_size):
+        with transaction.atomic():
+            chunk = model.objects.filter(pk__in=ids, is_deleted=False)
+            before = contribution(chunk)
+            affected += chunk.update(updated_at=timezone.now(), **updates)
+            stats.apply(hub_id, before=before, after=contribution(chunk), touched=model is KBArticle)
+            if model is KBArticle:
+                reader.forget(hub_id, ids)
+            if on_chunk:
+                on_chunk(ids)
+    if affected:
+        caching.bump_hub_version(hub_id)
+    return affected
+
+
+def _articles_deleted(hub_id, ids):
+    search.remove_articles(ids)
+
+
+def article_action(hub_id, action, queryset, category_id=None, chunk_size=BULK_CHUNK_SIZE):
+    """Run a bulk article action; returns the number of affected rows."""
+    if action == 'delete':
+        return chunked_update(
+            KBArticle, hub_id, queryset, {'is_deleted': True, 'deleted_at': timezone.now()},
+            chunk_size, on_chunk=lambda ids: _articles_deleted(hub_id, ids),
+        )
+    if action == 'publish':
+        return chunked_update(KBArticle, hub_id, queryset.filter(is_published=False), {'is_published': True}, chunk_size)
+    if action == 'unpublish':
+        return chunked_update(KBArticle, hub_id, queryset.filter(is_published=True), {'is_published': False}, chunk_size)
+    if action == 'move':
+        if category_id is None:
+            queryset = queryset.filter(category__isnull=False)
+        else:
+            queryset = queryset.exclude(category_id=category_id)
+        return chunked_update(KBArticle, hub_id, queryset, {'category_id': category_id}, chunk_size)
+    return 0
+
+
+def category_action(hub_id, action, queryset, chunk_size=BULK_CHUNK_SIZE):
+    """Run a bulk category action; returns the number of affected rows."""
+    if action == 'delete':
+        return chunked_update(
+            KBCategory, hub_id, queryset, {'is_deleted': True, 'deleted_at': timezone.now()},
+            chunk_size, on_chunk=lambda ids: tree.detach_many(hub_id, ids),
+        )
+    if action == 'activate':
+        return chunked_update(KBCategory, hub_id, queryset.filter(is_active=False), {'is_active': True}, chunk_size)
+    if action == 'deactivate':
+        return chunked_update(KBCategory, hub_id, queryset.filter(is_active=True), {'is_active': False}, chunk_size)
+    return 0
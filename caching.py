@@ -0,0 +1,129 @@
+"""
+Per-hub cache helpers for the knowledge base.
+
+Every hub has a content version stored in the Django cache. Cache keys for
+derived data (counts, rendered fragments, ...) embed the current version, and
+every write path calls ``bump_hub_version`` so all of a hub's cached entries
+go stale at once, in O(1), without tracking individual keys.
+
+View counts are not content: flushing buffered views (see ``counters``)
+bumps a separate per-hub views version instead, so reads never invalidate
+the caches that serve them. Only entries whose shape depends on view counts
+(e.g. a datatable sorted by views) and the conditional GET validators embed
+it; elsewhere displayed view counts may lag by up to the entry's lifetime.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'knowledge_base'
+
+# How long cached counts are kept (the version bump invalidates them earlier)
+COUNT_TIMEOUT = 300
+
+
+def _version_key(hub_id):
+    return f'{KEY_PREFIX}:version:{hub_id}'
+
+
+def _views_version_key(hub_id):
+    return f'{KEY_PREFIX}:views-version:{hub_id}'
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    current = cache.get(key) or 0
+    version = max(time.time_ns() // 1000, current + 1)
+    cache.set(key, version, None)
+    return version
+
+
+def hub_version(hub_id):
+    """
+    Return the hub's current content version.
+
+    Versions are microsecond timestamps, so a version lost to cache eviction
+    is re-created as a new, larger value and never revives stale entries.
+    """
+    return _get_version(_version_key(hub_id))
+
+
+def bump_hub_version(hub_id):
+    """Invalidate every cached entry derived from the hub's content."""
+    return _bump_version(_version_key(hub_id))
+
+
+def views_version(hub_id):
+    """Version of the hub's flushed view counts, for entries ordered or filtered by them."""
+    return _get_version(_views_version_key(hub_id))
+
+
+def bump_views_version(hub_id):
+    return _bump_version(_views_version_key(hub_id))
+
+
+def signature(*parts):
+    """Short stable digest of the filter/sort/page parameters of a request."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+def hub_key(hub_id, namespace, *parts):
+    """Cache key scoped to the hub's current content version."""
+    return f'{KEY_PREFIX}:{namespace}:{hub_id}:{hub_version(hub_id)}:{signature(*parts)}'
+
+
+def fragment_timeout():
+    """Seconds rendered datatable fragments are cached for; 0 disables the fragment cache."""
+    return getattr(settings, 'KNOWLEDGE_BASE_FRAGMENT_CACHE_SECONDS', 300)
+
+
+def get_fragment(key):
+    if not fragment_timeout():
+        return None
+    return cache.get(key)
+
+
+def set_fragment(key, html):
+    timeout = fragment_timeout()
+    if timeout:
+        cache.set(key, html, timeout)
+
+
+def approximate_counts_enabled():
+    return getattr(settings, 'KNOWLEDGE_BASE_APPROXIMATE_COUNTS', False)
+
+
+def count_cap():
+    return getattr(settings, 'KNOWLEDGE_BASE_COUNT_CAP', 10000)
+
+
+def cached_count(queryset, hub_id, *parts, approximate=False):
+    """
+    Return ``(count, exact)`` for ``queryset``, cached per hub and ``parts``.
+
+    With ``approximate=True`` the database stops counting after
+    ``KNOWLEDGE_BASE_COUNT_CAP`` rows and ``exact`` is False when the cap
+    was hit, so huge result sets are reported as "cap+" instead of being
+    counted in full.
+    """
+    key = hub_key(hub_id, 'count', approximate, *parts)
+    cached = cache.get(key)
+    if cached is not None:
+        return tuple(cached)
+    if approximate:
+        cap = count_cap()
+        found = queryset.order_by().values('pk')[:cap + 1].count()
+        result = (min(found, cap), found <= cap)
+    else:
+        result = (queryset.count(), True)
+    cache.set(key, result, COUNT_TIMEOUT)
+    return result
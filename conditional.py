@@ -0,0 +1,61 @@
+"""
+Conditional GET (ETag / Last-Modified) for the knowledge base read views.
+
+Validators are derived from the hub's content version (see ``caching``),
+which every write path bumps, and from its views version, which view-count
+flushes bump (the pages show view counts), so checking whether a client's
+copy is still current costs two cache reads and no queries. The ETag also covers everything
+else that shapes the HTML: URL and query string, HTMX request/target, user,
+language and CSRF secret.
+"""
+import datetime
+import hashlib
+
+from django.utils.translation import get_language
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+
+from . import caching
+
+
+def _is_conditional(request):
+    # Exports (and export jobs they start) must always run
+    return 'export' not in request.GET
+
+
+def hub_etag(request, *args, **kwargs):
+    if not _is_conditional(request):
+        return None
+    hub_id = request.session.get('hub_id')
+    parts = (
+        caching.hub_version(hub_id),
+        caching.views_version(hub_id),
+        request.get_full_path(),
+        request.headers.get('HX-Request', ''),
+        request.headers.get('HX-Target', ''),
+        request.session.get('local_user_id', ''),
+        get_language(),
+        request.META.get('CSRF_COOKIE', ''),
+    )
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def hub_last_modified(request, *args, **kwargs):
+    """
+    The later of the hub and views versions as a timestamp. HTTP dates only have second precision, so
+    clients that send If-None-Match (browsers, htmx) are validated by the ETag,
+    which takes precedence.
+    """
+    if not _is_conditional(request):
+        return None
+    hub_id = request.session.get('hub_id')
+    version = max(caching.hub_version(hub_id), caching.views_version(hub_id))
+    return datetime.datetime.fromtimestamp(version / 1_000_000, tz=datetime.timezone.utc)
+
+
+def conditional_hub_view(view_func):
+    """Answer 304 Not Modified while the hub's content and view counts are unchanged."""
+    view_func = condition(etag_func=hub_etag, last_modified_func=hub_last_modified)(view_func)
+    view_func = vary_on_headers('HX-Request', 'HX-Target')(view_func)
+    return cache_control(private=True, no_cache=True)(view_func)
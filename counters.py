@@ -0,0 +1,159 @@
+"""
+Buffered, write-coalescing view counter for ``KBArticle.view_count``.
+
+Article views are accumulated in a per-process in-memory buffer instead of
+issuing one UPDATE per page view (which would serialize readers of a popular
+article on its row lock). The buffer is flushed periodically: articles are
+grouped by their accumulated delta and each group is applied with a single
+``UPDATE ... SET view_count = view_count + n WHERE id IN (...)``.
+
+A flush runs in the background once the buffer is due (on the next view) and
+at most one is queued at a time. A daemon thread also flushes a non-empty
+buffer every ``KNOWLEDGE_BASE_VIEW_FLUSH_SECONDS``, so a hub that goes quiet
+still persists its counts, and the buffer is flushed at exit. A flush is one
+transaction: if it fails nothing was written and the deltas go back into the
+buffer.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from . import caching, jobs, stats
+
+logger = logging.getLogger(__name__)
+
+UPDATE_BATCH_SIZE = 500
+
+_buffer = defaultdict(int)
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+_flush_queued = False
+_flusher_pid = None
+
+
+def flush_interval():
+    return getattr(settings, 'KNOWLEDGE_BASE_VIEW_FLUSH_SECONDS', 30)
+
+
+def flush_threshold():
+    return getattr(settings, 'KNOWLEDGE_BASE_VIEW_FLUSH_THRESHOLD', 1000)
+
+
+def record_view(hub_id, article_id):
+    """Count one view; schedules a background flush when the buffer is due."""
+    _start_flusher()
+    with _lock:
+        _buffer[(hub_id, article_id)] += 1
+        due = (
+            time.monotonic() - _last_flush >= flush_interval()
+            or len(_buffer) >= flush_threshold()
+        )
+    if due:
+        schedule_flush()
+
+
+def schedule_flush():
+    """Queue a background flush unless one is already queued or running."""
+    global _flush_queued
+    with _lock:
+        if _flush_queued:
+            return
+        _flush_queued = True
+    try:
+        jobs.submit(flush)
+    except Exception:
+        with _lock:
+            _flush_queued = False
+        raise
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(flush_interval())
+        with _lock:
+            waiting = bool(_buffer)
+        if waiting:
+            schedule_flush()
+
+
+def _start_flusher():
+    """Start this process's periodic flusher (again after a fork); inline runners flush on demand only."""
+    global _flusher_pid
+    if _flusher_pid == os.getpid() or getattr(settings, 'KNOWLEDGE_BASE_JOB_RUNNER', 'thread') == 'inline':
+        return
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_periodically, name='knowledge-base-view-flush', daemon=True).start()
+
+
+def _take():
+    global _last_flush
+    with _lock:
+        pending = dict(_buffer)
+        _buffer.clear()
+        _last_flush = time.monotonic()
+    return pending
+
+
+def _restore(pending):
+    with _lock:
+        for key, n in pending.items():
+            _buffer[key] += n
+
+
+def apply_deltas(pending):
+    """Write ``{(hub_id, article_id): delta}`` with one UPDATE per distinct delta (per batch)."""
+    from .models import KBArticle
+
+    by_delta = defaultdict(list)
+    by_hub = defaultdict(int)
+    for (hub_id, article_id), delta in pending.items():
+        by_delta[delta].append(article_id)
+        by_hub[hub_id] += delta
+    for delta, article_ids in by_delta.items():
+        for start in range(0, len(article_ids), UPDATE_BATCH_SIZE):
+            KBArticle.objects.filter(pk__in=article_ids[start:start + UPDATE_BATCH_SIZE]).update(
+                view_count=F('view_count') + delta,
+            )
+    for hub_id, views in by_hub.items():
+        stats.adjust(hub_id, total_views=views)
+        # Not a content change: leave the hub version (fragments, counts) alone
+        caching.bump_views_version(hub_id)
+
+
+def flush():
+    """Apply all buffered views in one transaction. On failure the deltas go back into the buffer."""
+    global _flush_queued
+    try:
+        pending = _take()
+        if not pending:
+            return 0
+        try:
+            with transaction.atomic():
+                apply_deltas(pending)
+        except Exception:
+            _restore(pending)
+            raise
+        return sum(pending.values())
+    finally:
+        with _lock:
+            _flush_queued = False
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        logger.exception('Could not flush knowledge base view counts at exit')
+
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,244 @@
+"""
+Streaming bulk import of knowledge base articles and categories.
+
+Files (CSV with a header row, or JSON Lines) are parsed one record at a time
+and written in batches of ``IMPORT_BATCH_SIZE`` rows: each batch resolves its
+category slugs and generates unique slugs with a few set-based queries, then
+goes through ``bulk_create`` in its own transaction. Memory therefore depends
+on the batch size, never on the file size. A dry run performs every step
+inside one transaction that is rolled back at the end.
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from . import bodies, caching, revisions, search, slugs, stats, tree
+from .models import KBArticle, KBCategory
+
+IMPORT_BATCH_SIZE = 1000
+# Only the first errors are kept for the report; the rest are counted
+MAX_REPORTED_ERRORS = 500
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+
+# Header aliases accepted in CSV files (the export headers included). The
+# export's "KBCategory" column holds category names; "category" holds slugs.
+FIELD_ALIASES = {
+    'kbcategory': 'category_name',
+    'category_slug': 'category',
+    'body': 'content',
+}
+
+
+class RecordError(Exception):
+    """Raised for a record that cannot be imported; the message goes into the report."""
+
+
+class ImportResult:
+    """Outcome of an import: created rows and a per-row error report."""
+
+    def __init__(self, kind, dry_run):
+        self.kind = kind
+        self.dry_run = dry_run
+        self.processed = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    @property
+    def errors_truncated(self):
+        return self.error_count > len(self.errors)
+
+
+def detect_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def text_stream(fileobj):
+    """Wrap a binary file (e.g. an upload) for line-by-line text reading."""
+    if isinstance(fileobj, io.TextIOBase):
+        return fileobj
+    return io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+
+
+def _normalize_key(key):
+    key = (key or '').strip().lower().replace(' ', '_')
+    return FIELD_ALIASES.get(key, key)
+
+
+def iter_records(fileobj, file_format):
+    """Yield ``(line_number, record)`` pairs; ``record`` is None for an unparsable line."""
+    stream = text_stream(fileobj)
+    if file_format == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, None
+                continue
+            yield line_number, {_normalize_key(k): v for k, v in record.items()} if isinstance(record, dict) else None
+        return
+    reader = csv.DictReader(stream)
+    for record in reader:
+        yield reader.line_num, {_normalize_key(k): v for k, v in record.items() if k is not None}
+
+
+def _text(record, field):
+    value = record.get(field)
+    return '' if value is None else str(value).strip()
+
+
+def _flag(record, field, default):
+    value = record.get(field)
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def _build_article(hub_id, record):
+    title = _text(record, 'title')
+    if not title:
+        raise RecordError('Missing title')
+    article = KBArticle(
+        hub_id=hub_id,
+        title=title[:255],
+        content=_text(record, 'content'),
+        is_published=_flag(record, 'is_published', False),
+    )
+    if _text(record, 'category'):
+        category = ('slug', _text(record, 'category'))
+    elif _text(record, 'category_name'):
+        category = ('name', _text(record, 'category_name'))
+    else:
+        category = None
+    return article, slugs.base_slug(_text(record, 'slug') or title, 255), category
+
+
+def _build_category(hub_id, record):
+    name = _text(record, 'name')
+    if not name:
+        raise RecordError('Missing name')
+    order = _text(record, 'order') or '0'
+    if not order.isdigit():
+        raise RecordError(f'Invalid order "{order}"')
+    category = KBCategory(
+        hub_id=hub_id,
+        name=name[:255],
+        description=_text(record, 'description'),
+        order=int(order),
+        is_active=_flag(record, 'is_active', True),
+    )
+    return category, slugs.base_slug(_text(record, 'slug') or name, 100), None
+
+
+def _resolve_categories(hub_id, references):
+    """
+    ``{('slug' | 'name', value): category id}`` for the references that match
+    exactly one live category of the hub (names are not unique).
+    """
+    resolved = {}
+    live = KBCategory.objects.filter(hub_id=hub_id, is_deleted=False)
+    for kind in ('slug', 'name'):
+        values = {value for ref_kind, value in references if ref_kind == kind}
+        if not values:
+            continue
+        matches = {}
+        for value, pk in live.filter(**{f'{kind}__in': values}).values_list(kind, 'id'):
+            matches.setdefault(value, []).append(pk)
+        resolved.update(((kind, value), pks[0]) for value, pks in matches.items() if len(pks) == 1)
+    return resolved
+
+
+def _write_batch(hub_id, kind, batch, result):
+    """Create one batch of ``(line, obj, base slug, category slug)`` rows in a transaction."""
+    if kind == 'kb_articles':
+        category_ids = _resolve_categories(hub_id, {category for *_rest, category in batch if category})
+        rows = []
+        for line, obj, base, category in batch:
+            if category and category not in category_ids:
+                ref_kind, ref_value = category
+                if ref_kind == 'slug':
+                    message = f'Unknown category "{ref_value}"'
+                else:
+                    message = f'Unknown or ambiguous category name "{ref_value}"'
+                result.add_error(line, message)
+                continue
+            obj.category_id = category_ids.get(category)
+            rows.append((obj, base))
+    else:
+        rows = [(obj, base) for _line, obj, base, _category in batch]
+    if not rows:
+        return
+
+    model = KBArticle if kind == 'kb_articles' else KBCategory
+    objs = [obj for obj, _base in rows]
+    for obj, slug in zip(objs, slugs.unique_slugs(model, hub_id, [base for _obj, base in rows])):
+        obj.slug = slug
+    with transaction.atomic():
+        if kind == 'kb_articles':
+            for obj in objs:
+                obj.refresh_content_stats()
+            offloaded = bodies.split_for_insert(objs)
+            KBArticle.objects.bulk_create(objs)
+            bodies.store_inserted(offloaded)
+            revisions.record_created(objs)
+            search.index_articles(objs)
+            stats.apply(hub_id, after=stats.total(stats.article_contribution(obj) for obj in objs), touched=True)
+        else:
+            KBCategory.objects.bulk_create([tree.as_root(obj) for obj in objs])
+            stats.apply(hub_id, after=stats.total(stats.category_contribution(obj) for obj in objs))
+    result.created += len(objs)
+
+
+def _run(hub_id, kind, records, result, batch_size):
+    build = _build_article if kind == 'kb_articles' else _build_category
+    batch = []
+    for line, record in records:
+        result.processed += 1
+        if record is None:
+            result.add_error(line, 'Unreadable record')
+            continue
+        try:
+            obj, base, category = build(hub_id, record)
+        except RecordError as exc:
+            result.add_error(line, str(exc))
+            continue
+        batch.append((line, obj, base, category))
+        if len(batch) >= batch_size:
+            _write_batch(hub_id, kind, batch, result)
+            batch = []
+    if batch:
+        _write_batch(hub_id, kind, batch, result)
+
+
+def import_file(hub_id, kind, fileobj, file_format='csv', dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import ``kb_articles`` or ``kb_categories`` from a CSV/JSONL file object.
+
+    Article category references are category slugs. Returns an
+    ``ImportResult``; with ``dry_run`` nothing is kept.
+    """
+    result = ImportResult(kind, dry_run)
+    records = iter_records(fileobj, file_format)
+    if dry_run:
+        with transaction.atomic():
+            _run(hub_id, kind, records, result, batch_size)
+            transaction.set_rollback(True)
+        return result
+    try:
+        _run(hub_id, kind, records, result, batch_size)
+    finally:
+        if result.created:
+            caching.bump_hub_version(hub_id)
+    return result
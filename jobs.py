@@ -0,0 +1,189 @@
+"""
+In-process background runner for knowledge base export jobs.
+
+Jobs run on a small thread pool owned by the worker process, so exporting a
+whole hub never holds a request open and no external broker is needed. Files
+are written to local storage under ``MEDIA_ROOT/knowledge_base/exports``.
+
+``KNOWLEDGE_BASE_JOB_RUNNER = 'inline'`` runs jobs synchronously (tests,
+management shells); the default ``'thread'`` uses the pool.
+"""
+import atexit
+import datetime
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from . import exports
+
+logger = logging.getLogger(__name__)
+
+# Persist progress every this many rows
+PROGRESS_EVERY = 1000
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def export_storage():
+    return FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'knowledge_base', 'exports'))
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'KNOWLEDGE_BASE_JOB_WORKERS', 2),
+                thread_name_prefix='knowledge-base-jobs',
+            )
+            atexit.register(_executor.shutdown, wait=False)
+        return _executor
+
+
+def submit(func, *args):
+    """Run ``func(*args)`` in the background pool (or inline), closing its DB connections afterwards."""
+    if getattr(settings, 'KNOWLEDGE_BASE_JOB_RUNNER', 'thread') == 'inline':
+        return func(*args)
+
+    def run():
+        try:
+            func(*args)
+        except Exception:
+            logger.exception('knowledge_base background task failed')
+        finally:
+            connections.close_all()
+
+    return _get_executor().submit(run)
+
+
+# ----------------------------------------------------------------------
+# Export jobs
+# ----------------------------------------------------------------------
+
+def _export_spec(job):
+    from .queries import kb_articles_queryset, kb_categories_queryset, subtree_category
+
+    params = job.params or {}
+    args = (job.hub_id, params.get('q', ''), params.get('sort', ''), params.get('dir', 'asc'))
+    if job.kind == 'kb_articles':
+        category = subtree_category(job.hub_id, params['category']) if params.get('category') else None
+        qs = kb_articles_queryset(*args, category=category)[0]
+        return qs, exports.KB_ARTICLE_EXPORT_FIELDS
+    qs = kb_categories_queryset(*args)[0]
+    return qs, exports.KB_CATEGORY_EXPORT_FIELDS
+
+
+def _track_progress(job, rows):
+    from .models import KBExportJob
+
+    processed = 0
+    for row in rows:
+        yield row
+        processed += 1
+        if processed % PROGRESS_EVERY == 0:
+            KBExportJob.objects.filter(pk=job.pk).update(processed_rows=processed)
+    job.processed_rows = processed
+
+
+def run_export(job_id):
+    """Build the export file of a job, recording progress and the outcome on the job row."""
+    from .models import KBExportJob
+
+    try:
+        job = KBExportJob.objects.get(pk=job_id)
+    except KBExportJob.DoesNotExist:
+        logger.warning('Export job %s no longer exists', job_id)
+        return
+    except Exception:
+        logger.exception('Could not load export job %s', job_id)
+        return
+    try:
+        KBExportJob.objects.filter(pk=job.pk).update(status=KBExportJob.STATUS_RUNNING)
+        qs, export_fields = _export_spec(job)
+        fields, headers = zip(*export_fields)
+        total = qs.count()
+        KBExportJob.objects.filter(pk=job.pk).update(total_rows=total)
+
+        storage = export_storage()
+        file_name = f'{job.pk}.{"xlsx" if job.export_format == "excel" else "csv"}'
+        path = storage.path(file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        rows = _track_progress(job, exports.iter_rows(qs, fields))
+        if job.export_format == 'excel':
+            with open(path, 'wb') as fileobj:
+                exports.write_excel(fileobj, rows, headers)
+        else:
+            with open(path, 'w', newline='', encoding='utf-8') as fileobj:
+                exports.write_csv(fileobj, rows, headers)
+    except Exception as exc:
+        logger.exception('Export job %s failed', job.pk)
+        KBExportJob.objects.filter(pk=job.pk).update(
+            status=KBExportJob.STATUS_FAILED, error=str(exc), finished_at=timezone.now(),
+        )
+        return
+    finished = KBExportJob.objects.filter(pk=job.pk).update(
+        status=KBExportJob.STATUS_DONE, file_name=file_name,
+        processed_rows=job.processed_rows, finished_at=timezone.now(),
+    )
+    if not finished:
+        # The job was deleted while running; nothing will ever serve the file
+        logger.warning('Export job %s was deleted while running', job.pk)
+        export_storage().delete(file_name)
+
+
+def export_timeout():
+    """How long an export may stay pending or running before it is considered lost."""
+    return datetime.timedelta(minutes=getattr(settings, 'KNOWLEDGE_BASE_EXPORT_TIMEOUT_MINUTES', 60))
+
+
+def is_stale(job):
+    """Whether an unfinished job has outlived ``export_timeout`` (its worker restarted or crashed)."""
+    return not job.is_finished and job.created_at < timezone.now() - export_timeout()
+
+
+def fail_stale_exports(hub_id):
+    """Mark the hub's pending or running jobs older than ``export_timeout`` as failed; returns how many."""
+    from .models import KBExportJob
+
+    return KBExportJob.objects.filter(
+        hub_id=hub_id, created_at__lt=timezone.now() - export_timeout(),
+        status__in=[KBExportJob.STATUS_PENDING, KBExportJob.STATUS_RUNNING],
+    ).update(status=KBExportJob.STATUS_FAILED, error=_('The export timed out.'), finished_at=timezone.now())
+
+
+def purge_expired_exports(hub_id):
+    """
+    Delete the hub's finished export jobs (and files) past the retention
+    window. Jobs still running are kept unless they timed out.
+    """
+    from .models import KBExportJob
+
+    fail_stale_exports(hub_id)
+    hours = getattr(settings, 'KNOWLEDGE_BASE_EXPORT_RETENTION_HOURS', 24)
+    cutoff = timezone.now() - datetime.timedelta(hours=hours)
+    expired = KBExportJob.objects.filter(
+        hub_id=hub_id, created_at__lt=cutoff,
+        status__in=[KBExportJob.STATUS_DONE, KBExportJob.STATUS_FAILED],
+    )
+    storage = export_storage()
+    for file_name in expired.exclude(file_name='').values_list('file_name', flat=True):
+        storage.delete(file_name)
+    expired.delete()
+
+
+def enqueue_export(hub_id, kind, export_format, params):
+    """Create an export job and schedule it once the surrounding transaction commits."""
+    from .models import KBExportJob
+
+    purge_expired_exports(hub_id)
+    job = KBExportJob.objects.create(hub_id=hub_id, kind=kind, export_format=export_format, params=params)
+    transaction.on_commit(lambda: submit(run_export, job.pk))
+    return job
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledge_base import imports
+
+
+class Command(BaseCommand):
+    help = 'Stream-import knowledge base articles or categories from a CSV or JSON Lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--hub', dest='hub_id', required=True)
+        parser.add_argument('--kind', choices=['articles', 'categories'], default='articles')
+        parser.add_argument('--format', dest='file_format', choices=['csv', 'jsonl'], help='Default: from the file extension.')
+        parser.add_argument('--batch-size', type=int, default=imports.IMPORT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report without keeping anything.')
+
+    def handle(self, path, hub_id, kind, file_format, batch_size, dry_run, **options):
+        try:
+            fileobj = open(path, encoding='utf-8-sig', newline='')
+        except OSError as exc:
+            raise CommandError(exc)
+        with fileobj:
+            result = imports.import_file(
+                hub_id, f'kb_{kind}', fileobj, file_format or imports.detect_format(path),
+                dry_run=dry_run, batch_size=batch_size,
+            )
+        for line, message in result.errors:
+            self.stderr.write(f'line {line}: {message}')
+        if result.errors_truncated:
+            self.stderr.write(f'... {result.error_count - len(result.errors)} more errors')
+        prefix = 'Dry run: ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{result.processed} records read, {result.created} created, {result.error_count} rejected.'
+        ))
@@ -0,0 +1,116 @@
+"""
+Benchmark the knowledge base datatable queries on a synthetic hub.
+
+Typical before/after comparison of the composite indexes::
+
+    manage.py migrate knowledge_base 0003
+    manage.py kb_benchmark --articles 100000 --keep      # prints the hub id
+    manage.py migrate knowledge_base
+    manage.py kb_benchmark --hub <hub id>
+
+Besides the first and second pages, every sort is timed at a deep page
+(``--deep-page``, 500 by default) both through its cursor and through
+OFFSET, which is the cost keyset pagination removes. Timings depend on the
+database and hardware, so none are recorded in the repository.
+"""
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from knowledge_base import tree
+from knowledge_base.models import KBCategory, KBArticle
+from knowledge_base.pagination import keyset_ordering, keyset_page, row_cursor
+from knowledge_base.queries import KB_ARTICLE_SORT_FIELDS, KB_CATEGORY_SORT_FIELDS, with_article_counts
+
+
+class Command(BaseCommand):
+    help = 'Time list/sort queries of the knowledge base datatables on a large synthetic hub.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', help='Reuse an existing (seeded) hub instead of creating one.')
+        parser.add_argument('--articles', type=int, default=100000)
+        parser.add_argument('--categories', type=int, default=200)
+        parser.add_argument('--per-page', type=int, default=25)
+        parser.add_argument('--deep-page', type=int, default=500, help='Page timed by cursor and by offset.')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows for a later run.')
+
+    def handle(self, *args, **options):
+        hub_id = uuid.UUID(options['hub']) if options['hub'] else uuid.uuid4()
+        if not KBArticle.objects.filter(hub_id=hub_id).exists():
+            self._seed(hub_id, options['articles'], options['categories'])
+        self.stdout.write(f'Hub {hub_id} on {connection.vendor}')
+
+        per_page, repeat = options['per_page'], options['repeat']
+        articles = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False).defer('content')
+        categories = with_article_counts(KBCategory.objects.filter(hub_id=hub_id, is_deleted=False))
+        rows = []
+        for label, qs, fields in (('articles', articles, KB_ARTICLE_SORT_FIELDS), ('categories', categories, KB_CATEGORY_SORT_FIELDS)):
+            for field in sorted(set(fields.values())):
+                for descending in (False, True):
+                    first = keyset_page(qs, field, descending, per_page=per_page)
+                    ordered = qs.order_by(*keyset_ordering(qs, field, descending))
+                    deep_index = min((options['deep_page'] - 1) * per_page, max(qs.count() - per_page, 0))
+                    # The cursor a reader paging forward would hold on arriving at the deep page
+                    deep_cursor = None
+                    if deep_index:
+                        deep_cursor = row_cursor(qs, field, descending, ordered[deep_index - 1], deep_index)
+                    rows.append((
+                        f'{label}.{field}{" desc" if descending else ""}',
+                        self._time(lambda: keyset_page(qs, field, descending, per_page=per_page), repeat),
+                        self._time(lambda: keyset_page(qs, field, descending, first.next_cursor, per_page), repeat),
+                        self._time(lambda: keyset_page(qs, field, descending, deep_cursor, per_page), repeat),
+                        self._time(lambda: list(ordered[deep_index:deep_index + per_page]), repeat),
+                    ))
+        rows.append(('articles.count', self._time(articles.count, repeat), None, None, None))
+
+        deep = f'page {options["deep_page"]}'
+        self.stdout.write(
+            f'{"query":<36}{"first page":>14}{"next page":>14}{deep + " (cursor)":>22}{deep + " (offset)":>22}'
+        )
+        for label, first_ms, next_ms, cursor_ms, offset_ms in rows:
+            self.stdout.write(
+                f'{label:<36}{first_ms:>12.2f}ms'
+                + (f'{next_ms:>12.2f}ms{cursor_ms:>20.2f}ms{offset_ms:>20.2f}ms' if next_ms is not None else '')
+            )
+
+        if not options['keep'] and not options['hub']:
+            KBArticle.all_objects.filter(hub_id=hub_id).delete()
+            KBCategory.all_objects.filter(hub_id=hub_id).delete()
+
+    def _time(self, func, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
+
+    def _seed(self, hub_id, n_articles, n_categories):
+        self.stdout.write(f'Seeding {n_articles} articles in {n_categories} categories...')
+        categories = KBCategory.objects.bulk_create([
+            tree.as_root(KBCategory(hub_id=hub_id, name=f'Category {i:05d}', slug=f'category-{i:05d}', order=i % 50))
+            for i in range(n_categories)
+        ])
+        batch = []
+        for i in range(n_articles):
+            content = f'Synthetic article {i}. ' * (20 + i % 200)
+            article = KBArticle(
+                hub_id=hub_id,
+                category=categories[i % n_categories] if i % 7 else None,
+                title=f'Article {uuid.uuid4().hex[:12]}',
+                slug=f'article-{i}',
+                content=content,
+                is_published=bool(i % 3),
+                view_count=(i * 7919) % 10000,
+                is_deleted=i % 20 == 0,
+            )
+            article.refresh_content_stats()
+            batch.append(article)
+            if len(batch) >= 2000:
+                KBArticle.objects.bulk_create(batch)
+                batch = []
+        KBArticle.objects.bulk_create(batch)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledge_base import bodies
+
+
+class Command(BaseCommand):
+    help = 'Move large existing article bodies to compressed out-of-row storage.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', dest='hub_id', help='Only convert the articles of this hub.')
+        parser.add_argument('--threshold', type=int, help='Minimum body size in bytes (defaults to KNOWLEDGE_BASE_BODY_OFFLOAD_THRESHOLD).')
+        parser.add_argument('--batch-size', type=int, default=bodies.OFFLOAD_BATCH_SIZE)
+
+    def handle(self, *args, hub_id=None, threshold=None, batch_size=bodies.OFFLOAD_BATCH_SIZE, **options):
+        threshold = bodies.offload_threshold() if threshold is None else threshold
+        if not threshold:
+            raise CommandError('No threshold: set KNOWLEDGE_BASE_BODY_OFFLOAD_THRESHOLD or pass --threshold.')
+        moved = bodies.offload_existing(hub_id=hub_id, threshold=threshold, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Offloaded {moved} article bodies.'))
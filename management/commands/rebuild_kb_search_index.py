@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from knowledge_base import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the knowledge base full-text search index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', dest='hub_id', help='Only rebuild the index of this hub.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, hub_id=None, batch_size=500, **options):
+        total = search.rebuild_index(hub_id=hub_id, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} articles.'))
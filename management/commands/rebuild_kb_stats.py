@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from knowledge_base import stats
+from knowledge_base.models import KBArticle, KBCategory
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized knowledge base statistics to fix drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', dest='hub_id', help='Only rebuild the statistics of this hub.')
+
+    def handle(self, *args, hub_id=None, **options):
+        if hub_id:
+            hub_ids = [hub_id]
+        else:
+            hub_ids = set(KBArticle.all_objects.values_list('hub_id', flat=True).distinct())
+            hub_ids |= set(KBCategory.all_objects.values_list('hub_id', flat=True).distinct())
+            hub_ids.discard(None)
+        for hub in hub_ids:
+            stats.rebuild(hub)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt statistics for {len(hub_ids)} hubs.'))
@@ -0,0 +1,62 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_search_index(apps, schema_editor):
+    from knowledge_base.search import document_terms
+
+    KBArticle = apps.get_model('knowledge_base', 'KBArticle')
+    KBSearchDocument = apps.get_model('knowledge_base', 'KBSearchDocument')
+    KBSearchPosting = apps.get_model('knowledge_base', 'KBSearchPosting')
+
+    documents, postings = [], []
+    articles = KBArticle.objects.filter(is_deleted=False).order_by('pk')
+    for article in articles.iterator(chunk_size=500):
+        counts = document_terms(article.title, article.slug, article.content)
+        documents.append(KBSearchDocument(article_id=article.pk, hub_id=article.hub_id, length=sum(counts.values())))
+        postings.extend(
+            KBSearchPosting(hub_id=article.hub_id, term=term, article_id=article.pk, frequency=freq)
+            for term, freq in counts.items()
+        )
+        if len(postings) >= 5000:
+            KBSearchDocument.objects.bulk_create(documents)
+            KBSearchPosting.objects.bulk_create(postings)
+            documents, postings = [], []
+    KBSearchDocument.objects.bulk_create(documents)
+    KBSearchPosting.objects.bulk_create(postings)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KBSearchDocument',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='knowledge_base.kbarticle')),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, null=True)),
+                ('length', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'knowledge_base_kbsearchdocument',
+            },
+        ),
+        migrations.CreateModel(
+            name='KBSearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, null=True)),
+                ('term', models.CharField(max_length=64)),
+                ('frequency', models.PositiveIntegerField(default=1)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_postings', to='knowledge_base.kbarticle')),
+            ],
+            options={
+                'db_table': 'knowledge_base_kbsearchposting',
+                'indexes': [models.Index(fields=['hub_id', 'term'], name='kb_posting_hub_term_idx')],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
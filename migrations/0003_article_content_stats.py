@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+def backfill_content_stats(apps, schema_editor):
+    from knowledge_base.models import content_stats
+
+    KBArticle = apps.get_model('knowledge_base', 'KBArticle')
+    batch = []
+    for article in KBArticle.objects.order_by('pk').only('pk', 'content').iterator(chunk_size=500):
+        article.excerpt, article.content_length, article.word_count = content_stats(article.content)
+        batch.append(article)
+        if len(batch) >= 500:
+            KBArticle.objects.bulk_update(batch, ['excerpt', 'content_length', 'word_count'])
+            batch = []
+    KBArticle.objects.bulk_update(batch, ['excerpt', 'content_length', 'word_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0002_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kbarticle',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=201, verbose_name='Excerpt'),
+        ),
+        migrations.AddField(
+            model_name='kbarticle',
+            name='content_length',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Content Length'),
+        ),
+        migrations.AddField(
+            model_name='kbarticle',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Word Count'),
+        ),
+        migrations.RunPython(backfill_content_stats, migrations.RunPython.noop),
+    ]
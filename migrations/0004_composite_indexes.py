@@ -0,0 +1,59 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0003_article_content_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='kbcategory',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'name', 'id'], name='kb_cat_hub_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kbcategory',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'order', 'id'], name='kb_cat_hub_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kbcategory',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'is_active', 'id'], name='kb_cat_hub_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kbcategory',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'created_at', 'id'], name='kb_cat_hub_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kbcategory',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'slug'], name='kb_cat_hub_slug_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kbarticle',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'title', 'id'], name='kb_art_hub_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kbarticle',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'category', 'id'], name='kb_art_hub_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kbarticle',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'is_published', 'id'], name='kb_art_hub_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kbarticle',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'view_count', 'id'], name='kb_art_hub_views_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kbarticle',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'content_length', 'id'], name='kb_art_hub_length_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kbarticle',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'created_at', 'id'], name='kb_art_hub_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kbarticle',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'slug'], name='kb_art_hub_slug_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0004_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KBExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('kind', models.CharField(choices=[('kb_articles', 'Articles'), ('kb_categories', 'Categories')], max_length=20, verbose_name='Kind')),
+                ('export_format', models.CharField(choices=[('csv', 'CSV'), ('excel', 'Excel')], max_length=10, verbose_name='Format')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Parameters')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='Status')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='Total Rows')),
+                ('processed_rows', models.PositiveIntegerField(default=0, verbose_name='Processed Rows')),
+                ('file_name', models.CharField(blank=True, max_length=255, verbose_name='File Name')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+            ],
+            options={
+                'db_table': 'knowledge_base_kbexportjob',
+                'abstract': False,
+            },
+        ),
+    ]
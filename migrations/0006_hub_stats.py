@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0005_export_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KBHubStats',
+            fields=[
+                ('hub_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('total_categories', models.IntegerField(default=0)),
+                ('active_categories', models.IntegerField(default=0)),
+                ('total_articles', models.IntegerField(default=0)),
+                ('published_articles', models.IntegerField(default=0)),
+                ('uncategorized_articles', models.IntegerField(default=0)),
+                ('total_views', models.BigIntegerField(default=0)),
+                ('last_article_update', models.DateTimeField(blank=True, null=True)),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'knowledge_base_kbhubstats',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0006_hub_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KBArticleRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, null=True)),
+                ('number', models.PositiveIntegerField()),
+                ('is_snapshot', models.BooleanField(default=False)),
+                ('title', models.CharField(max_length=255)),
+                ('data', models.BinaryField()),
+                ('content_length', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.UUIDField(blank=True, null=True)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='knowledge_base.kbarticle')),
+            ],
+            options={
+                'db_table': 'knowledge_base_kbarticlerevision',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='kbarticlerevision',
+            constraint=models.UniqueConstraint(fields=('article', 'number'), name='kb_revision_article_number_uniq'),
+        ),
+    ]
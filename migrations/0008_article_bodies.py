@@ -0,0 +1,36 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+import knowledge_base.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0007_article_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kbarticle',
+            name='body_offloaded',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Body Offloaded'),
+        ),
+        migrations.AlterField(
+            model_name='kbarticle',
+            name='content',
+            field=knowledge_base.models.ArticleContentField(verbose_name='Content'),
+        ),
+        migrations.CreateModel(
+            name='KBArticleBody',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stored_body', serialize=False, to='knowledge_base.kbarticle')),
+                ('hub_id', models.UUIDField(blank=True, null=True)),
+                ('data', models.BinaryField()),
+                ('raw_length', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'knowledge_base_kbarticlebody',
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    KBCategory = apps.get_model('knowledge_base', 'KBCategory')
+    batch = []
+    for category in KBCategory.objects.only('id').iterator(chunk_size=1000):
+        category.path = category.id.hex + '/'
+        batch.append(category)
+        if len(batch) >= 1000:
+            KBCategory.objects.bulk_update(batch, ['path'])
+            batch = []
+    KBCategory.objects.bulk_update(batch, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0008_article_bodies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kbcategory',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='knowledge_base.kbcategory', verbose_name='Parent'),
+        ),
+        migrations.AddField(
+            model_name='kbcategory',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=512),
+        ),
+        migrations.AddField(
+            model_name='kbcategory',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='kbcategory',
+            index=models.Index(fields=['hub_id', 'path'], name='kb_cat_hub_path_idx'),
+        ),
+    ]
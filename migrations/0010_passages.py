@@ -0,0 +1,29 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0009_category_tree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KBPassage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, null=True)),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('start', models.PositiveIntegerField(default=0)),
+                ('end', models.PositiveIntegerField(default=0)),
+                ('data', models.BinaryField()),
+                ('content_hash', models.CharField(max_length=40)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='passages', to='knowledge_base.kbarticle')),
+            ],
+            options={
+                'db_table': 'knowledge_base_kbpassage',
+                'indexes': [models.Index(fields=['hub_id'], name='kb_passage_hub_idx')],
+            },
+        ),
+    ]
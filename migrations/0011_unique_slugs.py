@@ -0,0 +1,49 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_slugs(apps, schema_editor):
+    """Give every live row a slug unique in its hub before the constraints are added."""
+    from knowledge_base import slugs
+
+    for model_name, label, max_length in (('KBArticle', 'title', 255), ('KBCategory', 'name', 100)):
+        model = apps.get_model('knowledge_base', model_name)
+        live = model.objects.filter(is_deleted=False)
+        duplicated = (
+            live.values('hub_id', 'slug').annotate(rows=Count('id')).filter(rows__gt=1)
+            .values_list('hub_id', 'slug').order_by()
+        )
+        for hub_id, slug in duplicated:
+            # The oldest row keeps the slug; the others get suffixed ones
+            rows = list(live.filter(hub_id=hub_id, slug=slug).order_by('created_at', 'id')[1:])
+            bases = [slugs.base_slug(slug or getattr(row, label), max_length) for row in rows]
+            for row, new_slug in zip(rows, slugs.unique_slugs(model, hub_id, bases)):
+                row.slug = new_slug
+            model.objects.bulk_update(rows, ['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0010_passages'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_slugs, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='kbarticle',
+            name='kb_art_hub_slug_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='kbcategory',
+            name='kb_cat_hub_slug_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='kbarticle',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_deleted', False)), fields=('hub_id', 'slug'), name='kb_art_hub_slug_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='kbcategory',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_deleted', False)), fields=('hub_id', 'slug'), name='kb_cat_hub_slug_uniq'),
+        ),
+    ]
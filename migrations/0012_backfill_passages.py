@@ -0,0 +1,54 @@
+from django.db import migrations
+
+
+def build_passages(apps, schema_editor):
+    from knowledge_base.bodies import decompress
+    from knowledge_base.retrieval import article_passages, content_hash
+
+    KBArticle = apps.get_model('knowledge_base', 'KBArticle')
+    KBArticleBody = apps.get_model('knowledge_base', 'KBArticleBody')
+    KBPassage = apps.get_model('knowledge_base', 'KBPassage')
+
+    def flush(batch, rows):
+        offloaded = [article.pk for article in batch if article.body_offloaded]
+        bodies = dict(KBArticleBody.objects.filter(article_id__in=offloaded).values_list('article_id', 'data'))
+        for article in batch:
+            if article.pk in bodies:
+                article.content = decompress(bodies[article.pk])
+            digest = content_hash(article.title, article.content)
+            rows.extend(
+                KBPassage(
+                    article_id=article.pk, hub_id=article.hub_id, position=position,
+                    start=start, end=end, data=data, content_hash=digest,
+                )
+                for position, (start, end, data) in enumerate(article_passages(article))
+            )
+        if len(rows) >= 5000:
+            KBPassage.objects.bulk_create(rows)
+            rows.clear()
+
+    # Articles saved since 0010 already have their passages
+    articles = (
+        KBArticle.objects.filter(is_deleted=False)
+        .exclude(pk__in=KBPassage.objects.values('article_id'))
+        .order_by('pk')
+    )
+    batch, rows = [], []
+    for article in articles.iterator(chunk_size=500):
+        batch.append(article)
+        if len(batch) >= 500:
+            flush(batch, rows)
+            batch = []
+    flush(batch, rows)
+    KBPassage.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0011_unique_slugs'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_passages, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,51 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.query_utils import DeferredAttribute
+from django.utils.html import strip_tags
 from django.utils.translation import gettext_lazy as _
 
 from apps.core.models.base import HubBaseModel
 
+EXCERPT_LENGTH = 200
+
+
+def content_stats(content):
+    """Return ``(excerpt, content_length, word_count)`` for an article body."""
+    words = strip_tags(content or '').split()
+    excerpt = ''
+    for word in words:
+        candidate = f'{excerpt} {word}' if excerpt else word
+        if len(candidate) > EXCERPT_LENGTH:
+            excerpt = (excerpt or word[:EXCERPT_LENGTH - 1]) + '\u2026'
+            break
+        excerpt = candidate
+    return excerpt, len(content or ''), len(words)
+
+
+class OffloadedContentAttribute(DeferredAttribute):
+    """Reads an offloaded article body from ``KBArticleBody`` on first access."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        data = instance.__dict__
+        if self.field.attname not in data and 'body_offloaded' not in data:
+            instance.refresh_from_db(fields=['body_offloaded'])
+        if self.field.attname not in data and data.get('body_offloaded'):
+            from . import bodies
+            data[self.field.attname] = bodies.load(instance.pk)
+        return super().__get__(instance, cls)
+
+
+class ArticleContentField(models.TextField):
+    """Article body that may be stored compressed out of row (see ``knowledge_base.bodies``)."""
+    descriptor_class = OffloadedContentAttribute
+
+
 class KBCategory(HubBaseModel):
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children', verbose_name=_('Parent'))
+    # Materialized path of ancestor ids, see ``knowledge_base.tree``
+    path = models.CharField(max_length=512, blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     name = models.CharField(max_length=255, verbose_name=_('Name'))
     slug = models.SlugField(max_length=100, verbose_name=_('Slug'))
     description = models.TextField(blank=True, verbose_name=_('Description'))
@@ -12,22 +54,260 @@ class KBCategory(HubBaseModel):
 
     class Meta(HubBaseModel.Meta):
         db_table = 'knowledge_base_kbcategory'
+        # Every datatable query is "hub_id = X AND is_deleted = false ORDER BY
+        # <column>, id": one partial index per sortable column (id is the
+        # keyset tie-breaker).
+        indexes = [
+            models.Index(fields=['hub_id', 'name', 'id'], name='kb_cat_hub_name_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'order', 'id'], name='kb_cat_hub_order_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'is_active', 'id'], name='kb_cat_hub_active_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'created_at', 'id'], name='kb_cat_hub_created_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'path'], name='kb_cat_hub_path_idx'),
+        ]
+        # Also the index behind slug lookups; see ``knowledge_base.slugs``
+        constraints = [
+            models.UniqueConstraint(fields=['hub_id', 'slug'], name='kb_cat_hub_slug_uniq', condition=models.Q(is_deleted=False)),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # New categories get their path here; re-parenting goes through tree.move().
+        if not self.path:
+            from . import tree
+            self.path = tree.path_for(self, self.parent)
+            self.depth = 0 if self.parent is None else self.parent.depth + 1
+        super().save(*args, **kwargs)
+
 
 class KBArticle(HubBaseModel):
     category = models.ForeignKey('KBCategory', on_delete=models.SET_NULL, null=True)
     title = models.CharField(max_length=255, verbose_name=_('Title'))
     slug = models.SlugField(max_length=255, verbose_name=_('Slug'))
-    content = models.TextField(verbose_name=_('Content'))
+    content = ArticleContentField(verbose_name=_('Content'))
     is_published = models.BooleanField(default=False, verbose_name=_('Is Published'))
     view_count = models.PositiveIntegerField(default=0, verbose_name=_('View Count'))
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH + 1, blank=True, editable=False, verbose_name=_('Excerpt'))
+    content_length = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('Content Length'))
+    word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('Word Count'))
+    body_offloaded = models.BooleanField(default=False, editable=False, verbose_name=_('Body Offloaded'))
+
+    CONTENT_STATS_FIELDS = ('excerpt', 'content_length', 'word_count')
 
     class Meta(HubBaseModel.Meta):
         db_table = 'knowledge_base_kbarticle'
+        indexes = [
+            models.Index(fields=['hub_id', 'title', 'id'], name='kb_art_hub_title_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'category', 'id'], name='kb_art_hub_category_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'is_published', 'id'], name='kb_art_hub_published_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'view_count', 'id'], name='kb_art_hub_views_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'content_length', 'id'], name='kb_art_hub_length_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'created_at', 'id'], name='kb_art_hub_created_idx', condition=models.Q(is_deleted=False)),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['hub_id', 'slug'], name='kb_art_hub_slug_uniq', condition=models.Q(is_deleted=False)),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if instance.__dict__.get('body_offloaded'):
+            # The column is empty; leave the attribute unset so the first read loads the body.
+            instance.__dict__.pop('content', None)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if self.__dict__.get('body_offloaded') and (fields is None or 'content' in fields):
+            self.__dict__.pop('content', None)
+
+    def refresh_content_stats(self):
+        self.excerpt, self.content_length, self.word_count = content_stats(self.content)
+
+    def save(self, *args, **kwargs):
+        # Keep the list projection in sync whenever the body is written. An
+        # offloaded body that was never read counts as deferred and is left alone.
+        update_fields = kwargs.get('update_fields')
+        if 'content' in self.get_deferred_fields() or (update_fields is not None and 'content' not in update_fields):
+            return super().save(*args, **kwargs)
+
+        from . import bodies
+
+        self.refresh_content_stats()
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.CONTENT_STATS_FIELDS) | {'body_offloaded'}
+        was_offloaded = self.body_offloaded
+        content = self.content
+        self.body_offloaded = bodies.should_offload(content)
+        with transaction.atomic():
+            if self.body_offloaded:
+                self.__dict__['content'] = ''
+                try:
+                    super().save(*args, **kwargs)
+                finally:
+                    self.__dict__['content'] = content
+                bodies.store(self, content)
+            else:
+                super().save(*args, **kwargs)
+                if was_offloaded:
+                    bodies.discard(self.pk)
+
+
+class KBArticleBody(models.Model):
+    """zlib-compressed body of an article whose ``content`` column is left empty."""
+    article = models.OneToOneField('KBArticle', on_delete=models.CASCADE, primary_key=True, related_name='stored_body')
+    hub_id = models.UUIDField(null=True, blank=True)
+    data = models.BinaryField()
+    raw_length = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'knowledge_base_kbarticlebody'
+
+
+class KBSearchDocument(models.Model):
+    """Per-article length statistics for BM25 ranking."""
+    article = models.OneToOneField(
+        'KBArticle', on_delete=models.CASCADE, primary_key=True, related_name='search_document',
+    )
+    hub_id = models.UUIDField(null=True, blank=True, db_index=True)
+    length = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'knowledge_base_kbsearchdocument'
+
+
+class KBSearchPosting(models.Model):
+    """One (term, article) entry of the inverted search index."""
+    hub_id = models.UUIDField(null=True, blank=True)
+    term = models.CharField(max_length=64)
+    article = models.ForeignKey('KBArticle', on_delete=models.CASCADE, related_name='search_postings')
+    frequency = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        db_table = 'knowledge_base_kbsearchposting'
+        indexes = [
+            models.Index(fields=['hub_id', 'term'], name='kb_posting_hub_term_idx'),
+        ]
+
+
+class KBPassage(models.Model):
+    """
+    One passage of an article with its hashed TF vector (packed sparse, see
+    ``knowledge_base.retrieval``). ``start``/``end`` are offsets into the
+    article's tag-stripped text.
+    """
+    article = models.ForeignKey('KBArticle', on_delete=models.CASCADE, related_name='passages')
+    hub_id = models.UUIDField(null=True, blank=True)
+    position = models.PositiveIntegerField(default=0)
+    start = models.PositiveIntegerField(default=0)
+    end = models.PositiveIntegerField(default=0)
+    data = models.BinaryField()
+    content_hash = models.CharField(max_length=40)
+
+    class Meta:
+        db_table = 'knowledge_base_kbpassage'
+        indexes = [
+            models.Index(fields=['hub_id'], name='kb_passage_hub_idx'),
+        ]
+
+
+class KBArticleRevision(models.Model):
+    """
+    One saved version of an article. ``data`` is zlib-compressed: the full
+    content for snapshots, a line delta against the previous revision
+    otherwise (see ``knowledge_base.revisions``).
+    """
+    article = models.ForeignKey('KBArticle', on_delete=models.CASCADE, related_name='revisions')
+    hub_id = models.UUIDField(null=True, blank=True)
+    number = models.PositiveIntegerField()
+    is_snapshot = models.BooleanField(default=False)
+    title = models.CharField(max_length=255)
+    data = models.BinaryField()
+    content_length = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.UUIDField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'knowledge_base_kbarticlerevision'
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'number'], name='kb_revision_article_number_uniq'),
+        ]
+
+
+class KBExportJob(HubBaseModel):
+    """A datatable export running outside the request, polled by the client."""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_RUNNING, _('Running')),
+        (STATUS_DONE, _('Done')),
+        (STATUS_FAILED, _('Failed')),
+    ]
+    KIND_CHOICES = [
+        ('kb_articles', _('Articles')),
+        ('kb_categories', _('Categories')),
+    ]
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('excel', 'Excel'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name=_('Kind'))
+    export_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, verbose_name=_('Format'))
+    params = models.JSONField(default=dict, blank=True, verbose_name=_('Parameters'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name=_('Status'))
+    total_rows = models.PositiveIntegerField(default=0, verbose_name=_('Total Rows'))
+    processed_rows = models.PositiveIntegerField(default=0, verbose_name=_('Processed Rows'))
+    file_name = models.CharField(max_length=255, blank=True, verbose_name=_('File Name'))
+    error = models.TextField(blank=True, verbose_name=_('Error'))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Finished At'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'knowledge_base_kbexportjob'
+
+    def __str__(self):
+        return f'{self.kind}.{self.export_format} ({self.status})'
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    @property
+    def progress(self):
+        if self.status == self.STATUS_DONE:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, self.processed_rows * 100 // self.total_rows)
+
+    @property
+    def download_name(self):
+        extension = 'xlsx' if self.export_format == 'excel' else 'csv'
+        return f'{self.kind}.{extension}'
+
+
+class KBHubStats(models.Model):
+    """Materialized per-hub dashboard figures, kept current by the write paths."""
+    hub_id = models.UUIDField(primary_key=True)
+    total_categories = models.IntegerField(default=0)
+    active_categories = models.IntegerField(default=0)
+    total_articles = models.IntegerField(default=0)
+    published_articles = models.IntegerField(default=0)
+    uncategorized_articles = models.IntegerField(default=0)
+    total_views = models.BigIntegerField(default=0)
+    last_article_update = models.DateTimeField(null=True, blank=True)
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'knowledge_base_kbhubstats'
+
+    @property
+    def draft_articles(self):
+        return self.total_articles - self.published_articles
@@ -0,0 +1,214 @@
+"""
+Keyset (cursor) pagination for the knowledge base datatables.
+
+OFFSET paging makes page N cost O(N * per_page) rows scanned. Keyset paging
+instead remembers the sort value and primary key of the last row shown and
+asks for the rows strictly after it, so every page costs the same as the
+first one. Cursors are signed tokens carrying the sort key, the boundary row
+and the row offset (used only for the "Showing X-Y" label).
+"""
+import datetime
+import uuid
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+
+CURSOR_SALT = 'knowledge_base.pagination.cursor'
+
+
+class KeysetPage:
+    """A page of rows plus the cursors to its neighbours (duck-types ``Page`` for templates)."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, queryset, offset, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self._queryset = queryset
+        self.offset = offset
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._count = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def start_index(self):
+        return self.offset + 1 if self.object_list else 0
+
+    def end_index(self):
+        return self.offset + len(self.object_list)
+
+    @property
+    def count(self):
+        if self._count is None:
+            self._count = self._queryset.count()
+        return self._count
+
+    @count.setter
+    def count(self, value):
+        self._count = value
+
+
+def _json_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(field, descending, row_key, offset, backwards=False):
+    value, pk = row_key
+    return signing.dumps(
+        {'f': field, 'd': descending, 'v': _json_value(value), 'k': _json_value(pk), 'o': offset, 'b': backwards},
+        salt=CURSOR_SALT, compress=True,
+    )
+
+
+def decode_cursor(token, field, descending):
+    """Return the cursor payload, or ``None`` if it is invalid or belongs to another sort."""
+    if not token:
+        return None
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    if data.get('f') != field or data.get('d') != descending:
+        return None
+    return data
+
+
+def _field_info(model, field):
+    """
+    Return ``(attname, nullable)`` for a model field, a field across
+    relations (``category__name``, NULL when any link on the way is) or an
+    annotation.
+    """
+    *links, name = field.split('__')
+    nullable = False
+    try:
+        for link in links:
+            relation = model._meta.get_field(link)
+            nullable = nullable or relation.null
+            model = relation.related_model
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return field, False
+    if links:
+        return field, nullable or model_field.null
+    return model_field.attname, model_field.null
+
+
+def _row_value(row, attname):
+    """Value of ``attname`` on ``row``, following ``__`` through related objects."""
+    value = row
+    for part in attname.split('__'):
+        if value is None:
+            return None
+        value = getattr(value, part)
+    return value
+
+
+def _ordering(attname, descending, nullable):
+    # NULLs sort as the largest value (last ascending, first descending),
+    # PostgreSQL's default and so the order of a plain index on the column;
+    # reversing the direction walks exactly the same sequence backwards.
+    if descending:
+        return [F(attname).desc(nulls_first=True) if nullable else f'-{attname}', '-pk']
+    return [F(attname).asc(nulls_last=True) if nullable else attname, 'pk']
+
+
+def _after(attname, descending, nullable, value, pk):
+    """
+    Rows strictly after ``(value, pk)`` in the given direction. The leading
+    ``>=`` (or ``<=``) bound repeats what the OR implies so the database can
+    start an index range scan at the cursor instead of filtering every row.
+    """
+    op = 'lt' if descending else 'gt'
+    if value is None:
+        after_nulls = Q(**{f'{attname}__isnull': True, f'pk__{op}': pk})
+        return after_nulls | Q(**{f'{attname}__isnull': False}) if descending else after_nulls
+    bound = Q(**{f'{attname}__{op}e': value})
+    condition = bound & (Q(**{f'{attname}__{op}': value}) | Q(**{attname: value, f'pk__{op}': pk}))
+    if nullable and not descending:
+        condition |= Q(**{f'{attname}__isnull': True})
+    return condition
+
+
+def keyset_ordering(queryset, field, descending):
+    """The ``order_by`` arguments ``keyset_page`` walks ``field`` in."""
+    attname, nullable = _field_info(queryset.model, field)
+    return _ordering(attname, descending, nullable)
+
+
+def row_cursor(queryset, field, descending, row, offset):
+    """Cursor to the rows after ``row`` (at position ``offset``) of a keyset-ordered queryset."""
+    attname, _nullable = _field_info(queryset.model, field)
+    return encode_cursor(field, descending, (_row_value(row, attname), row.pk), offset)
+
+
+def keyset_page(queryset, field, descending=False, cursor=None, per_page=10):
+    """
+    Return a ``KeysetPage`` of ``queryset`` ordered by ``field`` then ``pk``.
+
+    ``cursor`` is a token produced by a previous page's ``next_cursor`` or
+    ``previous_cursor``; an invalid or stale token falls back to the first page.
+    """
+    attname, nullable = _field_info(queryset.model, field)
+    data = decode_cursor(cursor, field, descending)
+
+    if data and data.get('b'):
+        # Walk backwards from the first row of the current page, then flip.
+        reverse = not descending
+        rows = list(
+            queryset.filter(_after(attname, reverse, nullable, data['v'], data['k']))
+            .order_by(*_ordering(attname, reverse, nullable))[:per_page + 1]
+        )
+        if len(rows) > per_page:
+            rows = rows[:per_page][::-1]
+            offset = max(data['o'] - per_page, 0)
+            has_next = has_previous = True
+        else:
+            # Reached the start: show a full first page instead of a short one.
+            data = None
+    elif data:
+        rows = list(
+            queryset.filter(_after(attname, descending, nullable, data['v'], data['k']))
+            .order_by(*_ordering(attname, descending, nullable))[:per_page + 1]
+        )
+        offset = data['o']
+        has_next = len(rows) > per_page
+        has_previous = True
+        if not rows:
+            # Everything after the cursor is gone (deleted or filtered out).
+            data = None
+
+    if data is None:
+        rows = list(queryset.order_by(*_ordering(attname, descending, nullable))[:per_page + 1])
+        offset = 0
+        has_next = len(rows) > per_page
+        has_previous = False
+
+    rows = rows[:per_page]
+    next_cursor = previous_cursor = None
+    if rows and has_next:
+        last = rows[-1]
+        next_cursor = encode_cursor(field, descending, (_row_value(last, attname), last.pk), offset + len(rows))
+    if rows and has_previous:
+        first = rows[0]
+        previous_cursor = encode_cursor(field, descending, (_row_value(first, attname), first.pk), offset, backwards=True)
+
+    return KeysetPage(rows, queryset, offset, next_cursor, previous_cursor)
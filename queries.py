@@ -0,0 +1,124 @@
+"""
+Filtered and sorted querysets behind the knowledge base datatables.
+
+Shared by the list views and the background export jobs so both always see
+the same rows in the same order.
+"""
+import uuid
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from . import search, tree
+from .pagination import keyset_ordering
+from .models import KBCategory, KBArticle
+
+KB_CATEGORY_SORT_FIELDS = {
+    'name': 'name',
+    'is_active': 'is_active',
+    'order': 'order',
+    'slug': 'slug',
+    'description': 'description',
+    'created_at': 'created_at',
+    'article_count': 'article_count',
+    'published_count': 'published_count',
+    'view_sum': 'view_sum',
+}
+
+KB_ARTICLE_SORT_FIELDS = {
+    'title': 'title',
+    'category': 'category__name',
+    'is_published': 'is_published',
+    'view_count': 'view_count',
+    'slug': 'slug',
+    'content': 'content_length',
+    'created_at': 'created_at',
+}
+
+
+def with_article_counts(qs):
+    """
+    Annotate categories with ``article_count``, ``published_count`` and
+    ``view_sum`` of their live articles, computed by the same query through
+    one grouped join.
+    """
+    live = Q(kbarticle__is_deleted=False)
+    return qs.annotate(
+        article_count=Count('kbarticle', filter=live),
+        published_count=Count('kbarticle', filter=live & Q(kbarticle__is_published=True)),
+        view_sum=Coalesce(Sum('kbarticle__view_count', filter=live), 0),
+    )
+
+
+def kb_categories_queryset(hub_id, search_query='', sort_field='name', sort_dir='asc', with_counts=True):
+    """
+    Return ``(qs, order_field, sort_field)``: the live categories of the hub
+    matching ``search_query``, the column they are ordered by, and the
+    effective sort key. ``with_counts`` adds the ``with_article_counts``
+    aggregates (needed to sort by them).
+    """
+    qs = KBCategory.objects.filter(hub_id=hub_id, is_deleted=False).select_related('parent')
+    if with_counts:
+        qs = with_article_counts(qs)
+    elif sort_field in ('article_count', 'published_count', 'view_sum'):
+        sort_field = 'name'
+
+    if search_query:
+        qs = qs.filter(Q(name__icontains=search_query) | Q(slug__icontains=search_query) | Q(description__icontains=search_query))
+
+    if sort_field not in KB_CATEGORY_SORT_FIELDS:
+        sort_field = 'name'
+    order_field = KB_CATEGORY_SORT_FIELDS[sort_field]
+    qs = qs.order_by(*keyset_ordering(qs, order_field, sort_dir == 'desc'))
+    return qs, order_field, sort_field
+
+
+def subtree_category(hub_id, category_id):
+    """The live category ``category_id`` of the hub, or None when missing or malformed."""
+    try:
+        category_id = uuid.UUID(str(category_id))
+    except ValueError:
+        return None
+    return KBCategory.objects.filter(hub_id=hub_id, is_deleted=False, pk=category_id).first()
+
+
+def find_article(hub_id, article_id=None, slug=None):
+    """The live article of the hub with ``article_id`` (or else ``slug``), or None when missing or malformed."""
+    qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False).select_related('category')
+    if article_id:
+        try:
+            article_id = uuid.UUID(str(article_id))
+        except ValueError:
+            return None
+        return qs.filter(pk=article_id).first()
+    if slug:
+        return qs.filter(slug=slug).order_by('-updated_at').first()
+    return None
+
+
+def kb_articles_queryset(hub_id, search_query='', sort_field='title', sort_dir='asc', category=None):
+    """
+    Return ``(qs, order_field, sort_field)`` for the hub's live articles,
+    limited to the subtree of ``category`` when given.
+
+    ``order_field`` is None when the rows are ordered by search relevance,
+    which is not a column and therefore cannot be keyset-paginated. Search
+    matches are filtered and ranked by the database (see ``search``), so
+    every match is kept.
+    """
+    if category is not None:
+        qs = tree.subtree_articles(category).select_related('category')
+    else:
+        qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False).select_related('category')
+
+    if search_query:
+        qs = search.filter_articles(qs, hub_id, search_query, rank=sort_field == 'relevance')
+        if sort_field == 'relevance':
+            return qs.order_by('-relevance', 'pk'), None, sort_field
+
+    if sort_field not in KB_ARTICLE_SORT_FIELDS:
+        sort_field = 'title'
+    order_field = KB_ARTICLE_SORT_FIELDS[sort_field]
+    # The same order keyset pages walk, so numbered pages agree with them
+    qs = qs.order_by(*keyset_ordering(qs, order_field, sort_dir == 'desc'))
+    return qs, order_field, sort_field
@@ -0,0 +1,116 @@
+"""
+Cached rendering of the published-article reader page.
+
+The article fragment is cached per hub, article, article epoch and
+language. Each entry records the hub content version (see ``caching``) it
+was rendered at:
+
+* same version: the entry is fresh and served as is;
+* older version (another article or a category changed, ...):
+  the entry is stale but still served, and a single background job
+  (deduplicated with a short ``cache.add`` lock) re-renders it, so readers
+  never wait for a render of a popular article;
+* no entry: the article is rendered in the request.
+
+Writes that change what the article itself shows (edit, publish state,
+move, delete) call ``forget``, which moves the article to a new epoch once
+the write commits. Its old entries are then never read again (in any
+language), so those changes are never served late. Like hub versions,
+epochs are timestamps, so an epoch lost to eviction never revives old
+entries.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import translation
+
+from . import caching, jobs
+
+TEMPLATE = 'knowledge_base/partials/kb_article_detail_content.html'
+# A regeneration that has not finished by then may be retried by another request
+REFRESH_LOCK_SECONDS = 30
+
+
+def cache_timeout():
+    """Seconds a rendered article is kept, stale or not; 0 disables the reader cache."""
+    return getattr(settings, 'KNOWLEDGE_BASE_READER_CACHE_SECONDS', 3600)
+
+
+def _epoch_key(hub_id, article_id):
+    return f'{caching.KEY_PREFIX}:reader-epoch:{hub_id}:{article_id}'
+
+
+def _epoch(hub_id, article_id):
+    key = _epoch_key(hub_id, article_id)
+    epoch = cache.get(key)
+    if epoch is None:
+        cache.add(key, time.time_ns() // 1000, None)
+        epoch = cache.get(key)
+    return epoch
+
+
+def _key(hub_id, article_id, epoch, language):
+    return f'{caching.KEY_PREFIX}:reader:{hub_id}:{article_id}:{epoch}:{language}'
+
+
+def _load(hub_id, article_id):
+    from .models import KBArticle
+
+    return KBArticle.objects.select_related('category').filter(
+        hub_id=hub_id, pk=article_id, is_deleted=False, is_published=True,
+    ).first()
+
+
+def _render(article, language):
+    with translation.override(language):
+        return render_to_string(TEMPLATE, {'obj': article})
+
+
+def _refresh(key, hub_id, article_id, language):
+    try:
+        # Read the version first: a write landing during the render leaves the entry stale
+        version = caching.hub_version(hub_id)
+        article = _load(hub_id, article_id)
+        if article is None:
+            cache.delete(key)
+        else:
+            cache.set(key, {'version': version, 'html': _render(article, language)}, cache_timeout())
+    finally:
+        cache.delete(f'{key}:refresh')
+
+
+def article_html(hub_id, article_id, article=None):
+    """
+    Rendered reader fragment of a live published article, or None when there
+    is no such article. ``article`` spares the lookup when already loaded.
+    """
+    language = translation.get_language()
+    timeout = cache_timeout()
+    version = caching.hub_version(hub_id)
+    key = entry = None
+    if timeout:
+        key = _key(hub_id, article_id, _epoch(hub_id, article_id), language)
+        entry = cache.get(key)
+    if entry is not None:
+        if entry['version'] != version and cache.add(f'{key}:refresh', True, REFRESH_LOCK_SECONDS):
+            jobs.submit(_refresh, key, hub_id, article_id, language)
+        return entry['html']
+
+    if article is None:
+        article = _load(hub_id, article_id)
+    if article is None:
+        return None
+    html = _render(article, language)
+    if timeout:
+        cache.set(key, {'version': version, 'html': html}, timeout)
+    return html
+
+
+def forget(hub_id, article_ids):
+    """Drop the cached renderings of the articles, in every language, once the write commits."""
+    keys = [_epoch_key(hub_id, article_id) for article_id in article_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.set_many(dict.fromkeys(keys, time.time_ns() // 1000), None))
@@ -0,0 +1,571 @@
+"""
+Offline passage retrieval for the assistant's knowledge base tools.
+
+Articles are split into passages of about ``PASSAGE_WORDS`` words and each
+passage is embedded without any model: its stemmed terms (see
+``search.tokenize``) are hashed into a fixed number of dimensions with
+log-scaled term frequencies and L2-normalized. Queries are weighted with the
+hub's inverse document frequencies (read from the full-text postings), so
+the score of a passage is the classic ``lnc.ltc`` TF-IDF cosine.
+
+Passage vectors are stored sparse in ``KBPassage``. For searching, every
+passage of a hub is loaded once into a sparse (CSR) matrix of NumPy arrays
+held in process memory: a passage costs its non-zero entries (a uint16
+column and a float32 weight each) instead of a dense row of
+``dimensions()`` floats, and a query is a single sparse matrix-vector
+product plus a top-k partition. Loaded matrices are evicted least recently
+used once together they exceed ``cache_bytes()``. Writes keep the matrix
+current incrementally: once the write commits, the rows of the touched
+articles are replaced and a per-hub generation counter in the cache tells
+other processes to reload.
+
+Reading a single article reuses its stored passage split (re-segmenting
+only when the content hash no longer matches) and scores the passages
+against the query in pure Python.
+
+NumPy is only needed to search the passage matrix; indexing is pure
+Python. Without NumPy, ``search_passages`` falls back to the articles ranked
+by the full-text index (``search.search``), each with its best passage.
+"""
+import hashlib
+import math
+import re
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils.html import strip_tags
+
+from . import bodies, caching, search as fulltext
+from .search import TITLE_WEIGHT, tokenize
+
+PASSAGE_WORDS = 120
+# A paragraph break closes a passage once it has at least this many words
+MIN_PASSAGE_WORDS = 40
+# Hashed term indices are stored in 16 bits and folded to the matrix width on load
+HASH_BITS = 16
+DEFAULT_LIMIT = 5
+MAX_PASSAGES_PER_ARTICLE = 2
+SNIPPET_LIMIT = 3
+
+_WORD_RE = re.compile(r'\S+')
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+_PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+
+_lock = threading.Lock()
+_matrices = OrderedDict()
+
+
+def dimensions():
+    """Width of the in-memory matrix; a power of two up to ``2 ** HASH_BITS``."""
+    return getattr(settings, 'KNOWLEDGE_BASE_RETRIEVAL_DIMENSIONS', 1024)
+
+
+def cache_bytes():
+    """Memory a process may spend on loaded hub matrices; a larger single matrix is used once, not kept."""
+    return getattr(settings, 'KNOWLEDGE_BASE_RETRIEVAL_CACHE_BYTES', 64 * 1024 * 1024)
+
+
+def _numpy():
+    import numpy
+    return numpy
+
+
+def has_numpy():
+    """Whether the passage matrix can be searched in this process."""
+    try:
+        _numpy()
+    except ImportError:
+        return False
+    return True
+
+
+# ----------------------------------------------------------------------
+# Passages and vectors
+# ----------------------------------------------------------------------
+
+def plain_text(content):
+    return strip_tags(content or '')
+
+
+def content_hash(title, content):
+    return hashlib.sha1(f'{title}\0{content}'.encode()).hexdigest()
+
+
+def split_passages(text, max_words=PASSAGE_WORDS, min_words=MIN_PASSAGE_WORDS):
+    """
+    ``[(start, end), ...]`` character spans of ``text`` covering its words in
+    passages of at most ``max_words`` words, preferring paragraph breaks.
+    """
+    spans = []
+    start = end = None
+    words = 0
+    for match in _WORD_RE.finditer(text):
+        if start is not None and (
+            words >= max_words
+            or (words >= min_words and _PARAGRAPH_BREAK_RE.search(text, end, match.start()))
+        ):
+            spans.append((start, end))
+            start, words = None, 0
+        if start is None:
+            start = match.start()
+        end = match.end()
+        words += 1
+    if start is not None:
+        spans.append((start, end))
+    return spans
+
+
+def _hash(term):
+    value = zlib.crc32(term.encode())
+    return value & ((1 << HASH_BITS) - 1), -1.0 if value >> 31 else 1.0
+
+
+def vectorize(counts):
+    """Hashed, log-scaled, L2-normalized sparse vector ``{index: weight}`` of term counts."""
+    vector = {}
+    for term, count in counts.items():
+        index, sign = _hash(term)
+        vector[index] = vector.get(index, 0.0) + sign * (1.0 + math.log(count))
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    if not norm:
+        return {}
+    return {index: weight / norm for index, weight in vector.items()}
+
+
+def pack(vector):
+    indices = sorted(vector)
+    return array('H', indices).tobytes() + array('f', [vector[i] for i in indices]).tobytes()
+
+
+def unpack(data):
+    data = bytes(data)
+    size = len(data) // 6
+    indices = array('H')
+    indices.frombytes(data[:size * 2])
+    weights = array('f')
+    weights.frombytes(data[size * 2:])
+    return indices, weights
+
+
+def article_passages(article):
+    """``[(start, end, packed vector)]`` of an article's passages; title terms count in each."""
+    text = plain_text(article.content)
+    title_terms = Counter({term: TITLE_WEIGHT for term in tokenize(article.title)})
+    passages = []
+    for start, end in split_passages(text) or [(0, 0)]:
+        vector = vectorize(Counter(tokenize(text[start:end])) + title_terms)
+        if vector:
+            passages.append((start, end, pack(vector)))
+    return passages
+
+
+# ----------------------------------------------------------------------
+# Index maintenance
+# ----------------------------------------------------------------------
+
+def index_articles(articles):
+    """(Re)build the passages of articles whose title or content changed since they were indexed."""
+    from .models import KBPassage
+
+    articles = [article for article in articles if not article.is_deleted]
+    if not articles:
+        return
+    bodies.attach(articles)
+    indexed = dict(
+        KBPassage.objects.filter(article_id__in=[a.pk for a in articles])
+        .values_list('article_id', 'content_hash').distinct()
+    )
+    changed = []
+    for article in articles:
+        digest = content_hash(article.title, article.content)
+        if indexed.get(article.pk) != digest:
+            changed.append((article, digest))
+    if not changed:
+        return
+
+    rows = []
+    for article, digest in changed:
+        rows.extend(
+            KBPassage(
+                article_id=article.pk, hub_id=article.hub_id, position=position,
+                start=start, end=end, data=data, content_hash=digest,
+            )
+            for position, (start, end, data) in enumerate(article_passages(article))
+        )
+    ids = [article.pk for article, _digest in changed]
+    with transaction.atomic():
+        KBPassage.objects.filter(article_id__in=ids).delete()
+        KBPassage.objects.bulk_create(rows, batch_size=1000)
+    by_hub = {}
+    for row in rows:
+        by_hub.setdefault(row.hub_id, []).append((row.article_id, row.start, row.end, row.data))
+    for hub_id in {article.hub_id for article, _digest in changed}:
+        _on_commit(hub_id, ids, by_hub.get(hub_id, []))
+
+
+def remove_articles(article_ids):
+    """Drop the passages of deleted articles."""
+    from .models import KBPassage
+
+    article_ids = list(article_ids)
+    if not article_ids:
+        return
+    hubs = set(KBPassage.objects.filter(article_id__in=article_ids).values_list('hub_id', flat=True).distinct())
+    KBPassage.objects.filter(article_id__in=article_ids).delete()
+    for hub_id in hubs:
+        _on_commit(hub_id, article_ids, [])
+
+
+def _on_commit(hub_id, removed_ids, added_rows):
+    transaction.on_commit(lambda: _apply_change(hub_id, removed_ids, added_rows))
+
+
+# ----------------------------------------------------------------------
+# In-memory hub matrices
+# ----------------------------------------------------------------------
+
+def _generation_key(hub_id):
+    return f'{caching.KEY_PREFIX}:retrieval:{hub_id}'
+
+
+def _generation(hub_id):
+    key = _generation_key(hub_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Time-based start, so an evicted counter never repeats an old value
+        cache.add(key, time.time_ns() // 1000, None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump_generation(hub_id):
+    key = _generation_key(hub_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns() // 1000, None)
+        return cache.incr(key)
+
+
+class HubMatrix:
+    """
+    Sparse passage vectors of one hub in CSR form (row ``i`` holds the
+    entries ``indptr[i]:indptr[i + 1]`` of ``indices``/``data``), with the
+    article and span of every row. Every row has at least one entry, so row
+    sums are a single ``reduceat``.
+    """
+
+    def __init__(self, generation, width, indptr, indices, data, article_ids, starts, ends):
+        self.generation = generation
+        self.width = width
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.article_ids = article_ids
+        self.starts = starts
+        self.ends = ends
+
+    @property
+    def nbytes(self):
+        """Size of the arrays (the shared article id objects are not counted)."""
+        arrays = (self.indptr, self.indices, self.data, self.article_ids, self.starts, self.ends)
+        return sum(array.nbytes for array in arrays)
+
+    @staticmethod
+    def _rows(rows, width):
+        np = _numpy()
+        lengths, indices, data = [], [], []
+        # Rows of one article share its id object
+        article_ids, interned, starts, ends = [], {}, [], []
+        for article_id, start, end, packed in rows:
+            article_ids.append(interned.setdefault(article_id, article_id))
+            starts.append(start)
+            ends.append(end)
+            columns, weights = unpack(packed)
+            # Folding to the matrix width may merge indices; sum them and restore unit length
+            columns, inverse = np.unique(np.frombuffer(columns, dtype=np.uint16) & (width - 1), return_inverse=True)
+            weights = np.bincount(inverse, weights=np.frombuffer(weights, dtype=np.float32)).astype(np.float32)
+            if not len(columns):
+                columns, weights = np.zeros(1, dtype=np.uint16), np.zeros(1, dtype=np.float32)
+            norm = np.linalg.norm(weights)
+            lengths.append(len(columns))
+            indices.append(columns.astype(np.uint16))
+            data.append(weights / norm if norm else weights)
+        return (
+            np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]).astype(np.int64),
+            np.concatenate(indices) if indices else np.zeros(0, dtype=np.uint16),
+            np.concatenate(data) if data else np.zeros(0, dtype=np.float32),
+            np.array(article_ids, dtype=object),
+            np.array(starts, dtype=np.uint32),
+            np.array(ends, dtype=np.uint32),
+        )
+
+    @classmethod
+    def load(cls, hub_id, generation):
+        from .models import KBPassage
+
+        rows = (
+            KBPassage.objects.filter(hub_id=hub_id)
+            .order_by('article_id', 'position')
+            .values_list('article_id', 'start', 'end', 'data')
+        )
+        width = dimensions()
+        return cls(generation, width, *cls._rows(rows.iterator(chunk_size=2000), width))
+
+    def replaced(self, generation, removed_ids, added_rows):
+        """A new matrix with the rows of ``removed_ids`` dropped and ``added_rows`` appended."""
+        np = _numpy()
+        keep = ~np.isin(self.article_ids, list(removed_ids))
+        lengths = np.diff(self.indptr)
+        kept_entries = np.repeat(keep, lengths)
+        indptr, indices, data, article_ids, starts, ends = self._rows(added_rows, self.width)
+        return HubMatrix(
+            generation, self.width,
+            np.concatenate([[0], np.cumsum(np.concatenate([lengths[keep], np.diff(indptr)]))]).astype(np.int64),
+            np.concatenate([self.indices[kept_entries], indices]),
+            np.concatenate([self.data[kept_entries], data]),
+            np.concatenate([self.article_ids[keep], article_ids]),
+            np.concatenate([self.starts[keep], starts]),
+            np.concatenate([self.ends[keep], ends]),
+        )
+
+    def scores(self, vector):
+        """Dot product of every row with the dense ``vector``."""
+        np = _numpy()
+        if not len(self.article_ids):
+            return np.zeros(0, dtype=np.float32)
+        return np.add.reduceat(self.data * vector[self.indices], self.indptr[:-1])
+
+
+def _cache(hub_id, entry):
+    """Keep ``entry``, evicting the least recently used matrices beyond ``cache_bytes()``; call under ``_lock``."""
+    _matrices.pop(hub_id, None)
+    budget = cache_bytes()
+    if entry.nbytes > budget:
+        return
+    _matrices[hub_id] = entry
+    total = sum(matrix.nbytes for matrix in _matrices.values())
+    while total > budget:
+        _evicted_hub, evicted = _matrices.popitem(last=False)
+        total -= evicted.nbytes
+
+
+def _apply_change(hub_id, removed_ids, added_rows):
+    generation = _bump_generation(hub_id)
+    with _lock:
+        entry = _matrices.get(hub_id)
+        if entry is None:
+            return
+        if entry.generation + 1 != generation:
+            # Another process wrote in between; reload on the next search
+            del _matrices[hub_id]
+            return
+        _cache(hub_id, entry.replaced(generation, removed_ids, added_rows))
+
+
+def hub_matrix(hub_id):
+    """The hub's current passage matrix, loading it on first use or after other processes' writes."""
+    generation = _generation(hub_id)
+    with _lock:
+        entry = _matrices.get(hub_id)
+        if entry is not None and entry.generation == generation:
+            _matrices.move_to_end(hub_id)
+            return entry
+    entry = HubMatrix.load(hub_id, generation)
+    with _lock:
+        _cache(hub_id, entry)
+    return entry
+
+
+def clear_matrices():
+    with _lock:
+        _matrices.clear()
+
+
+# ----------------------------------------------------------------------
+# Querying
+# ----------------------------------------------------------------------
+
+def article_spans(article):
+    """
+    ``[(start, end, packed vector), ...]`` of an article's passages in reading
+    order, read from ``KBPassage`` while its content hash is current; a stale
+    or missing split is rebuilt (and stored) first.
+    """
+    from .models import KBPassage
+
+    def stored():
+        return list(
+            KBPassage.objects.filter(article_id=article.pk).order_by('position')
+            .values_list('start', 'end', 'data', 'content_hash')
+        )
+
+    rows = stored()
+    if not rows or rows[0][3] != content_hash(article.title, article.content):
+        index_articles([article])
+        rows = stored()
+    return [(start, end, data) for start, end, data, _digest in rows]
+
+
+def term_matches(text, terms, offset=0):
+    """``[[start, end], ...]`` spans of the words of ``text`` whose stemmed terms are in ``terms``."""
+    return [
+        [offset + match.start(), offset + match.end()]
+        for match in _TERM_RE.finditer(text)
+        if terms.intersection(tokenize(match.group()))
+    ]
+
+
+def mark(text, matches, offset=0, marker='**'):
+    """``text`` with the ``matches`` spans (offset by ``offset``) wrapped in ``marker``."""
+    parts = []
+    position = 0
+    for start, end in matches:
+        start, end = start - offset, end - offset
+        parts += [text[position:start], marker, text[start:end], marker]
+        position = end
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+def article_snippets(article, query='', limit=SNIPPET_LIMIT):
+    """
+    The passages of ``article`` most similar to ``query`` (best first), or its
+    leading passages when the query is empty or matches nothing. Each is a
+    dict with the passage ``position``, ``start``/``end`` offsets into the
+    article's plain text, the ``text``, its ``score`` and the ``matches``
+    spans of query terms (also offsets into the plain text).
+    """
+    text = plain_text(article.content)
+    spans = article_spans(article)
+    terms = Counter(tokenize(query))
+    query_weights = vectorize(terms)
+    ranked = []
+    if query_weights:
+        for position, (_start, _end, data) in enumerate(spans):
+            indices, weights = unpack(data)
+            score = sum(query_weights.get(index, 0.0) * weight for index, weight in zip(indices, weights))
+            if score > 0:
+                ranked.append((score, position))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+    if not ranked:
+        ranked = [(0.0, position) for position in range(len(spans))]
+    snippets = []
+    for score, position in ranked[:limit]:
+        start, end, _data = spans[position]
+        snippets.append({
+            'position': position, 'start': start, 'end': end, 'text': text[start:end], 'score': score,
+            'matches': term_matches(text[start:end], set(terms), start),
+        })
+    return snippets
+
+
+def query_vector(hub_id, query, width):
+    """Dense unit query vector: log-scaled term frequencies weighted by the hub's IDF."""
+    from .models import KBSearchDocument, KBSearchPosting
+
+    np = _numpy()
+    counts = Counter(tokenize(query))
+    if not counts:
+        return None
+    n_docs = KBSearchDocument.objects.filter(hub_id=hub_id).count()
+    df = dict(
+        KBSearchPosting.objects.filter(hub_id=hub_id, term__in=list(counts))
+        .values('term').annotate(df=Count('pk')).values_list('term', 'df').order_by()
+    )
+    vector = np.zeros(width, dtype=np.float32)
+    for term, count in counts.items():
+        index, sign = _hash(term)
+        idf = math.log((n_docs + 1) / (df.get(term, 0) + 1)) + 1.0
+        vector[index & (width - 1)] += sign * (1.0 + math.log(count)) * idf
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+def search(hub_id, query, limit=DEFAULT_LIMIT, per_article=MAX_PASSAGES_PER_ARTICLE):
+    """
+    ``[(article_id, start, end, score), ...]`` of the passages most similar to
+    ``query``, best first, with at most ``per_article`` passages per article.
+    """
+    np = _numpy()
+    entry = hub_matrix(hub_id)
+    if not len(entry.article_ids):
+        return []
+    vector = query_vector(hub_id, query, entry.width)
+    if vector is None:
+        return []
+    scores = entry.scores(vector)
+    # Over-fetch so the per-article cap can still fill the limit
+    candidates = min(len(scores), limit * per_article * 4)
+    top = np.argpartition(-scores, candidates - 1)[:candidates]
+    top = top[np.argsort(-scores[top])]
+    results = []
+    seen = Counter()
+    for row in top:
+        if scores[row] <= 0:
+            break
+        article_id = entry.article_ids[row]
+        if seen[article_id] >= per_article:
+            continue
+        seen[article_id] += 1
+        results.append((article_id, int(entry.starts[row]), int(entry.ends[row]), float(scores[row])))
+        if len(results) >= limit:
+            break
+    return results
+
+
+def _live_articles(hub_id, article_ids):
+    from .models import KBArticle
+
+    articles = KBArticle.objects.filter(
+        hub_id=hub_id, is_deleted=False, pk__in=set(article_ids),
+    ).only('id', 'hub_id', 'title', 'slug', 'is_published', 'content', 'body_offloaded', 'is_deleted')
+    articles = {article.pk: article for article in articles}
+    bodies.attach(articles.values())
+    return articles
+
+
+def _fulltext_passages(hub_id, query, limit):
+    """The best passage of each article the full-text index ranks highest, scored by BM25."""
+    hits = fulltext.search(hub_id, query, limit)
+    articles = _live_articles(hub_id, [article_id for article_id, _score in hits])
+    results = []
+    for article_id, score in hits:
+        article = articles.get(article_id)
+        if article is None:
+            continue
+        for snippet in article_snippets(article, query, limit=1):
+            results.append({
+                'article': article, 'start': snippet['start'], 'end': snippet['end'],
+                'text': snippet['text'], 'score': score,
+            })
+    return results
+
+
+def search_passages(hub_id, query, limit=DEFAULT_LIMIT):
+    """
+    ``search`` results joined with their live articles and passage text
+    (``_fulltext_passages`` when NumPy is not installed).
+    """
+    if not has_numpy():
+        return _fulltext_passages(hub_id, query, limit)
+    hits = search(hub_id, query, limit)
+    if not hits:
+        return []
+    articles = _live_articles(hub_id, [article_id for article_id, *_rest in hits])
+    texts = {pk: plain_text(article.content) for pk, article in articles.items()}
+    return [
+        {
+            'article': articles[article_id], 'start': start, 'end': end,
+            'text': texts[article_id][start:end], 'score': score,
+        }
+        for article_id, start, end, score in hits
+        if article_id in articles
+    ]
@@ -0,0 +1,162 @@
+"""
+Delta-compressed revision history of knowledge base articles.
+
+Every ``KNOWLEDGE_BASE_REVISION_SNAPSHOT_EVERY``-th revision (and the oldest
+one kept) stores the full content; the revisions in between store a line
+delta against their predecessor. Both are zlib-compressed. Rebuilding any
+revision therefore decompresses one snapshot and applies a bounded number
+of deltas.
+
+A delta is a JSON list of operations on the previous revision's lines:
+``[start, end]`` copies ``lines[start:end]``, a string inserts new text.
+
+Retention keeps the newest ``KNOWLEDGE_BASE_REVISION_LIMIT`` revisions per
+article; when older ones are dropped the oldest survivor is rewritten as a
+snapshot so it no longer depends on them.
+"""
+import difflib
+import json
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+
+COMPRESSION_LEVEL = 6
+
+
+def snapshot_every():
+    return getattr(settings, 'KNOWLEDGE_BASE_REVISION_SNAPSHOT_EVERY', 10)
+
+
+def revision_limit():
+    return getattr(settings, 'KNOWLEDGE_BASE_REVISION_LIMIT', 50)
+
+
+def _pack(value):
+    return zlib.compress(json.dumps(value).encode(), COMPRESSION_LEVEL)
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(bytes(data)).decode())
+
+
+def make_delta(old, new):
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(new_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(old, ops):
+    old_lines = old.splitlines(keepends=True)
+    return ''.join(
+        op if isinstance(op, str) else ''.join(old_lines[op[0]:op[1]])
+        for op in ops
+    )
+
+
+def reconstruct(article_id, number):
+    """Return ``(title, content)`` of revision ``number`` of an article."""
+    from .models import KBArticleRevision
+
+    revisions = KBArticleRevision.objects.filter(article_id=article_id, number__lte=number)
+    base = revisions.filter(is_snapshot=True).order_by('-number').values_list('number', flat=True).first()
+    if base is None:
+        raise KBArticleRevision.DoesNotExist(f'No snapshot for revision {number}')
+    found = title = content = None
+    chain = revisions.filter(number__gte=base).order_by('number').values_list('number', 'is_snapshot', 'title', 'data')
+    for found, is_snapshot, title, data in chain:
+        value = _unpack(data)
+        content = value if is_snapshot else apply_delta(content, value)
+    if found != number:
+        raise KBArticleRevision.DoesNotExist(f'Revision {number} not found')
+    return title, content
+
+
+def latest_number(article_id):
+    from .models import KBArticleRevision
+
+    return KBArticleRevision.objects.filter(article_id=article_id).order_by('-number').values_list('number', flat=True).first()
+
+
+def record(article, user_id=None):
+    """
+    Store the article's current title and content as its next revision.
+    Nothing is stored when neither changed since the latest revision.
+    """
+    from .models import KBArticleRevision
+
+    with transaction.atomic():
+        latest = latest_number(article.pk)
+        previous_content = None
+        if latest is not None:
+            previous_title, previous_content = reconstruct(article.pk, latest)
+            if previous_title == article.title and previous_content == article.content:
+                return None
+        number = (latest or 0) + 1
+        data = snapshot = _pack(article.content)
+        is_snapshot = latest is None or number % snapshot_every() == 0
+        if not is_snapshot:
+            data = _pack(make_delta(previous_content, article.content))
+            if len(data) >= len(snapshot):
+                is_snapshot, data = True, snapshot
+        revision = KBArticleRevision.objects.create(
+            article=article, hub_id=article.hub_id, number=number, is_snapshot=is_snapshot,
+            title=article.title, data=data, content_length=len(article.content), created_by=user_id,
+        )
+        compact(article.pk)
+    return revision
+
+
+def record_created(articles, user_id=None):
+    """Store the first revision (a snapshot) of many newly created articles with one INSERT."""
+    from .models import KBArticleRevision
+
+    KBArticleRevision.objects.bulk_create([
+        KBArticleRevision(
+            article=article, hub_id=article.hub_id, number=1, is_snapshot=True, title=article.title,
+            data=_pack(article.content), content_length=len(article.content), created_by=user_id,
+        )
+        for article in articles
+    ])
+
+
+def compact(article_id, keep=None):
+    """Drop revisions beyond the retention limit, re-basing the oldest survivor on a snapshot."""
+    from .models import KBArticleRevision
+
+    keep = max(revision_limit() if keep is None else keep, 1)
+    revisions = KBArticleRevision.objects.filter(article_id=article_id)
+    numbers = list(revisions.order_by('-number').values_list('number', flat=True)[:keep + 1])
+    if len(numbers) <= keep:
+        return 0
+    oldest_kept = numbers[keep - 1]
+    oldest = revisions.get(number=oldest_kept)
+    if not oldest.is_snapshot:
+        _title, content = reconstruct(article_id, oldest_kept)
+        oldest.is_snapshot = True
+        oldest.data = _pack(content)
+        oldest.save(update_fields=['is_snapshot', 'data'])
+    deleted, _details = revisions.filter(number__lt=oldest_kept).delete()
+    return deleted
+
+
+def diff(article_id, number):
+    """Unified diff lines of revision ``number`` against the revision before it."""
+    from .models import KBArticleRevision
+
+    _title, content = reconstruct(article_id, number)
+    previous = ''
+    previous_number = number - 1
+    if KBArticleRevision.objects.filter(article_id=article_id, number=previous_number).exists():
+        _title, previous = reconstruct(article_id, previous_number)
+    return list(difflib.unified_diff(
+        previous.splitlines(), content.splitlines(),
+        fromfile=f'#{previous_number}', tofile=f'#{number}', lineterm='',
+    ))
@@ -0,0 +1,291 @@
+"""
+Full-text search index for knowledge base articles.
+
+Articles are tokenized, stemmed and stored as per-hub postings
+(``KBSearchPosting``) with per-article lengths (``KBSearchDocument``), so a
+search only touches the postings of the query terms instead of scanning every
+article body. Results are ranked with Okapi BM25.
+
+Only the query's terms are resolved in Python (prefix expansion and
+document frequencies, a few small aggregates). Matching and scoring run in
+the database as subqueries over the postings, so a search filters and
+orders the article queryset itself: it is never truncated to a fixed
+number of hits and no list of ids travels back to the database.
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from . import bodies
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# A title match counts as this many body occurrences of the term
+TITLE_WEIGHT = 3
+SLUG_WEIGHT = 1
+CONTENT_WEIGHT = 1
+
+MAX_TERM_LENGTH = 64
+# Default number of hits returned by ``search``
+MAX_RESULTS = 1000
+# Cap on the vocabulary terms a trailing partial word expands to
+MAX_PREFIX_EXPANSIONS = 50
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have how in is it its of on or that the
+this to was were what when where which who will with
+de del el la las los un una unos unas y o en es por para con que se su al lo
+""".split())
+
+
+def _fold(text):
+    """Lowercase and strip accents so 'Configuración' matches 'configuracion'."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def stem(token):
+    """Light suffix-stripping stemmer; applied identically to documents and queries."""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    if token.endswith('ies') and len(token) > 4:
+        token = token[:-3] + 'y'
+    elif token.endswith(('sses', 'xes', 'ches', 'shes', 'zes')):
+        token = token[:-2]
+    elif token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        token = token[:-1]
+    for suffix in ('ingly', 'edly', 'ing', 'ed', 'ly'):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            break
+    if token.endswith('e') and len(token) > 4:
+        token = token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Split text into folded, stemmed terms, dropping stopwords."""
+    terms = []
+    for token in _TOKEN_RE.findall(_fold(text or '')):
+        if token in STOPWORDS:
+            continue
+        terms.append(stem(token)[:MAX_TERM_LENGTH])
+    return terms
+
+
+def document_terms(title, slug, content):
+    """Return the weighted term frequencies for an article."""
+    counts = Counter()
+    for term in tokenize(title):
+        counts[term] += TITLE_WEIGHT
+    for term in tokenize((slug or '').replace('-', ' ')):
+        counts[term] += SLUG_WEIGHT
+    for term in tokenize(content):
+        counts[term] += CONTENT_WEIGHT
+    return counts
+
+
+def query_terms(query):
+    """
+    Parse a search box query into ``(term, is_prefix)`` pairs.
+
+    The last word is treated as a prefix while the user is still typing it
+    (no trailing whitespace), so results update on every keystroke.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+    seen = set()
+    parsed = []
+    for term in terms:
+        if term not in seen:
+            seen.add(term)
+            parsed.append((term, False))
+    if query and not query[-1].isspace() and len(terms[-1]) >= 2:
+        parsed[-1] = (terms[-1], True)
+    return parsed
+
+
+# ----------------------------------------------------------------------
+# Index maintenance
+# ----------------------------------------------------------------------
+
+def index_articles(articles):
+    """
+    (Re)index the given articles. Deleted articles are removed from the index.
+    The assistant's passage index (``retrieval``) is kept in step.
+    """
+    from . import retrieval
+    from .models import KBSearchDocument, KBSearchPosting
+
+    articles = list(articles)
+    if not articles:
+        return
+    bodies.attach(articles)
+    documents = []
+    postings = []
+    for article in articles:
+        if article.is_deleted:
+            continue
+        counts = document_terms(article.title, article.slug, article.content)
+        documents.append(KBSearchDocument(
+            article_id=article.pk, hub_id=article.hub_id, length=sum(counts.values()),
+        ))
+        postings.extend(
+            KBSearchPosting(hub_id=article.hub_id, term=term, article_id=article.pk, frequency=freq)
+            for term, freq in counts.items()
+        )
+    with transaction.atomic():
+        _remove_postings([a.pk for a in articles])
+        KBSearchDocument.objects.bulk_create(documents, batch_size=1000)
+        KBSearchPosting.objects.bulk_create(postings, batch_size=1000)
+        retrieval.remove_articles([a.pk for a in articles if a.is_deleted])
+        retrieval.index_articles(articles)
+
+
+def index_article(article):
+    index_articles([article])
+
+
+def _remove_postings(article_ids):
+    from .models import KBSearchDocument, KBSearchPosting
+
+    KBSearchPosting.objects.filter(article_id__in=article_ids).delete()
+    KBSearchDocument.objects.filter(article_id__in=article_ids).delete()
+
+
+def remove_articles(article_ids):
+    """Drop articles from the index (used for soft deletes)."""
+    from . import retrieval
+
+    article_ids = list(article_ids)
+    if not article_ids:
+        return
+    _remove_postings(article_ids)
+    retrieval.remove_articles(article_ids)
+
+
+def rebuild_index(hub_id=None, batch_size=500):
+    """Reindex every live article (optionally of one hub). Returns the number indexed."""
+    from .models import KBArticle, KBSearchDocument, KBSearchPosting
+
+    articles = KBArticle.objects.filter(is_deleted=False)
+    if hub_id is not None:
+        articles = articles.filter(hub_id=hub_id)
+        KBSearchPosting.objects.filter(hub_id=hub_id).delete()
+        KBSearchDocument.objects.filter(hub_id=hub_id).delete()
+    else:
+        KBSearchPosting.objects.all().delete()
+        KBSearchDocument.objects.all().delete()
+
+    total = 0
+    batch = []
+    for article in articles.order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(article)
+        if len(batch) >= batch_size:
+            index_articles(batch)
+            total += len(batch)
+            batch = []
+    index_articles(batch)
+    return total + len(batch)
+
+
+# ----------------------------------------------------------------------
+# Querying
+# ----------------------------------------------------------------------
+
+def _plan(hub_id, query):
+    """
+    Return ``(groups, idf, avg_length)`` for ``query``: the index terms each
+    query term covers, the BM25 idf of every such term and the hub's average
+    document length. None when some query term matches nothing.
+    """
+    from .models import KBSearchDocument, KBSearchPosting
+
+    parsed = query_terms(query)
+    if not parsed:
+        return None
+
+    postings = KBSearchPosting.objects.filter(hub_id=hub_id, article__is_deleted=False)
+
+    # Resolve each query term to the index terms it covers, with document frequencies
+    df = {}
+    groups = []
+    for term, is_prefix in parsed:
+        if is_prefix:
+            rows = (
+                postings.filter(term__startswith=term)
+                .values('term').annotate(df=Count('pk'))
+                .order_by('-df')[:MAX_PREFIX_EXPANSIONS]
+            )
+        else:
+            rows = postings.filter(term=term).values('term').annotate(df=Count('pk')).order_by()
+        matched = {row['term']: row['df'] for row in rows}
+        if not matched:
+            return None
+        df.update(matched)
+        groups.append(list(matched))
+
+    stats = KBSearchDocument.objects.filter(hub_id=hub_id).aggregate(n=Count('pk'), avg=Avg('length'))
+    n_docs = stats['n'] or 0
+    if not n_docs:
+        return None
+    idf = {
+        term: math.log(1 + (n_docs - freq + 0.5) / (freq + 0.5))
+        for term, freq in df.items()
+    }
+    return groups, idf, stats['avg'] or 1.0
+
+
+def _score(hub_id, idf, avg_length):
+    """Correlated subquery summing the BM25 contributions of an article's matching postings."""
+    from .models import KBSearchPosting
+
+    freq = Cast('frequency', FloatField())
+    length = Cast(Coalesce(F('article__search_document__length'), Value(0)), FloatField())
+    norm = Value(BM25_K1 * (1 - BM25_B)) + Value(BM25_K1 * BM25_B / avg_length) * length
+    term_idf = Case(*[When(term=term, then=Value(value)) for term, value in idf.items()], output_field=FloatField())
+    return Subquery(
+        KBSearchPosting.objects.filter(hub_id=hub_id, article_id=OuterRef('pk'), term__in=list(idf))
+        .order_by().values('article_id')
+        .annotate(score=Sum(term_idf * freq * Value(BM25_K1 + 1) / (freq + norm), output_field=FloatField()))
+        .values('score'),
+        output_field=FloatField(),
+    )
+
+
+def filter_articles(qs, hub_id, query, rank=False):
+    """
+    Limit an article queryset of the hub to the articles matching every
+    query term. ``rank`` annotates each row with its BM25 ``relevance``.
+    """
+    from .models import KBSearchPosting
+
+    plan = _plan(hub_id, query)
+    if plan is None:
+        qs = qs.none()
+        return qs.annotate(relevance=Value(0.0, output_field=FloatField())) if rank else qs
+    groups, idf, avg_length = plan
+    for group in groups:
+        qs = qs.filter(pk__in=KBSearchPosting.objects.filter(hub_id=hub_id, term__in=group).values('article_id'))
+    return qs.annotate(relevance=_score(hub_id, idf, avg_length)) if rank else qs
+
+
+def search(hub_id, query, limit=MAX_RESULTS):
+    """
+    Return ``[(article_id, score), ...]`` for live articles of the hub
+    matching every query term, best BM25 score first.
+    """
+    from .models import KBArticle
+
+    qs = filter_articles(KBArticle.objects.filter(hub_id=hub_id, is_deleted=False), hub_id, query, rank=True)
+    return list(qs.order_by('-relevance', 'pk').values_list('pk', 'relevance')[:limit])
@@ -0,0 +1,90 @@
+"""
+Per-hub unique slugs: generation in bulk and slug lookups.
+
+Live articles and categories have unique ``(hub_id, slug)`` pairs, enforced
+by partial unique constraints. ``unique_slugs`` assigns a slug to every row
+of a batch with a handful of queries in total (one per collision round, not
+one per row): rows sharing a base slug get increasing ``-2``, ``-3``, ...
+suffixes, and every round checks all of its candidates against the hub's
+live rows at once. ``save_unique`` does the same for a single row and
+retries when a concurrent writer takes the slug first.
+
+``resolve_article`` serves slug URLs with a single lookup on the unique
+``(hub_id, slug)`` index, so renames and deletes are visible at once in
+every process without any invalidation.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+SAVE_ATTEMPTS = 3
+
+
+def base_slug(value, max_length):
+    return slugify(value or '')[:max_length].strip('-') or 'item'
+
+
+def _with_suffix(base, n, max_length):
+    if n == 1:
+        return base
+    suffix = f'-{n}'
+    return base[:max_length - len(suffix)].rstrip('-') + suffix
+
+
+def unique_slugs(model, hub_id, bases, exclude_pks=()):
+    """
+    Return one slug per entry of ``bases`` that is unique among the hub's live
+    ``model`` rows and within the batch itself.
+    """
+    max_length = model._meta.get_field('slug').max_length
+    live = model.objects.filter(hub_id=hub_id, is_deleted=False).exclude(pk__in=list(exclude_pks))
+    result = [None] * len(bases)
+    next_suffix = defaultdict(lambda: 1)
+    used = set()
+    pending = list(enumerate(bases))
+    while pending:
+        candidates = {}
+        for index, base in pending:
+            while True:
+                candidate = _with_suffix(base, next_suffix[base], max_length)
+                next_suffix[base] += 1
+                if candidate not in used:
+                    break
+            used.add(candidate)
+            candidates[index] = (base, candidate)
+        taken = set(live.filter(
+            slug__in=[candidate for _base, candidate in candidates.values()],
+        ).values_list('slug', flat=True))
+        pending = []
+        for index, (base, candidate) in candidates.items():
+            if candidate in taken:
+                pending.append((index, base))
+            else:
+                result[index] = candidate
+    return result
+
+
+def save_unique(obj, base, **kwargs):
+    """
+    Save ``obj`` under the first slug derived from ``base`` that is free in
+    its hub. Losing a race for that slug to a concurrent writer trips the
+    unique constraint, and the next free slug is tried.
+    """
+    for attempt in range(SAVE_ATTEMPTS):
+        obj.slug = unique_slugs(type(obj), obj.hub_id, [base], exclude_pks=[obj.pk])[0]
+        try:
+            with transaction.atomic():
+                obj.save(**kwargs)
+            return obj
+        except IntegrityError:
+            if attempt == SAVE_ATTEMPTS - 1:
+                raise
+
+
+def resolve_article(hub_id, slug, queryset=None):
+    """The live article of the hub with ``slug`` from ``queryset`` (default: all articles), or None."""
+    from .models import KBArticle
+
+    qs = KBArticle.objects.all() if queryset is None else queryset
+    return qs.filter(hub_id=hub_id, is_deleted=False, slug=slug).first()
@@ -0,0 +1,98 @@
+"""
+Materialized per-hub knowledge base statistics (``KBHubStats``).
+
+Write paths describe what a row contributed before and after the change and
+``apply`` turns the difference into a single ``UPDATE ... SET x = x + n`` on
+the hub's stats row, so the dashboard reads everything with one primary-key
+lookup. ``rebuild`` recomputes a hub from scratch to repair drift.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, Max, Q, Sum
+from django.db.models import F
+from django.utils import timezone
+
+
+def article_contribution(article):
+    return {
+        'total_articles': 1,
+        'published_articles': int(article.is_published),
+        'uncategorized_articles': int(article.category_id is None),
+        'total_views': article.view_count,
+    }
+
+
+def articles_contribution(queryset):
+    """Aggregate contribution of many articles, in one query."""
+    totals = queryset.aggregate(
+        total_articles=Count('pk'),
+        published_articles=Count('pk', filter=Q(is_published=True)),
+        uncategorized_articles=Count('pk', filter=Q(category__isnull=True)),
+        total_views=Sum('view_count'),
+    )
+    return {field: value or 0 for field, value in totals.items()}
+
+
+def category_contribution(category):
+    return {'total_categories': 1, 'active_categories': int(category.is_active)}
+
+
+def categories_contribution(queryset):
+    totals = queryset.aggregate(
+        total_categories=Count('pk'),
+        active_categories=Count('pk', filter=Q(is_active=True)),
+    )
+    return {field: value or 0 for field, value in totals.items()}
+
+
+def total(contributions):
+    """Sum of many per-row contributions."""
+    result = defaultdict(int)
+    for contribution in contributions:
+        for field, value in contribution.items():
+            result[field] += value
+    return dict(result)
+
+
+def apply(hub_id, before=None, after=None, touched=False):
+    """Add ``after - before`` to the hub's stats; ``touched`` marks article content as updated now."""
+    deltas = defaultdict(int)
+    for field, value in (after or {}).items():
+        deltas[field] += value
+    for field, value in (before or {}).items():
+        deltas[field] -= value
+    adjust(hub_id, touched=touched, **deltas)
+
+
+def adjust(hub_id, touched=False, **deltas):
+    from .models import KBHubStats
+
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if touched:
+        updates['last_article_update'] = timezone.now()
+    if not updates:
+        return
+    if not KBHubStats.objects.filter(pk=hub_id).update(**updates):
+        rebuild(hub_id)
+
+
+def rebuild(hub_id):
+    """Recompute the hub's stats row from the source tables."""
+    from .models import KBArticle, KBCategory, KBHubStats
+
+    articles = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False)
+    values = articles_contribution(articles)
+    values.update(categories_contribution(KBCategory.objects.filter(hub_id=hub_id, is_deleted=False)))
+    values['last_article_update'] = articles.aggregate(latest=Max('updated_at'))['latest']
+    values['rebuilt_at'] = timezone.now()
+    stats, _created = KBHubStats.objects.update_or_create(hub_id=hub_id, defaults=values)
+    return stats
+
+
+def get_stats(hub_id):
+    from .models import KBHubStats
+
+    try:
+        return KBHubStats.objects.get(pk=hub_id)
+    except KBHubStats.DoesNotExist:
+        return rebuild(hub_id)
@@ -1,12 +1,18 @@
 """Pytest fixtures for knowledge_base module tests."""
+import time
 import uuid
+from contextlib import contextmanager
+
 import pytest
 from decimal import Decimal
 from django.utils import timezone
 from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from apps.accounts.models import LocalUser
 from apps.configuration.models import HubConfig, StoreConfig
+from knowledge_base import tree
 from knowledge_base.models import KBCategory, KBArticle
 
 
@@ -71,7 +77,7 @@ def kb_category(db, hub_id):
     return KBCategory.objects.create(
         hub_id=hub_id,
         name='Test Name',
-        slug='Test Slug',
+        slug='test-slug',
         description='Test description',
         order=1,
         is_active=True,
@@ -84,9 +90,58 @@ def kb_article(db, hub_id):
     return KBArticle.objects.create(
         hub_id=hub_id,
         title='Test Title',
-        slug='Test Slug',
+        slug='test-slug',
         content='Test description',
         is_published=True,
         view_count=5,
     )
 
+
+
+@pytest.fixture
+def large_hub(db, admin_user):
+    """Seed the admin user's hub with enough rows to expose N+1 queries."""
+    hub_id = admin_user.hub_id
+    categories = KBCategory.objects.bulk_create([
+        tree.as_root(KBCategory(hub_id=hub_id, name=f'Category {i:02d}', slug=f'category-{i:02d}', order=i))
+        for i in range(12)
+    ])
+    articles = KBArticle.objects.bulk_create([
+        KBArticle(
+            hub_id=hub_id,
+            category=categories[i % len(categories)],
+            title=f'Article {i:03d}',
+            slug=f'article-{i:03d}',
+            content=f'Body of article {i}',
+            is_published=bool(i % 2),
+        )
+        for i in range(150)
+    ])
+    return {'categories': categories, 'articles': articles}
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Assert that a block stays within a query-count and latency budget.
+
+    Usage::
+
+        with query_budget(max_queries=12, max_seconds=1.0) as captured:
+            client.get(url)
+    """
+    @contextmanager
+    def budget(max_queries, max_seconds=None):
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as captured:
+            yield captured
+        elapsed = time.perf_counter() - started
+        executed = len(captured.captured_queries)
+        assert executed <= max_queries, (
+            f'{executed} queries executed, budget is {max_queries}:\n'
+            + '\n'.join(q['sql'] for q in captured.captured_queries)
+        )
+        if max_seconds is not None:
+            assert elapsed <= max_seconds, f'took {elapsed:.3f}s, budget is {max_seconds}s'
+
+    return budget
@@ -0,0 +1,99 @@
+"""Tests for the all-or-nothing batch writes of the assistant tools."""
+import pytest
+
+from knowledge_base import batches, search, stats
+from knowledge_base.models import KBArticle, KBArticleRevision, KBCategory
+
+
+@pytest.mark.django_db
+class TestCreateArticles:
+    """Batch article creation."""
+
+    def test_creates_every_item_in_few_queries(self, hub_id, kb_category, django_assert_max_num_queries):
+        """Test a batch resolves categories and slugs in bulk and indexes the articles."""
+        items = [
+            {'title': f'Setup step {n}', 'content': f'Install component{n}.', 'category': kb_category.slug}
+            for n in range(40)
+        ] + [{'title': 'Setup step 0', 'content': 'Duplicate title.'}]
+        with django_assert_max_num_queries(60):
+            objs, errors = batches.create_articles(hub_id, items)
+        assert errors == []
+        assert KBArticle.objects.filter(hub_id=hub_id, title__startswith='Setup step').count() == 41
+        assert len({obj.slug for obj in objs}) == 41
+        assert objs[-1].slug == 'setup-step-0-2'
+        assert all(obj.category_id == kb_category.pk for obj in objs[:40])
+        assert search.search(hub_id, 'component7')[0][0] == objs[7].pk
+        assert KBArticleRevision.objects.filter(article__in=objs, number=1).count() == 41
+        assert stats.get_stats(hub_id).total_articles == 41
+
+    def test_invalid_item_writes_nothing(self, hub_id):
+        """Test one bad item rejects the whole batch with indexed errors."""
+        objs, errors = batches.create_articles(hub_id, [
+            {'title': 'Fine', 'content': 'x'},
+            {'title': '', 'content': 'x'},
+            {'title': 'Lost', 'content': 'x', 'category': 'missing'},
+        ])
+        assert objs == []
+        assert [error['index'] for error in errors] == [1, 2]
+        assert not KBArticle.objects.filter(hub_id=hub_id).exists()
+
+    def test_batch_size_is_bounded(self, hub_id):
+        """Test oversized batches are refused."""
+        items = [{'title': str(n), 'content': ''} for n in range(batches.MAX_BATCH_SIZE + 1)]
+        assert batches.create_articles(hub_id, items)[1]
+
+
+@pytest.mark.django_db
+class TestCreateCategories:
+    """Batch category creation."""
+
+    def test_nests_under_existing_parent(self, hub_id, kb_category):
+        """Test children get the parent's path and depth."""
+        objs, errors = batches.create_categories(hub_id, [
+            {'name': 'Printers', 'parent_id': str(kb_category.pk)}, {'name': 'Printers'},
+        ])
+        assert errors == []
+        child = KBCategory.objects.get(pk=objs[0].pk)
+        assert child.path.startswith(kb_category.path) and child.depth == kb_category.depth + 1
+        assert [obj.slug for obj in objs] == ['printers', 'printers-2']
+
+    def test_errors_follow_item_order(self, hub_id):
+        """Test category errors are reported by item index, like article errors."""
+        objs, errors = batches.create_categories(hub_id, [
+            {'name': 'Fine'}, {'name': 'Orphan', 'parent_id': 'not-a-uuid'}, {'name': ''},
+        ])
+        assert objs == []
+        assert [error['index'] for error in errors] == [1, 2]
+
+    def test_unknown_parent_is_rejected(self, hub_id):
+        """Test a missing parent is reported and nothing is created."""
+        objs, errors = batches.create_categories(hub_id, [{'name': 'A'}, {'name': 'B', 'parent_id': 'nope'}])
+        assert objs == [] and errors[0]['index'] == 1
+        assert not KBCategory.objects.filter(hub_id=hub_id).exists()
+
+
+@pytest.mark.django_db
+class TestUpdateArticles:
+    """Batch article updates."""
+
+    def test_updates_given_fields_only(self, hub_id, kb_article, kb_category):
+        """Test content changes are reindexed and other fields kept."""
+        objs, errors = batches.update_articles(hub_id, [
+            {'id': str(kb_article.pk), 'content': 'Rotate the toner cartridge.', 'category_id': str(kb_category.pk)},
+        ])
+        assert errors == []
+        kb_article.refresh_from_db()
+        assert kb_article.content == 'Rotate the toner cartridge.'
+        assert kb_article.category_id == kb_category.pk
+        assert kb_article.title == objs[0].title
+        assert search.search(hub_id, 'toner')[0][0] == kb_article.pk
+
+    def test_unknown_id_rejects_batch(self, hub_id, kb_article):
+        """Test a missing article leaves the others untouched."""
+        title = kb_article.title
+        objs, errors = batches.update_articles(hub_id, [
+            {'id': str(kb_article.pk), 'title': 'Renamed'}, {'id': 'missing', 'title': 'X'},
+        ])
+        assert objs == [] and errors[0]['index'] == 1
+        kb_article.refresh_from_db()
+        assert kb_article.title == title
@@ -0,0 +1,106 @@
+"""Tests for compressed out-of-row article bodies."""
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from knowledge_base import bodies, exports
+from knowledge_base.models import KBArticle, KBArticleBody
+
+LONG_BODY = 'A long paragraph of article text.\n' * 200
+
+
+@pytest.mark.django_db
+class TestBodyOffload:
+    """Writing and lazily reading offloaded bodies."""
+
+    def test_small_bodies_stay_in_row(self, hub_id, settings):
+        """Test bodies below the threshold are stored inline."""
+        settings.KNOWLEDGE_BASE_BODY_OFFLOAD_THRESHOLD = 1024
+        article = KBArticle.objects.create(hub_id=hub_id, title='Short', slug='short', content='Tiny body')
+        assert not article.body_offloaded
+        assert not KBArticleBody.objects.filter(article=article).exists()
+
+    def test_large_body_is_offloaded(self, hub_id, settings):
+        """Test a large body leaves the row empty and is compressed."""
+        settings.KNOWLEDGE_BASE_BODY_OFFLOAD_THRESHOLD = 1024
+        article = KBArticle.objects.create(hub_id=hub_id, title='Long', slug='long', content=LONG_BODY)
+        assert article.content == LONG_BODY
+        assert KBArticle.objects.filter(pk=article.pk).values_list('content', flat=True).get() == ''
+        stored = KBArticleBody.objects.get(article=article)
+        assert len(bytes(stored.data)) < len(LONG_BODY) // 10
+        assert stored.raw_length == len(LONG_BODY)
+        assert article.content_length == len(LONG_BODY)
+
+    def test_body_is_read_lazily(self, hub_id, settings):
+        """Test the body is only fetched when ``content`` is accessed."""
+        settings.KNOWLEDGE_BASE_BODY_OFFLOAD_THRESHOLD = 1024
+        article = KBArticle.objects.create(hub_id=hub_id, title='Long', slug='long', content=LONG_BODY)
+        with CaptureQueriesContext(connection) as ctx:
+            loaded = KBArticle.objects.get(pk=article.pk)
+            assert loaded.title == 'Long'
+        assert len(ctx.captured_queries) == 1
+        with CaptureQueriesContext(connection) as ctx:
+            assert loaded.content == LONG_BODY
+            assert loaded.content == LONG_BODY
+        assert len(ctx.captured_queries) == 1
+
+    def test_shrinking_body_moves_back_inline(self, hub_id, settings):
+        """Test a body edited below the threshold drops its body row."""
+        settings.KNOWLEDGE_BASE_BODY_OFFLOAD_THRESHOLD = 1024
+        article = KBArticle.objects.create(hub_id=hub_id, title='Long', slug='long', content=LONG_BODY)
+        article = KBArticle.objects.get(pk=article.pk)
+        article.content = 'Short again'
+        article.save()
+        article.refresh_from_db()
+        assert not article.body_offloaded
+        assert article.content == 'Short again'
+        assert not KBArticleBody.objects.filter(article=article).exists()
+
+    def test_metadata_save_keeps_body(self, hub_id, settings):
+        """Test saving other fields neither reads nor rewrites the body."""
+        settings.KNOWLEDGE_BASE_BODY_OFFLOAD_THRESHOLD = 1024
+        article = KBArticle.objects.create(hub_id=hub_id, title='Long', slug='long', content=LONG_BODY)
+        article = KBArticle.objects.get(pk=article.pk)
+        article.title = 'Renamed'
+        article.save()
+        assert KBArticle.objects.get(pk=article.pk).content == LONG_BODY
+
+    def test_list_query_skips_body_table(self, auth_client, hub_id, settings):
+        """Test the article list never touches the body table."""
+        settings.KNOWLEDGE_BASE_BODY_OFFLOAD_THRESHOLD = 1024
+        KBArticle.objects.create(hub_id=hub_id, title='Long', slug='long', content=LONG_BODY)
+        with CaptureQueriesContext(connection) as ctx:
+            response = auth_client.get(reverse('knowledge_base:kb_articles_list'))
+        assert response.status_code == 200
+        assert not any('knowledge_base_kbarticlebody' in q['sql'] for q in ctx.captured_queries)
+
+    def test_export_includes_offloaded_bodies(self, hub_id, settings):
+        """Test exports fill in offloaded bodies."""
+        settings.KNOWLEDGE_BASE_BODY_OFFLOAD_THRESHOLD = 1024
+        KBArticle.objects.create(hub_id=hub_id, title='Long', slug='long', content=LONG_BODY)
+        KBArticle.objects.create(hub_id=hub_id, title='Short', slug='short', content='Tiny')
+        fields = tuple(field for field, _header in exports.KB_ARTICLE_EXPORT_FIELDS)
+        rows = list(exports.iter_rows(KBArticle.objects.filter(hub_id=hub_id).order_by('title'), fields))
+        content = fields.index('content')
+        assert [row[content] for row in rows] == [LONG_BODY, 'Tiny']
+
+
+@pytest.mark.django_db
+class TestOffloadCommand:
+    """Batch conversion of existing rows."""
+
+    def test_converts_existing_rows(self, hub_id, settings):
+        """Test the command moves only large bodies, in batches."""
+        long_ids = [
+            KBArticle.objects.create(hub_id=hub_id, title=f'Long {i}', slug=f'long-{i}', content=LONG_BODY).pk
+            for i in range(3)
+        ]
+        short = KBArticle.objects.create(hub_id=hub_id, title='Short', slug='short', content='Tiny')
+        call_command('kb_offload_bodies', threshold=1024, batch_size=2)
+        assert set(KBArticleBody.objects.values_list('article_id', flat=True)) == set(long_ids)
+        assert KBArticle.objects.get(pk=long_ids[0]).content == LONG_BODY
+        short.refresh_from_db()
+        assert not short.body_offloaded
+        assert bodies.offload_existing(threshold=1024) == 0
@@ -0,0 +1,68 @@
+"""Tests for knowledge_base bulk actions."""
+import pytest
+from django.urls import reverse
+
+from knowledge_base import bulk, search, stats
+from knowledge_base.models import KBArticle, KBCategory
+
+
+@pytest.fixture
+def articles(hub_id):
+    rows = [
+        KBArticle.objects.create(hub_id=hub_id, title=f'Printer guide {i}', slug=f'printer-{i}', content='Setup')
+        for i in range(5)
+    ] + [
+        KBArticle.objects.create(hub_id=hub_id, title=f'Refund policy {i}', slug=f'refund-{i}', content='Money')
+        for i in range(3)
+    ]
+    search.index_articles(rows)
+    return rows
+
+
+@pytest.mark.django_db
+class TestChunkedActions:
+    """Set-based bulk actions."""
+
+    def test_publish_matching_in_chunks(self, hub_id, articles):
+        """Test every row matching the search is updated, across chunks."""
+        stats.get_stats(hub_id)
+        qs = bulk.target_queryset(KBArticle, hub_id, search_query='printer')
+        assert bulk.article_action(hub_id, 'publish', qs, chunk_size=2) == 5
+        assert KBArticle.objects.filter(hub_id=hub_id, is_published=True).count() == 5
+        assert stats.get_stats(hub_id).published_articles == 5
+        # Already published rows are not touched again
+        assert bulk.article_action(hub_id, 'publish', qs, chunk_size=2) == 0
+
+    def test_move_and_delete(self, hub_id, articles):
+        """Test moving to a category and deleting keep stats and search in step."""
+        category = KBCategory.objects.create(hub_id=hub_id, name='Hardware', slug='hardware')
+        stats.get_stats(hub_id)
+        qs = bulk.target_queryset(KBArticle, hub_id, search_query='printer')
+        assert bulk.article_action(hub_id, 'move', qs, category.pk) == 5
+        assert stats.get_stats(hub_id).uncategorized_articles == 3
+        assert bulk.article_action(hub_id, 'delete', qs, chunk_size=3) == 5
+        assert search.search(hub_id, 'printer') == []
+        rebuilt = stats.rebuild(hub_id)
+        assert rebuilt.total_articles == 3
+        assert rebuilt.uncategorized_articles == 3
+
+    def test_ids_scope(self, hub_id, articles):
+        """Test an id list limits the action to the selected rows."""
+        qs = bulk.target_queryset(KBArticle, hub_id, ids=[articles[0].pk])
+        assert bulk.article_action(hub_id, 'delete', qs) == 1
+
+
+@pytest.mark.django_db
+class TestBulkViews:
+    """Bulk action endpoints."""
+
+    def test_select_all_matching(self, auth_client, admin_user):
+        """Test scope=all applies to every category matching the search."""
+        for i in range(12):
+            KBCategory.objects.create(hub_id=admin_user.hub_id, name=f'Team {i}', slug=f'team-{i}')
+        KBCategory.objects.create(hub_id=admin_user.hub_id, name='Other', slug='other')
+        url = reverse('knowledge_base:kb_categories_bulk_action')
+        response = auth_client.post(url, {'scope': 'all', 'q': 'team', 'action': 'deactivate'})
+        assert response.context['bulk_affected'] == 12
+        assert response.context['search_query'] == 'team'
+        assert KBCategory.objects.filter(hub_id=admin_user.hub_id, is_active=True).count() == 1
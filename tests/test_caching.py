@@ -0,0 +1,113 @@
+"""Tests for knowledge_base per-hub caching helpers."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from knowledge_base import caching
+from knowledge_base.models import KBArticle
+
+
+@pytest.mark.django_db
+class TestHubVersion:
+    """Per-hub content version tests."""
+
+    def test_version_is_stable(self, hub_id):
+        """Test the version does not change without writes."""
+        assert caching.hub_version(hub_id) == caching.hub_version(hub_id)
+
+    def test_bump_increases_version(self, hub_id):
+        """Test bumping yields a larger version."""
+        before = caching.hub_version(hub_id)
+        assert caching.bump_hub_version(hub_id) > before
+        assert caching.hub_version(hub_id) > before
+
+
+@pytest.mark.django_db
+class TestCachedCount:
+    """Cached count tests."""
+
+    def test_count_is_cached_until_bump(self, hub_id, kb_article, django_assert_num_queries):
+        """Test counts are served from cache until the hub version changes."""
+        qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False)
+        assert caching.cached_count(qs, hub_id, 'kb_articles', '') == (1, True)
+        with django_assert_num_queries(0):
+            assert caching.cached_count(qs, hub_id, 'kb_articles', '') == (1, True)
+        KBArticle.objects.create(hub_id=hub_id, title='Second', slug='second', content='Body')
+        caching.bump_hub_version(hub_id)
+        assert caching.cached_count(qs, hub_id, 'kb_articles', '') == (2, True)
+
+    def test_approximate_count_is_capped(self, hub_id, settings):
+        """Test approximate counts stop at the configured cap."""
+        settings.KNOWLEDGE_BASE_COUNT_CAP = 3
+        for i in range(5):
+            KBArticle.objects.create(hub_id=hub_id, title=f'Article {i}', slug=f'a-{i}', content='Body')
+        qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False)
+        assert caching.cached_count(qs, hub_id, 'kb_articles', 'x', approximate=True) == (3, False)
+
+
+@pytest.mark.django_db
+class TestCountInvalidation:
+    """Write views invalidate cached counts."""
+
+    def test_dashboard_reflects_delete(self, auth_client, admin_user):
+        """Test the dashboard count drops after a delete."""
+        article = KBArticle.objects.create(hub_id=admin_user.hub_id, title='Doomed', slug='doomed', content='Body')
+        url = reverse('knowledge_base:dashboard')
+        assert auth_client.get(url).context['total_kb_articles'] == 1
+        auth_client.post(reverse('knowledge_base:kb_article_delete', args=[article.pk]))
+        assert auth_client.get(url).context['total_kb_articles'] == 0
+
+
+@pytest.mark.django_db
+class TestFragmentCache:
+    """Rendered datatable bodies are cached per hub version."""
+
+    def _get(self, auth_client, url):
+        with CaptureQueriesContext(connection) as captured:
+            response = auth_client.get(url, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        sql = ' '.join(q['sql'] for q in captured.captured_queries)
+        return response, 'knowledge_base_kbarticle"' in sql
+
+    def test_repeat_view_is_served_from_cache(self, auth_client, kb_article):
+        """Test the second identical request runs no article queries."""
+        url = reverse('knowledge_base:kb_articles_list')
+        first, first_queried = self._get(auth_client, url)
+        second, second_queried = self._get(auth_client, url)
+        assert first_queried and not second_queried
+        assert first.content == second.content
+
+    def test_write_invalidates_fragment(self, auth_client, kb_article):
+        """Test a write view makes the next request render fresh rows."""
+        url = reverse('knowledge_base:kb_articles_list')
+        self._get(auth_client, url)
+        auth_client.post(reverse('knowledge_base:kb_article_edit', args=[kb_article.pk]), {
+            'title': 'Renamed article', 'slug': 'renamed', 'content': 'Body', 'is_published': 'on',
+        })
+        response, queried = self._get(auth_client, url)
+        assert queried
+        assert b'Renamed article' in response.content
+
+    def test_cache_can_be_disabled(self, auth_client, kb_article, settings):
+        """Test a zero lifetime turns the fragment cache off."""
+        settings.KNOWLEDGE_BASE_FRAGMENT_CACHE_SECONDS = 0
+        url = reverse('knowledge_base:kb_articles_list')
+        self._get(auth_client, url)
+        assert self._get(auth_client, url)[1]
+
+
+@pytest.mark.django_db
+class TestViewFlushes:
+    """Flushing view counts is not a content change."""
+
+    def test_flush_keeps_hub_version(self, hub_id, kb_article, settings):
+        """Test a view flush leaves the hub version alone and bumps the views version."""
+        from knowledge_base import counters
+        settings.KNOWLEDGE_BASE_VIEW_FLUSH_SECONDS = 3600
+        counters._take()
+        content_version = caching.hub_version(hub_id)
+        views_version = caching.views_version(hub_id)
+        counters.record_view(hub_id, kb_article.pk)
+        counters.flush()
+        assert caching.hub_version(hub_id) == content_version
+        assert caching.views_version(hub_id) > views_version
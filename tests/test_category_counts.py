@@ -0,0 +1,62 @@
+"""Tests for the per-category article aggregates."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from knowledge_base.models import KBArticle, KBCategory
+from knowledge_base.queries import kb_categories_queryset
+
+
+def _article(hub_id, category, title, **kwargs):
+    return KBArticle.objects.create(hub_id=hub_id, category=category, title=title, slug=title.lower(), content='Body', **kwargs)
+
+
+@pytest.fixture
+def counted(db, hub_id):
+    busy = KBCategory.objects.create(hub_id=hub_id, name='Busy', slug='busy')
+    quiet = KBCategory.objects.create(hub_id=hub_id, name='Quiet', slug='quiet')
+    _article(hub_id, busy, 'One', is_published=True, view_count=10)
+    _article(hub_id, busy, 'Two', view_count=5)
+    _article(hub_id, busy, 'Gone', is_published=True, view_count=100, is_deleted=True)
+    _article(hub_id, quiet, 'Three', is_published=True, view_count=1)
+    return busy, quiet
+
+
+@pytest.mark.django_db
+class TestCategoryCounts:
+    """Annotated article totals per category."""
+
+    def test_counts_skip_deleted_articles(self, hub_id, counted):
+        """Test totals, published totals and view sums of live articles."""
+        qs, _order_field, _sort = kb_categories_queryset(hub_id)
+        with CaptureQueriesContext(connection) as ctx:
+            rows = {c.name: (c.article_count, c.published_count, c.view_sum) for c in qs}
+        assert len(ctx.captured_queries) == 1
+        assert rows == {'Busy': (2, 1, 15), 'Quiet': (1, 1, 1)}
+
+    def test_empty_category_has_zero_views(self, hub_id):
+        """Test a category without articles reports zeros, not NULL."""
+        KBCategory.objects.create(hub_id=hub_id, name='Empty', slug='empty')
+        category = kb_categories_queryset(hub_id)[0].get()
+        assert (category.article_count, category.published_count, category.view_sum) == (0, 0, 0)
+
+    def test_sort_by_article_count(self, hub_id, counted):
+        """Test the aggregates are sortable datatable columns."""
+        qs, order_field, sort_field = kb_categories_queryset(hub_id, sort_field='article_count', sort_dir='desc')
+        assert (order_field, sort_field) == ('article_count', 'article_count')
+        assert [c.name for c in qs] == ['Busy', 'Quiet']
+
+    def test_list_view_sorts_by_views(self, auth_client, counted):
+        """Test the datatable renders and pages when sorted by view sum."""
+        response = auth_client.get(reverse('knowledge_base:kb_categories_list'), {'sort': 'view_sum', 'dir': 'asc'})
+        html = response.content.decode()
+        assert response.status_code == 200
+        assert html.index('Quiet') < html.index('Busy')
+
+    def test_dashboard_lists_top_categories(self, auth_client, counted):
+        """Test the dashboard shows categories by article count."""
+        response = auth_client.get(reverse('knowledge_base:dashboard'))
+        html = response.content.decode()
+        assert 'Top Categories' in html
+        assert html.index('Busy') < html.index('Quiet')
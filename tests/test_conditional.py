@@ -0,0 +1,56 @@
+"""Tests for conditional GET on the knowledge base read views."""
+import pytest
+from django.urls import reverse
+
+from knowledge_base import counters
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    """ETag / Last-Modified handling."""
+
+    @pytest.mark.parametrize('name', ['dashboard', 'kb_articles_list', 'kb_categories_list'])
+    def test_unchanged_hub_returns_304(self, auth_client, kb_article, name):
+        """Test revalidating an unchanged page answers 304."""
+        url = reverse(f'knowledge_base:{name}')
+        first = auth_client.get(url)
+        assert first.status_code == 200
+        assert first.has_header('Last-Modified')
+        second = auth_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert second.status_code == 304
+
+    def test_write_changes_etag(self, auth_client, kb_article):
+        """Test a write makes the next revalidation return fresh content."""
+        url = reverse('knowledge_base:kb_articles_list')
+        etag = auth_client.get(url)['ETag']
+        auth_client.post(reverse('knowledge_base:kb_article_delete', args=[kb_article.pk]))
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    @pytest.mark.parametrize('name', ['dashboard', 'kb_articles_list', 'kb_categories_list'])
+    def test_view_flush_changes_etag(self, auth_client, kb_article, name):
+        """Test flushed view counts make the next revalidation return fresh numbers."""
+        url = reverse(f'knowledge_base:{name}')
+        etag = auth_client.get(url)['ETag']
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        counters.apply_deltas({(kb_article.hub_id, kb_article.pk): 3})
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_etag_depends_on_htmx_target(self, auth_client, kb_article):
+        """Test the datatable partial and the full page never share a validator."""
+        url = reverse('knowledge_base:kb_articles_list')
+        page = auth_client.get(url)
+        partial = auth_client.get(url, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert page['ETag'] != partial['ETag']
+        assert 'HX-Target' in partial['Vary']
+
+    def test_article_view_is_conditional(self, auth_client, kb_article):
+        """Test the published article view supports revalidation."""
+        url = reverse('knowledge_base:kb_article_detail', args=[kb_article.pk])
+        etag = auth_client.get(url)['ETag']
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    def test_exports_are_never_conditional(self, auth_client, kb_article):
+        """Test export downloads carry no validators."""
+        url = reverse('knowledge_base:kb_articles_list')
+        response = auth_client.get(url, {'export': 'csv'})
+        assert not response.has_header('ETag')
@@ -0,0 +1,148 @@
+"""Tests for knowledge_base bulk import."""
+import io
+import uuid
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+
+from knowledge_base import imports, search, slugs, stats
+from knowledge_base.models import KBArticle, KBCategory
+
+
+def _csv(*lines):
+    return io.BytesIO('\n'.join(lines).encode())
+
+
+@pytest.mark.django_db
+class TestUniqueSlugs:
+    """Bulk slug generation."""
+
+    def test_suffixes_collisions(self, hub_id):
+        """Test duplicates within the batch and against the table get suffixes."""
+        KBCategory.objects.create(hub_id=hub_id, name='Guides', slug='guides')
+        result = slugs.unique_slugs(KBCategory, hub_id, ['guides', 'guides', 'faq'])
+        assert result == ['guides-2', 'guides-3', 'faq']
+
+    def test_other_hubs_do_not_collide(self, hub_id):
+        """Test slugs are only unique per hub."""
+        KBCategory.objects.create(hub_id=uuid.uuid4(), name='Guides', slug='guides')
+        assert slugs.unique_slugs(KBCategory, hub_id, ['guides']) == ['guides']
+
+
+@pytest.mark.django_db
+class TestImport:
+    """Streaming CSV / JSONL import."""
+
+    def test_csv_articles(self, hub_id, kb_category):
+        """Test articles are created with categories, slugs, stats and search postings."""
+        kb_category.slug = 'general'
+        kb_category.save()
+        fileobj = _csv(
+            'title,content,category,is_published',
+            'Reset a password,Open settings and reset,general,yes',
+            'Reset a password,Second copy,,no',
+        )
+        result = imports.import_file(hub_id, 'kb_articles', fileobj, 'csv', batch_size=1)
+        assert (result.created, result.error_count) == (2, 0)
+        articles = KBArticle.objects.filter(hub_id=hub_id).order_by('slug')
+        assert [a.slug for a in articles] == ['reset-a-password', 'reset-a-password-2']
+        assert articles[0].category_id == kb_category.pk
+        assert articles[0].word_count == 4
+        assert [pk for pk, _score in search.search(hub_id, 'password')]
+        assert stats.get_stats(hub_id).published_articles == 1
+
+    def test_jsonl_categories_with_errors(self, hub_id):
+        """Test bad records are reported by line and the rest imported."""
+        fileobj = io.BytesIO(b'{"name": "FAQ", "order": 2}\nnot json\n{"description": "no name"}\n')
+        result = imports.import_file(hub_id, 'kb_categories', fileobj, 'jsonl')
+        assert result.created == 1
+        assert result.errors == [(2, 'Unreadable record'), (3, 'Missing name')]
+
+    def test_export_reimports_categories_by_name(self, hub_id, kb_category):
+        """Test the exported KBCategory column (category names) maps back to the categories."""
+        from knowledge_base import exports
+        KBArticle.objects.create(hub_id=hub_id, title='Exported', slug='exported', content='Body', category=kb_category)
+        buffer = io.StringIO()
+        qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False).select_related('category')
+        fields, headers = zip(*exports.KB_ARTICLE_EXPORT_FIELDS)
+        exports.write_csv(buffer, exports.iter_rows(qs, fields), headers)
+        other_hub = uuid.uuid4()
+        category = KBCategory.objects.create(hub_id=other_hub, name=kb_category.name, slug='renamed-slug')
+        result = imports.import_file(other_hub, 'kb_articles', io.BytesIO(buffer.getvalue().encode()), 'csv')
+        assert result.error_count == 0
+        imported = KBArticle.objects.get(hub_id=other_hub, title='Exported')
+        assert imported.category_id == category.pk
+        assert imported.revisions.filter(number=1).exists()
+
+    def test_unknown_category_is_rejected(self, hub_id):
+        """Test unresolvable category slugs end up in the report."""
+        result = imports.import_file(hub_id, 'kb_articles', _csv('title,category', 'Orphan,nowhere'), 'csv')
+        assert result.created == 0
+        assert result.errors == [(2, 'Unknown category "nowhere"')]
+
+    def test_unknown_category_in_mixed_batch(self, hub_id, kb_category):
+        """Test a bad category row is reported while the rest of its batch is imported as articles."""
+        csv = _csv('title,category', 'First,test-slug', 'Orphan,nowhere', 'Last,')
+        result = imports.import_file(hub_id, 'kb_articles', csv, 'csv')
+        assert result.created == 2
+        assert result.errors == [(3, 'Unknown category "nowhere"')]
+        articles = KBArticle.objects.filter(hub_id=hub_id).order_by('title')
+        assert [(a.title, a.category_id) for a in articles] == [('First', kb_category.pk), ('Last', None)]
+        assert not KBCategory.objects.filter(hub_id=hub_id, name__in=['First', 'Last']).exists()
+
+    def test_dry_run_keeps_nothing(self, hub_id):
+        """Test a dry run reports what would be created without writing."""
+        result = imports.import_file(hub_id, 'kb_articles', _csv('title', 'One', 'Two'), 'csv', dry_run=True)
+        assert result.created == 2
+        assert not KBArticle.objects.filter(hub_id=hub_id).exists()
+
+    def test_command(self, hub_id, tmp_path):
+        """Test the management command imports a file."""
+        path = tmp_path / 'categories.csv'
+        path.write_text('name,slug\nGuides,guides\n')
+        call_command('import_kb', str(path), hub_id=str(hub_id), kind='categories')
+        assert KBCategory.objects.get(hub_id=hub_id).slug == 'guides'
+
+    def test_upload_view(self, auth_client, admin_user):
+        """Test importing through the upload endpoint."""
+        upload = SimpleUploadedFile('articles.csv', b'title,content\nHello,World\n', content_type='text/csv')
+        response = auth_client.post(reverse('knowledge_base:kb_import'), {'kind': 'kb_articles', 'file': upload})
+        assert response.status_code == 200
+        assert response.context['result'].created == 1
+        assert KBArticle.objects.filter(hub_id=admin_user.hub_id, title='Hello').exists()
+
+
+@pytest.mark.django_db
+class TestSlugConstraints:
+    """Per-hub slug uniqueness and slug lookups."""
+
+    def test_live_duplicates_are_rejected(self, hub_id, kb_article):
+        """Test the database refuses a second live article with the same slug."""
+        from django.db import IntegrityError, transaction
+        with pytest.raises(IntegrityError), transaction.atomic():
+            KBArticle.objects.create(hub_id=hub_id, title='Copy', slug=kb_article.slug, content='')
+        KBArticle.objects.create(hub_id=uuid.uuid4(), title='Copy', slug=kb_article.slug, content='')
+
+    def test_save_unique_suffixes(self, hub_id, kb_article):
+        """Test a colliding slug gets the next free suffix."""
+        article = KBArticle(hub_id=hub_id, title='Copy', content='')
+        slugs.save_unique(article, kb_article.slug)
+        assert article.slug == f'{kb_article.slug}-2'
+
+    def test_resolve_article_follows_renames(self, hub_id, kb_article, django_assert_num_queries):
+        """Test a slug resolves with one query and a renamed article is not found under its old slug."""
+        with django_assert_num_queries(1):
+            assert slugs.resolve_article(hub_id, kb_article.slug) == kb_article
+        old_slug = kb_article.slug
+        KBArticle.objects.filter(pk=kb_article.pk).update(slug='renamed')
+        assert slugs.resolve_article(hub_id, old_slug) is None
+        assert slugs.resolve_article(hub_id, 'renamed') == kb_article
+
+    def test_slug_url(self, auth_client, hub_id, kb_article):
+        """Test the slug URL shows the published article."""
+        url = reverse('knowledge_base:kb_article_by_slug', args=[kb_article.slug])
+        assert auth_client.get(url).status_code == 200
+        missing = reverse('knowledge_base:kb_article_by_slug', args=['missing'])
+        assert auth_client.get(missing).status_code == 404
@@ -0,0 +1,108 @@
+"""Tests for knowledge_base background export jobs."""
+import pytest
+from django.urls import reverse
+
+from knowledge_base import jobs
+from knowledge_base.models import KBArticle, KBExportJob
+
+
+@pytest.fixture
+def inline_jobs(settings, tmp_path):
+    """Run jobs synchronously and write files to a temporary MEDIA_ROOT."""
+    settings.KNOWLEDGE_BASE_JOB_RUNNER = 'inline'
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestExportJobs:
+    """Export job tests."""
+
+    def test_run_export_writes_file(self, hub_id, kb_article, inline_jobs):
+        """Test a CSV job writes every row and records progress."""
+        job = KBExportJob.objects.create(hub_id=hub_id, kind='kb_articles', export_format='csv')
+        jobs.run_export(job.pk)
+        job.refresh_from_db()
+        assert job.status == KBExportJob.STATUS_DONE
+        assert job.total_rows == job.processed_rows == 1
+        assert job.progress == 100
+        with jobs.export_storage().open(job.file_name) as fileobj:
+            content = fileobj.read().decode()
+        assert 'Test Title' in content
+
+    def test_run_export_applies_filters(self, hub_id, kb_article, inline_jobs):
+        """Test the job exports only rows matching its saved search."""
+        KBArticle.objects.create(hub_id=hub_id, title='Other', slug='other', content='Body')
+        job = KBExportJob.objects.create(
+            hub_id=hub_id, kind='kb_articles', export_format='csv', params={'q': 'zzz-no-match'},
+        )
+        jobs.run_export(job.pk)
+        job.refresh_from_db()
+        assert job.total_rows == 0
+
+    def test_failed_job_records_error(self, hub_id, inline_jobs, monkeypatch):
+        """Test failures are stored on the job."""
+        def boom(*args, **kwargs):
+            raise RuntimeError('disk full')
+        monkeypatch.setattr('knowledge_base.exports.write_csv', boom)
+        job = KBExportJob.objects.create(hub_id=hub_id, kind='kb_categories', export_format='csv')
+        jobs.run_export(job.pk)
+        job.refresh_from_db()
+        assert job.status == KBExportJob.STATUS_FAILED
+        assert 'disk full' in job.error
+
+    def test_missing_job_is_ignored(self, inline_jobs):
+        """Test a job deleted before it runs does not raise in the worker."""
+        import uuid
+        jobs.run_export(uuid.uuid4())
+
+    def test_purge_keeps_unfinished_jobs(self, hub_id, inline_jobs, settings):
+        """Test expired jobs are purged only once they have finished."""
+        settings.KNOWLEDGE_BASE_EXPORT_RETENTION_HOURS = 0
+        running = KBExportJob.objects.create(hub_id=hub_id, kind='kb_articles', export_format='csv', status=KBExportJob.STATUS_RUNNING)
+        KBExportJob.objects.create(hub_id=hub_id, kind='kb_articles', export_format='csv', status=KBExportJob.STATUS_DONE)
+        jobs.purge_expired_exports(hub_id)
+        assert list(KBExportJob.objects.filter(hub_id=hub_id).values_list('pk', flat=True)) == [running.pk]
+
+    def test_lost_jobs_time_out(self, auth_client, hub_id, inline_jobs):
+        """Test a job left pending past the timeout is failed, so polling stops and the purge can drop it."""
+        import datetime
+        from django.utils import timezone
+        lost = KBExportJob.objects.create(hub_id=hub_id, kind='kb_articles', export_format='csv')
+        fresh = KBExportJob.objects.create(hub_id=hub_id, kind='kb_articles', export_format='csv')
+        KBExportJob.objects.filter(pk=lost.pk).update(created_at=timezone.now() - datetime.timedelta(hours=2))
+        response = auth_client.get(reverse('knowledge_base:kb_export_job_status', args=[lost.pk]))
+        assert b'hx-get' not in response.content
+        lost.refresh_from_db()
+        fresh.refresh_from_db()
+        assert lost.status == KBExportJob.STATUS_FAILED and lost.finished_at
+        assert fresh.status == KBExportJob.STATUS_PENDING
+
+
+@pytest.mark.django_db
+class TestExportJobViews:
+    """Export job endpoint tests."""
+
+    def test_start_poll_and_download(self, auth_client, kb_article, inline_jobs, django_capture_on_commit_callbacks):
+        """Test starting a background export, polling it and downloading the file."""
+        url = reverse('knowledge_base:kb_articles_list')
+        with django_capture_on_commit_callbacks(execute=True):
+            response = auth_client.get(url, {'export': 'excel', 'background': '1'}, HTTP_HX_REQUEST='true')
+        assert response.status_code == 200
+        job = KBExportJob.objects.get()
+        assert job.kind == 'kb_articles'
+        assert job.export_format == 'excel'
+
+        status = auth_client.get(reverse('knowledge_base:kb_export_job_status', args=[job.pk]))
+        assert status.status_code == 200
+        assert b'Download' in status.content
+
+        download = auth_client.get(reverse('knowledge_base:kb_export_job_download', args=[job.pk]))
+        assert download.status_code == 200
+        assert download['Content-Disposition'].startswith('attachment')
+
+    def test_download_unfinished_job_404(self, auth_client, admin_user):
+        """Test unfinished jobs cannot be downloaded."""
+        job = KBExportJob.objects.create(hub_id=admin_user.hub_id, kind='kb_articles', export_format='csv')
+        response = auth_client.get(reverse('knowledge_base:kb_export_job_download', args=[job.pk]))
+        assert response.status_code == 404
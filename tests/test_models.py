@@ -74,4 +74,27 @@ class TestKBArticle:
         kb_article.save()
         assert KBArticle.objects.filter(hub_id=hub_id).count() == 0
 
+    def test_content_stats(self, kb_article):
+        """Test excerpt, length and word count are computed on save."""
+        assert kb_article.excerpt == 'Test description'
+        assert kb_article.content_length == len('Test description')
+        assert kb_article.word_count == 2
+
+    def test_excerpt_is_truncated(self, kb_article):
+        """Test long bodies get a short, tag-free excerpt."""
+        kb_article.content = '<p>' + 'word ' * 500 + '</p>'
+        kb_article.save()
+        assert len(kb_article.excerpt) <= 201
+        assert kb_article.excerpt.endswith('\u2026')
+        assert '<p>' not in kb_article.excerpt
+        assert kb_article.word_count == 500
+
+    def test_save_with_deferred_content(self, kb_article):
+        """Test saving a row loaded without its body keeps the stats."""
+        article = KBArticle.objects.defer('content').get(pk=kb_article.pk)
+        article.is_published = False
+        article.save(update_fields=['is_published', 'updated_at'])
+        article.refresh_from_db()
+        assert article.excerpt == 'Test description'
+
 
@@ -0,0 +1,112 @@
+"""Tests for knowledge_base keyset pagination."""
+import pytest
+from django.urls import reverse
+
+from knowledge_base.models import KBCategory, KBArticle
+from knowledge_base.pagination import keyset_page
+
+
+@pytest.fixture
+def many_articles(db, hub_id):
+    """Twenty-five articles, some sharing titles, some uncategorized."""
+    category = KBCategory.objects.create(hub_id=hub_id, name='General', slug='general')
+    return [
+        KBArticle.objects.create(
+            hub_id=hub_id,
+            title=f'Article {i // 2:02d}',
+            slug=f'article-{i}',
+            content='Body',
+            category=category if i % 3 else None,
+        )
+        for i in range(25)
+    ]
+
+
+def _walk(qs, field, descending, per_page=10):
+    """Collect all ids by following next cursors, then walk back with previous cursors."""
+    pages = [keyset_page(qs, field, descending, per_page=per_page)]
+    while pages[-1].has_next():
+        pages.append(keyset_page(qs, field, descending, pages[-1].next_cursor, per_page))
+    back = [pages[-1]]
+    while back[-1].has_previous():
+        back.append(keyset_page(qs, field, descending, back[-1].previous_cursor, per_page))
+    return pages, back
+
+
+@pytest.mark.django_db
+class TestKeysetPage:
+    """Keyset pagination tests."""
+
+    @pytest.mark.parametrize('field', ['title', 'category', 'category__name', 'created_at'])
+    @pytest.mark.parametrize('descending', [False, True])
+    def test_walk_matches_offset_order(self, hub_id, many_articles, field, descending):
+        """Test forward and backward walks visit every row exactly once, in order."""
+        qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False)
+        pages, back = _walk(qs, field, descending)
+        forward_ids = [a.pk for page in pages for a in page]
+        assert len(forward_ids) == 25
+        assert len(set(forward_ids)) == 25
+        assert [len(p) for p in pages] == [10, 10, 5]
+        assert [p.start_index() for p in pages] == [1, 11, 21]
+        assert [[a.pk for a in p] for p in back] == [[a.pk for a in p] for p in reversed(pages)]
+
+    def test_nulls_sort_last_ascending(self, hub_id, many_articles):
+        """Test uncategorized rows come after categorized ones, as in the column's index."""
+        qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False)
+        pages, _back = _walk(qs, 'category', False)
+        categories = [a.category_id for page in pages for a in page]
+        assert categories.index(None) == sum(1 for c in categories if c is not None)
+        pages, _back = _walk(qs, 'category', True)
+        assert [a.category_id for page in pages for a in page][0] is None
+
+    def test_category_sort_is_by_name_in_both_modes(self, hub_id, many_articles):
+        """Test the category column sorts by category name, identically for keyset and numbered pages."""
+        from knowledge_base.queries import kb_articles_queryset
+
+        other = KBCategory.objects.create(hub_id=hub_id, name='Accounting', slug='accounting')
+        KBArticle.objects.filter(pk=many_articles[1].pk).update(category=other)
+        qs, order_field, _sort = kb_articles_queryset(hub_id, sort_field='category')
+        assert order_field == 'category__name'
+        pages, _back = _walk(qs, order_field, False)
+        keyset_ids = [a.pk for page in pages for a in page]
+        assert keyset_ids == list(qs.values_list('pk', flat=True))
+        assert keyset_ids[0] == many_articles[1].pk
+
+    def test_stale_cursor_falls_back_to_first_page(self, hub_id, many_articles):
+        """Test a cursor for another sort is ignored."""
+        qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False)
+        first = keyset_page(qs, 'title')
+        other = keyset_page(qs, 'created_at', cursor=first.next_cursor)
+        assert other.offset == 0
+        assert not other.has_previous()
+
+    def test_tampered_cursor_is_ignored(self, hub_id, many_articles):
+        """Test an invalid token falls back to the first page."""
+        qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False)
+        page = keyset_page(qs, 'title', cursor='not-a-cursor')
+        assert page.offset == 0
+        assert len(page) == 10
+
+
+@pytest.mark.django_db
+class TestKeysetViews:
+    """Cursor paging through the list views."""
+
+    def test_articles_cursor(self, auth_client, admin_user):
+        """Test following the next cursor of the articles datatable."""
+        for i in range(15):
+            KBArticle.objects.create(hub_id=admin_user.hub_id, title=f'Article {i:02d}', slug=f'a-{i}', content='Body')
+        url = reverse('knowledge_base:kb_articles_list')
+        first = auth_client.get(url, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        cursor = first.context['page_obj'].next_cursor
+        assert cursor
+        second = auth_client.get(url, {'cursor': cursor}, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert second.status_code == 200
+        assert b'Article 14' in second.content
+        assert b'Article 00' not in second.content
+
+    def test_numbered_page_still_supported(self, auth_client):
+        """Test the ?page= OFFSET mode keeps working."""
+        url = reverse('knowledge_base:kb_categories_list')
+        response = auth_client.get(url, {'page': 2})
+        assert response.status_code == 200
@@ -0,0 +1,184 @@
+"""Query-count and latency budgets for every knowledge_base URL."""
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from knowledge_base import counters, jobs, revisions, urls
+from knowledge_base.models import KBArticle, KBExportJob
+from knowledge_base.pagination import keyset_ordering, keyset_page, row_cursor
+
+# Framework overhead (session, user, navigation) plus the view's own queries.
+# A per-row N+1 on a 100-row page blows far past these.
+DEFAULT_MAX_QUERIES = 30
+DEFAULT_MAX_SECONDS = 2.0
+
+# Single-object views: their own queries on top of the framework overhead
+# measured on the settings page, tight enough that an N+1 over ten rows fails.
+VIEW_QUERIES = {
+    'kb_category_add': 4,
+    'kb_category_edit': 6,
+    'kb_article_add': 4,
+    'kb_article_detail': 5,
+    'kb_article_by_slug': 5,
+    'kb_article_edit': 5,
+    'kb_article_revisions': 5,
+    'kb_article_revision_diff': 6,
+    'kb_import': 3,
+    'kb_export_job_status': 4,
+    'kb_export_job_download': 4,
+}
+
+
+@pytest.fixture(autouse=True)
+def inline_background_work(settings, tmp_path):
+    """
+    Run jobs, reader refreshes and view flushes inline, so nothing queries
+    outside the measured block or after the test transaction ends.
+    """
+    settings.KNOWLEDGE_BASE_JOB_RUNNER = 'inline'
+    settings.KNOWLEDGE_BASE_VIEW_FLUSH_SECONDS = 3600
+    settings.MEDIA_ROOT = str(tmp_path)
+    counters._take()
+    yield
+    counters._take()
+
+
+def _first_article(seed):
+    return [seed['articles'][0].pk]
+
+
+def _published_article(seed):
+    return [next(a.pk for a in seed['articles'] if a.is_published)]
+
+
+def _published_article_slug(seed):
+    return [next(a.slug for a in seed['articles'] if a.is_published)]
+
+
+def _article_revision(seed):
+    article = seed['articles'][0]
+    revisions.record(article)
+    return [article.pk, 1]
+
+
+def _first_category(seed):
+    return [seed['categories'][0].pk]
+
+
+def _export_job(seed):
+    article = seed['articles'][0]
+    job = KBExportJob.objects.create(hub_id=article.hub_id, kind='kb_articles', export_format='csv')
+    return [job.pk]
+
+
+def _finished_export_job(seed):
+    pk = _export_job(seed)[0]
+    jobs.run_export(pk)
+    return [pk]
+
+
+# url name -> (method, args factory, POST data factory)
+ROUTES = {
+    'dashboard': ('get', None, None),
+    'articles': ('get', None, None),
+    'categories': ('get', None, None),
+    'kb_categories_list': ('get', None, None),
+    'kb_category_add': ('get', None, None),
+    'kb_category_edit': ('get', _first_category, None),
+    'kb_category_delete': ('post', _first_category, None),
+    'kb_category_toggle_status': ('post', _first_category, None),
+    'kb_categories_bulk_action': ('post', None, lambda seed: {
+        'ids': ','.join(str(c.pk) for c in seed['categories'][:5]), 'action': 'deactivate',
+    }),
+    'kb_articles_list': ('get', None, None),
+    'kb_article_add': ('get', None, None),
+    'kb_article_detail': ('get', _published_article, None),
+    'kb_article_by_slug': ('get', _published_article_slug, None),
+    'kb_article_edit': ('get', _first_article, None),
+    'kb_article_delete': ('post', _first_article, None),
+    'kb_article_revisions': ('get', _first_article, None),
+    'kb_article_revision_diff': ('get', _article_revision, None),
+    'kb_articles_bulk_action': ('post', None, lambda seed: {
+        'ids': ','.join(str(a.pk) for a in seed['articles'][:50]), 'action': 'delete',
+    }),
+    'kb_import': ('get', None, None),
+    'kb_export_job_status': ('get', _export_job, None),
+    'kb_export_job_download': ('get', _finished_export_job, None),
+    'settings': ('get', None, None),
+}
+
+# Views whose query count must not depend on how many rows are rendered.
+LIST_ROUTES = ['kb_articles_list', 'kb_categories_list']
+
+
+def test_every_url_has_a_budget():
+    """Test new URLs cannot be added without a budget entry."""
+    names = {pattern.name for pattern in urls.urlpatterns}
+    assert names == set(ROUTES)
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+    """Every URL stays within budget against a seeded hub."""
+
+    @pytest.mark.parametrize('name', sorted(ROUTES))
+    @pytest.mark.parametrize('htmx', [False, True])
+    def test_within_budget(self, auth_client, large_hub, query_budget, name, htmx):
+        """Test the view's query count and latency."""
+        method, args, data = ROUTES[name]
+        url = reverse(f'knowledge_base:{name}', args=args(large_hub) if args else None)
+        headers = {'HTTP_HX_REQUEST': 'true'} if htmx else {}
+        max_queries = DEFAULT_MAX_QUERIES
+        if name in VIEW_QUERIES:
+            with CaptureQueriesContext(connection) as overhead:
+                auth_client.get(reverse('knowledge_base:settings'), **headers)
+            max_queries = len(overhead.captured_queries) + VIEW_QUERIES[name]
+        with query_budget(max_queries, DEFAULT_MAX_SECONDS):
+            if method == 'post':
+                response = auth_client.post(url, data(large_hub) if data else {}, **headers)
+            else:
+                response = auth_client.get(url, {'per_page': 100}, **headers)
+        assert response.status_code < 400
+
+    @pytest.mark.parametrize('name', LIST_ROUTES)
+    def test_list_queries_do_not_scale_with_rows(self, auth_client, large_hub, name):
+        """Test a 100-row page runs no more queries than a 10-row page."""
+        url = reverse(f'knowledge_base:{name}')
+        counts = []
+        for per_page in (10, 100):
+            with CaptureQueriesContext(connection) as captured:
+                auth_client.get(url, {'per_page': per_page}, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+            counts.append(len(captured.captured_queries))
+        assert counts[1] <= counts[0]
+
+    def test_export_does_not_query_per_row(self, auth_client, large_hub, query_budget):
+        """Test exporting articles fetches categories in the same query."""
+        url = reverse('knowledge_base:kb_articles_list')
+        with query_budget(DEFAULT_MAX_QUERIES):
+            response = auth_client.get(url, {'export': 'csv'})
+            if response.streaming:
+                b''.join(response.streaming_content)
+        assert response.status_code == 200
+
+    def test_deep_cursor_page_is_one_query(self, large_hub, query_budget):
+        """Test a cursor deep into the hub fetches its page with a single query."""
+        hub_id = large_hub['articles'][0].hub_id
+        qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False)
+        ordered = qs.order_by(*keyset_ordering(qs, 'view_count', True))
+        cursor = row_cursor(qs, 'view_count', True, ordered[129], 130)
+        with query_budget(1, DEFAULT_MAX_SECONDS):
+            page = keyset_page(qs, 'view_count', True, cursor, per_page=10)
+        assert [a.pk for a in page] == [a.pk for a in ordered[130:140]]
+
+
+@pytest.mark.django_db
+def test_benchmark_times_deep_pages():
+    """Test the benchmark command runs end to end and reports the deep page timings."""
+    out = io.StringIO()
+    call_command('kb_benchmark', articles=60, categories=3, per_page=5, deep_page=4, repeat=1, stdout=out)
+    assert 'page 4 (cursor)' in out.getvalue()
+    assert 'articles.view_count desc' in out.getvalue()
@@ -0,0 +1,56 @@
+"""Tests for the cached published-article reader."""
+import pytest
+from django.urls import reverse
+
+from knowledge_base import caching
+from knowledge_base.models import KBArticle
+
+
+@pytest.mark.django_db
+class TestReaderCache:
+    """Stale-while-revalidate rendering of published articles."""
+
+    @pytest.fixture(autouse=True)
+    def _inline_jobs(self, settings):
+        settings.KNOWLEDGE_BASE_JOB_RUNNER = 'inline'
+
+    def _read(self, auth_client, article):
+        return auth_client.get(reverse('knowledge_base:kb_article_detail', args=[article.pk]))
+
+    def test_fresh_rendering_is_reused(self, auth_client, kb_article):
+        """Test an unchanged hub serves the cached HTML without rendering again."""
+        assert b'Test description' in self._read(auth_client, kb_article).content
+        KBArticle.objects.filter(pk=kb_article.pk).update(content='Changed behind the cache')
+        assert b'Test description' in self._read(auth_client, kb_article).content
+
+    def test_stale_rendering_is_served_then_refreshed(self, auth_client, kb_article):
+        """Test other hub writes serve the old HTML once while it is re-rendered."""
+        self._read(auth_client, kb_article)
+        KBArticle.objects.filter(pk=kb_article.pk).update(content='Rewritten body')
+        caching.bump_hub_version(kb_article.hub_id)
+        assert b'Test description' in self._read(auth_client, kb_article).content
+        assert b'Rewritten body' in self._read(auth_client, kb_article).content
+
+    def test_edit_invalidates(self, auth_client, kb_article, django_capture_on_commit_callbacks):
+        """Test an edit is visible on the very next read."""
+        self._read(auth_client, kb_article)
+        url = reverse('knowledge_base:kb_article_edit', args=[kb_article.pk])
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.post(url, {'title': 'Test Title', 'slug': 'test-slug', 'content': 'Edited body', 'is_published': 'on'})
+        assert b'Edited body' in self._read(auth_client, kb_article).content
+
+    def test_unpublish_invalidates(self, auth_client, kb_article, django_capture_on_commit_callbacks):
+        """Test an unpublished article stops being served at once."""
+        self._read(auth_client, kb_article)
+        url = reverse('knowledge_base:kb_articles_bulk_action')
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.post(url, {'ids': str(kb_article.pk), 'action': 'unpublish'})
+        assert self._read(auth_client, kb_article).status_code == 404
+
+    def test_htmx_gets_fragment(self, auth_client, kb_article):
+        """Test HTMX requests receive the cached fragment itself."""
+        self._read(auth_client, kb_article)
+        url = reverse('knowledge_base:kb_article_detail', args=[kb_article.pk])
+        response = auth_client.get(url, HTTP_HX_REQUEST='true')
+        assert response.status_code == 200
+        assert b'Test description' in response.content
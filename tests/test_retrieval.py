@@ -0,0 +1,161 @@
+"""Tests for the assistant's offline passage retrieval."""
+import uuid
+
+import pytest
+
+from knowledge_base import retrieval, search
+from knowledge_base.models import KBArticle, KBPassage
+
+FILLER = ' '.join(f'filler{n}' for n in range(150))
+
+
+def _article(hub_id, title, content):
+    article = KBArticle.objects.create(hub_id=hub_id, title=title, slug=title.lower().replace(' ', '-'), content=content)
+    search.index_article(article)
+    return article
+
+
+class TestPassages:
+    """Passage splitting and hashed vectors."""
+
+    def test_passages_are_bounded(self):
+        """Test no passage exceeds the word limit and every word is covered."""
+        text = ' '.join(f'w{n}' for n in range(300))
+        spans = retrieval.split_passages(text, max_words=120)
+        assert [len(text[s:e].split()) for s, e in spans] == [120, 120, 60]
+
+    def test_paragraph_breaks_close_passages(self):
+        """Test a paragraph break ends a passage once it is long enough."""
+        first = ' '.join(['alpha'] * 50)
+        text = f'{first}\n\nbeta gamma'
+        spans = retrieval.split_passages(text, max_words=120, min_words=40)
+        assert [text[s:e] for s, e in spans] == [first, 'beta gamma']
+
+    def test_vector_roundtrip(self):
+        """Test packed vectors unpack to the same unit vector."""
+        vector = retrieval.vectorize({'printer': 3, 'network': 1})
+        indices, weights = retrieval.unpack(retrieval.pack(vector))
+        assert dict(zip(indices, weights)) == pytest.approx(vector)
+        assert sum(w * w for w in weights) == pytest.approx(1.0)
+
+
+@pytest.mark.django_db
+class TestRetrievalSearch:
+    """Searching the per-hub passage matrix."""
+
+    @pytest.fixture(autouse=True)
+    def _numpy(self):
+        pytest.importorskip('numpy')
+        retrieval.clear_matrices()
+        yield
+        retrieval.clear_matrices()
+
+    def test_finds_passage_inside_body(self, hub_id):
+        """Test the passage with the answer is returned, not just the article."""
+        body = f'{FILLER}\n\nTo reset the office printer hold the power button for ten seconds.\n\n{FILLER}'
+        _article(hub_id, 'Office equipment', body)
+        _article(hub_id, 'Holidays', 'Vacation requests go through the manager.')
+        hits = retrieval.search_passages(hub_id, 'how do I reset the printer')
+        assert hits[0]['article'].title == 'Office equipment'
+        assert 'hold the power button' in hits[0]['text']
+
+    def test_matrix_updates_incrementally(self, hub_id, django_capture_on_commit_callbacks):
+        """Test a committed edit replaces the article's rows without reloading the matrix."""
+        article = _article(hub_id, 'Wifi', 'Connect to the guest network.')
+        retrieval.search(hub_id, 'network')
+        loaded = retrieval.hub_matrix(hub_id)
+        with django_capture_on_commit_callbacks(execute=True):
+            article.content = 'Use the VPN client for remote access.'
+            article.save()
+            search.index_article(article)
+        updated = retrieval.hub_matrix(hub_id)
+        assert updated is not loaded
+        assert updated.generation == loaded.generation + 1
+        assert len(updated.article_ids) == 1
+        assert retrieval.search(hub_id, 'vpn remote access')[0][0] == article.pk
+        assert retrieval.search(hub_id, 'guest') == []
+
+    def test_deleted_articles_are_dropped(self, hub_id, django_capture_on_commit_callbacks):
+        """Test removing an article from the index removes its passages."""
+        article = _article(hub_id, 'Wifi', 'Connect to the guest network.')
+        with django_capture_on_commit_callbacks(execute=True):
+            search.remove_articles([article.pk])
+        assert not KBPassage.objects.filter(article=article).exists()
+        assert retrieval.search(hub_id, 'guest network') == []
+
+    def test_matrix_is_sparse(self, hub_id):
+        """Test a loaded passage costs its non-zero entries, not a dense row."""
+        _article(hub_id, 'Wifi', 'Connect to the guest network.')
+        entry = retrieval.hub_matrix(hub_id)
+        assert len(entry.indices) == len(entry.data) < entry.width
+        assert entry.nbytes < entry.width * 4
+
+    def test_cache_is_bounded_by_memory(self, hub_id, settings):
+        """Test matrices are evicted least recently used once they exceed the byte budget."""
+        other_hub = uuid.uuid4()
+        _article(hub_id, 'Wifi', 'Connect to the guest network.')
+        _article(other_hub, 'Wifi', 'Connect to the guest network.')
+        settings.KNOWLEDGE_BASE_RETRIEVAL_CACHE_BYTES = retrieval.hub_matrix(hub_id).nbytes + 1
+        retrieval.hub_matrix(other_hub)
+        assert list(retrieval._matrices) == [other_hub]
+        settings.KNOWLEDGE_BASE_RETRIEVAL_CACHE_BYTES = 1
+        assert retrieval.search(hub_id, 'guest network')
+        assert hub_id not in retrieval._matrices
+
+    def test_unchanged_articles_are_not_reembedded(self, hub_id):
+        """Test reindexing an unchanged article keeps its passage rows."""
+        article = _article(hub_id, 'Wifi', 'Connect to the guest network.')
+        ids = list(KBPassage.objects.filter(article=article).values_list('pk', flat=True))
+        article.view_count = 10
+        article.save()
+        search.index_article(article)
+        assert list(KBPassage.objects.filter(article=article).values_list('pk', flat=True)) == ids
+
+
+@pytest.mark.django_db
+class TestSearchWithoutNumpy:
+    """Passage search falling back to the full-text index."""
+
+    def test_falls_back_to_fulltext_ranking(self, hub_id, monkeypatch):
+        """Test the best passage of each full-text hit is returned when NumPy is missing."""
+        monkeypatch.setattr(retrieval, 'has_numpy', lambda: False)
+        body = f'{FILLER}\n\nTo reset the office printer hold the power button for ten seconds.\n\n{FILLER}'
+        _article(hub_id, 'Office equipment', body)
+        _article(hub_id, 'Holidays', 'Vacation requests go through the manager.')
+        hits = retrieval.search_passages(hub_id, 'reset printer')
+        assert [hit['article'].title for hit in hits] == ['Office equipment']
+        assert 'hold the power button' in hits[0]['text']
+
+
+@pytest.mark.django_db
+class TestArticleSnippets:
+    """Query-focused passages of a single article."""
+
+    def test_best_passage_first_with_matches(self, hub_id):
+        """Test the matching passage comes first and its match offsets point at the query words."""
+        body = f'{FILLER}\n\nTo reset the office printer hold the power button.\n\n{FILLER}'
+        article = _article(hub_id, 'Office equipment', body)
+        snippet = retrieval.article_snippets(article, 'printer reset', limit=1)[0]
+        text = retrieval.plain_text(article.content)
+        assert 'hold the power button' in snippet['text']
+        assert sorted(text[start:end] for start, end in snippet['matches']) == ['printer', 'reset']
+        marked = retrieval.mark(snippet['text'], snippet['matches'], snippet['start'])
+        assert '**reset**' in marked and '**printer**' in marked
+
+    def test_without_query_returns_leading_passages(self, hub_id):
+        """Test an empty query returns the article's opening passages in order."""
+        article = _article(hub_id, 'Long read', f'{FILLER} {FILLER}')
+        snippets = retrieval.article_snippets(article, '', limit=2)
+        assert [s['position'] for s in snippets] == [0, 1]
+        assert snippets[0]['start'] == 0
+
+    def test_split_is_reused_until_content_changes(self, hub_id):
+        """Test reading reuses stored passages and re-segments only stale ones."""
+        article = _article(hub_id, 'Wifi', 'Connect to the guest network.')
+        ids = list(KBPassage.objects.filter(article=article).values_list('pk', flat=True))
+        retrieval.article_snippets(article, 'guest')
+        assert list(KBPassage.objects.filter(article=article).values_list('pk', flat=True)) == ids
+        article.content = 'Use the VPN client for remote access.'
+        article.save()
+        assert 'VPN' in retrieval.article_snippets(article, 'vpn')[0]['text']
+        assert not KBPassage.objects.filter(pk__in=ids).exists()
@@ -0,0 +1,117 @@
+"""Tests for the delta-compressed article revision history."""
+import pytest
+from django.urls import reverse
+
+from knowledge_base import revisions
+from knowledge_base.models import KBArticleRevision
+
+
+def _save(article, content, title=None):
+    article.content = content
+    if title is not None:
+        article.title = title
+    article.save()
+    return revisions.record(article)
+
+
+@pytest.mark.django_db
+class TestRevisionStorage:
+    """Snapshots, deltas and reconstruction."""
+
+    def test_every_revision_is_reconstructed(self, kb_article, settings):
+        """Test each stored revision rebuilds exactly the saved content."""
+        settings.KNOWLEDGE_BASE_REVISION_SNAPSHOT_EVERY = 4
+        versions = ['Intro\n' + ''.join(f'line {n}\n' for n in range(i)) + 'Outro' for i in range(12)]
+        for i, content in enumerate(versions):
+            _save(kb_article, content, title=f'Title {i}')
+        for number, content in enumerate(versions, start=1):
+            assert revisions.reconstruct(kb_article.pk, number) == (f'Title {number - 1}', content)
+
+    def test_snapshot_cadence(self, kb_article, settings):
+        """Test only the first and every N-th revision store full content."""
+        settings.KNOWLEDGE_BASE_REVISION_SNAPSHOT_EVERY = 3
+        body = ''.join(f'paragraph {n} with enough text to be worth a delta\n' for n in range(50))
+        for i in range(7):
+            _save(kb_article, body + f'edit {i}\n')
+        snapshots = list(
+            KBArticleRevision.objects.filter(article=kb_article, is_snapshot=True)
+            .order_by('number').values_list('number', flat=True)
+        )
+        assert snapshots == [1, 3, 6]
+
+    def test_delta_is_smaller_than_content(self, kb_article):
+        """Test a small edit of a long body stores far less than the body."""
+        body = ''.join(f'paragraph {n} of a long article body\n' for n in range(500))
+        _save(kb_article, body)
+        revision = _save(kb_article, body + 'one more line\n')
+        assert not revision.is_snapshot
+        assert len(bytes(revision.data)) < len(body) // 20
+
+    def test_unchanged_save_is_skipped(self, kb_article):
+        """Test saving identical content does not add a revision."""
+        _save(kb_article, 'Same body')
+        assert revisions.record(kb_article) is None
+        assert kb_article.revisions.count() == 1
+
+
+    def test_unchanged_save_on_snapshot_number_is_skipped(self, kb_article, settings):
+        """Test a no-op save is not stored even when the next number would be a snapshot."""
+        settings.KNOWLEDGE_BASE_REVISION_SNAPSHOT_EVERY = 2
+        assert _save(kb_article, 'Same body') is not None
+        assert _save(kb_article, 'Same body') is None
+        assert kb_article.revisions.count() == 1
+
+
+@pytest.mark.django_db
+class TestRevisionRetention:
+    """Compaction of old revisions."""
+
+    def test_limit_is_enforced(self, kb_article, settings):
+        """Test only the newest revisions are kept and stay readable."""
+        settings.KNOWLEDGE_BASE_REVISION_SNAPSHOT_EVERY = 5
+        settings.KNOWLEDGE_BASE_REVISION_LIMIT = 4
+        for i in range(9):
+            _save(kb_article, f'Body\nversion {i}\n')
+        numbers = list(kb_article.revisions.order_by('number').values_list('number', flat=True))
+        assert numbers == [6, 7, 8, 9]
+        assert kb_article.revisions.get(number=6).is_snapshot
+        assert revisions.reconstruct(kb_article.pk, 6)[1] == 'Body\nversion 5\n'
+        assert revisions.reconstruct(kb_article.pk, 9)[1] == 'Body\nversion 8\n'
+
+
+@pytest.mark.django_db
+class TestRevisionViews:
+    """History page and diff partial."""
+
+    def test_edit_records_revision(self, auth_client, kb_article):
+        """Test saving the edit form adds a revision."""
+        url = reverse('knowledge_base:kb_article_edit', args=[kb_article.pk])
+        auth_client.post(url, {'title': 'Edited', 'slug': 'edited', 'content': 'New body', 'is_published': 'on'})
+        assert revisions.reconstruct(kb_article.pk, 1) == ('Edited', 'New body')
+
+    def test_history_lists_revisions(self, auth_client, kb_article):
+        """Test the history page lists the article's revisions."""
+        _save(kb_article, 'First', title='First title')
+        _save(kb_article, 'Second', title='Second title')
+        response = auth_client.get(reverse('knowledge_base:kb_article_revisions', args=[kb_article.pk]))
+        assert response.status_code == 200
+        assert b'First title' in response.content
+        assert b'Second title' in response.content
+
+    def test_diff_shows_changed_lines(self, auth_client, kb_article):
+        """Test the diff partial shows removed and added lines."""
+        _save(kb_article, 'kept\nold line\n')
+        _save(kb_article, 'kept\nnew line\n')
+        url = reverse('knowledge_base:kb_article_revision_diff', args=[kb_article.pk, 2])
+        response = auth_client.get(url, HTTP_HX_REQUEST='true')
+        assert response.status_code == 200
+        assert b'-old line' in response.content
+        assert b'+new line' in response.content
+
+    def test_diff_of_other_hub_is_404(self, auth_client, kb_article):
+        """Test revisions of another hub's article are not reachable."""
+        _save(kb_article, 'Body')
+        kb_article.hub_id = None
+        kb_article.save(update_fields=['hub_id'])
+        url = reverse('knowledge_base:kb_article_revision_diff', args=[kb_article.pk, 1])
+        assert auth_client.get(url).status_code == 404
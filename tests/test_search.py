@@ -0,0 +1,118 @@
+"""Tests for the knowledge_base full-text search index."""
+import uuid
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from knowledge_base import search
+from knowledge_base.queries import kb_articles_queryset
+from knowledge_base.models import KBArticle, KBSearchPosting
+
+
+def _article(hub_id, title, content, **kwargs):
+    article = KBArticle.objects.create(hub_id=hub_id, title=title, slug=title.lower().replace(' ', '-'), content=content, **kwargs)
+    search.index_article(article)
+    return article
+
+
+class TestTokenize:
+    """Tokenizer and stemmer tests."""
+
+    def test_stems_plurals_and_suffixes(self):
+        """Test inflected forms share a stem."""
+        assert search.tokenize('files') == search.tokenize('file')
+        assert search.tokenize('updating') == search.tokenize('updated') == search.tokenize('update')
+
+    def test_folds_case_and_accents(self):
+        """Test case and accent folding."""
+        assert search.tokenize('Configuración') == search.tokenize('configuracion')
+
+    def test_drops_stopwords(self):
+        """Test stopwords are not indexed."""
+        assert search.tokenize('the and of') == []
+
+    def test_last_word_is_prefix(self):
+        """Test a partially typed last word is searched as a prefix."""
+        assert search.query_terms('reset pass') == [('reset', False), ('pass', True)]
+        assert search.query_terms('reset pass ') == [('reset', False), ('pass', False)]
+
+
+@pytest.mark.django_db
+class TestSearchIndex:
+    """Index maintenance and ranking tests."""
+
+    def test_finds_term_in_body(self, hub_id):
+        """Test matching a word that only appears in the body."""
+        article = _article(hub_id, 'Getting started', 'How to configure printers for invoices')
+        assert [pk for pk, _ in search.search(hub_id, 'printer ')] == [article.pk]
+
+    def test_title_match_ranks_first(self, hub_id):
+        """Test a title match outranks a body mention."""
+        body = _article(hub_id, 'Daily routine', 'Remember to close the register')
+        title = _article(hub_id, 'Register closing', 'Steps for the end of day')
+        ranked = [pk for pk, _ in search.search(hub_id, 'register ')]
+        assert ranked == [title.pk, body.pk]
+
+    def test_requires_all_terms(self, hub_id):
+        """Test every query term must match."""
+        _article(hub_id, 'Refunds', 'Process a refund at the till')
+        both = _article(hub_id, 'Card refunds', 'Refund a card payment')
+        assert [pk for pk, _ in search.search(hub_id, 'refund card ')] == [both.pk]
+
+    def test_scoped_by_hub(self, hub_id):
+        """Test other hubs' articles are never returned."""
+        _article(uuid.uuid4(), 'Inventory', 'Stock counts')
+        assert search.search(hub_id, 'inventory') == []
+
+    def test_remove_articles(self, hub_id):
+        """Test removed articles disappear from the index."""
+        article = _article(hub_id, 'Inventory', 'Stock counts')
+        search.remove_articles([article.pk])
+        assert search.search(hub_id, 'inventory') == []
+        assert not KBSearchPosting.objects.filter(article=article).exists()
+
+    def test_relevance_sort_keeps_every_match(self, hub_id, monkeypatch):
+        """Test the datatable ranks all matches in the database, without a hit cap or an id list."""
+        monkeypatch.setattr(search, 'MAX_RESULTS', 1)
+        body = _article(hub_id, 'Daily routine', 'Remember to close the register')
+        title = _article(hub_id, 'Register closing', 'Steps for the end of day')
+        _article(hub_id, 'Unrelated', 'Stock counts')
+        qs = kb_articles_queryset(hub_id, 'register ', 'relevance')[0]
+        with CaptureQueriesContext(connection) as ctx:
+            ranked = [a.pk for a in qs]
+        assert ranked == [title.pk, body.pk]
+        assert body.pk.hex not in ctx.captured_queries[-1]['sql'].replace('-', '')
+
+    def test_rebuild_index(self, hub_id):
+        """Test rebuilding the index from articles."""
+        article = KBArticle.objects.create(hub_id=hub_id, title='Loyalty cards', slug='loyalty', content='Points')
+        assert search.rebuild_index(hub_id=hub_id) == 1
+        assert [pk for pk, _ in search.search(hub_id, 'loyalty')] == [article.pk]
+
+
+@pytest.mark.django_db
+class TestSearchViews:
+    """Search index upkeep through the views."""
+
+    def test_list_search_body(self, auth_client, admin_user):
+        """Test the list view finds articles by body text."""
+        _article(admin_user.hub_id, 'Getting started', 'How to configure printers')
+        url = reverse('knowledge_base:kb_articles_list')
+        response = auth_client.get(url, {'q': 'printers', 'sort': 'relevance'})
+        assert response.status_code == 200
+        assert b'Getting started' in response.content
+
+    def test_add_indexes(self, auth_client, admin_user):
+        """Test added articles become searchable."""
+        url = reverse('knowledge_base:kb_article_add')
+        auth_client.post(url, {'title': 'Gift vouchers', 'slug': 'gift-vouchers', 'content': 'Redeem'})
+        assert len(search.search(admin_user.hub_id, 'voucher')) == 1
+
+    def test_delete_unindexes(self, auth_client, admin_user):
+        """Test deleted articles leave the index."""
+        article = _article(admin_user.hub_id, 'Gift vouchers', 'Redeem')
+        url = reverse('knowledge_base:kb_article_delete', args=[article.pk])
+        auth_client.post(url)
+        assert search.search(admin_user.hub_id, 'voucher') == []
@@ -0,0 +1,87 @@
+"""Tests for the materialized knowledge base statistics."""
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from knowledge_base import counters, stats
+from knowledge_base.models import KBArticle, KBCategory, KBHubStats
+
+
+@pytest.mark.django_db
+class TestHubStats:
+    """Incremental maintenance of ``KBHubStats``."""
+
+    def test_missing_row_is_rebuilt(self, hub_id, kb_article):
+        """Test the first read builds the row from the source tables."""
+        hub_stats = stats.get_stats(hub_id)
+        assert hub_stats.total_articles == 1
+        assert hub_stats.published_articles == 1
+        assert hub_stats.total_views == 5
+        assert KBHubStats.objects.filter(pk=hub_id).exists()
+
+    def test_apply_adds_the_difference(self, hub_id, kb_article):
+        """Test ``apply`` turns before/after contributions into deltas."""
+        stats.get_stats(hub_id)
+        before = stats.article_contribution(kb_article)
+        kb_article.is_published = False
+        stats.apply(hub_id, before=before, after=stats.article_contribution(kb_article), touched=True)
+        hub_stats = stats.get_stats(hub_id)
+        assert hub_stats.total_articles == 1
+        assert hub_stats.published_articles == 0
+        assert hub_stats.draft_articles == 1
+        assert hub_stats.last_article_update is not None
+
+    def test_rebuild_command_repairs_drift(self, hub_id, kb_article):
+        """Test the management command recomputes drifted figures."""
+        stats.get_stats(hub_id)
+        KBHubStats.objects.filter(pk=hub_id).update(total_articles=42)
+        call_command('rebuild_kb_stats', hub_id=str(hub_id))
+        assert stats.get_stats(hub_id).total_articles == 1
+
+    def test_flushed_views_are_counted(self, hub_id, kb_article):
+        """Test buffered views reach the hub total on flush."""
+        stats.get_stats(hub_id)
+        counters.apply_deltas({(hub_id, kb_article.pk): 3})
+        assert stats.get_stats(hub_id).total_views == 8
+
+
+@pytest.mark.django_db
+class TestStatsWritePaths:
+    """Write views keep the stats row in step with the tables."""
+
+    def test_views_match_rebuild(self, auth_client, admin_user):
+        """Test a series of writes leaves the same figures as a full rebuild."""
+        hub_id = admin_user.hub_id
+        auth_client.get(reverse('knowledge_base:dashboard'))
+        auth_client.post(reverse('knowledge_base:kb_category_add'), {'name': 'Guides', 'is_active': 'on'})
+        auth_client.post(reverse('knowledge_base:kb_category_add'), {'name': 'Drafts'})
+        for i in range(3):
+            auth_client.post(reverse('knowledge_base:kb_article_add'), {
+                'title': f'Article {i}', 'content': 'Body', 'view_count': 2, 'is_published': 'on' if i else '',
+            })
+        category = KBCategory.objects.get(hub_id=hub_id, name='Guides')
+        auth_client.post(reverse('knowledge_base:kb_category_toggle_status', args=[category.pk]))
+        article = KBArticle.objects.get(hub_id=hub_id, title='Article 1')
+        auth_client.post(reverse('knowledge_base:kb_article_delete', args=[article.pk]))
+        ids = ','.join(str(c.pk) for c in KBCategory.objects.filter(hub_id=hub_id))
+        auth_client.post(reverse('knowledge_base:kb_categories_bulk_action'), {'ids': ids, 'action': 'activate'})
+
+        incremental = stats.get_stats(hub_id)
+        rebuilt = stats.rebuild(hub_id)
+        for field in ('total_categories', 'active_categories', 'total_articles',
+                      'published_articles', 'uncategorized_articles', 'total_views'):
+            assert getattr(incremental, field) == getattr(rebuilt, field), field
+        assert rebuilt.total_articles == 2
+        assert rebuilt.active_categories == 2
+
+    def test_dashboard_does_not_scan_articles(self, auth_client, admin_user, kb_article):
+        """Test a warm dashboard reads its figures from the stats row only."""
+        url = reverse('knowledge_base:dashboard')
+        auth_client.get(url)
+        with CaptureQueriesContext(connection) as captured:
+            response = auth_client.get(url)
+        tables = ' '.join(q['sql'] for q in captured.captured_queries)
+        assert 'knowledge_base_kbarticle"' not in tables
+        assert response.context['stats'].total_articles == response.context['total_kb_articles']
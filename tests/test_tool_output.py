@@ -0,0 +1,64 @@
+"""Tests for the size-bounded assistant list responses."""
+import pytest
+
+from knowledge_base import tool_output
+from knowledge_base.models import KBArticle
+
+
+def _serialize(article):
+    return {'id': str(article.id), 'title': article.title}
+
+
+@pytest.mark.django_db
+class TestListResponse:
+    """Paging, field selection and the byte budget."""
+
+    @pytest.fixture
+    def articles(self, hub_id):
+        return [
+            KBArticle.objects.create(hub_id=hub_id, title=f'Article {n:02d}', slug=f'article-{n:02d}', content='x')
+            for n in range(12)
+        ]
+
+    def _qs(self, hub_id):
+        return KBArticle.objects.filter(hub_id=hub_id, is_deleted=False)
+
+    def test_cursor_walks_every_row(self, hub_id, articles):
+        """Test following next_cursor returns every row exactly once."""
+        seen, args = [], {'limit': 5}
+        while True:
+            response = tool_output.list_response(self._qs(hub_id), 'title', _serialize, 'articles', args)
+            seen += [item['title'] for item in response['articles']]
+            if not response['next_cursor']:
+                break
+            args = {'limit': 5, 'cursor': response['next_cursor']}
+        assert seen == sorted(a.title for a in articles)
+
+    def test_budget_truncates_and_resumes(self, hub_id, articles):
+        """Test a small budget cuts the page and the cursor resumes after the last returned row."""
+        budget = 400
+        first = tool_output.list_response(self._qs(hub_id), 'title', _serialize, 'articles', {'limit': 12}, budget=budget)
+        assert first['truncated'] and 0 < len(first['articles']) < 12
+        rest = tool_output.list_response(
+            self._qs(hub_id), 'title', _serialize, 'articles',
+            {'limit': 12, 'cursor': first['next_cursor']}, budget=10 ** 6,
+        )
+        titles = [item['title'] for item in first['articles'] + rest['articles']]
+        assert titles == sorted(a.title for a in articles)
+
+    def test_hub_scoping(self, hub_id, articles):
+        """Test rows of other hubs never appear."""
+        import uuid
+        KBArticle.objects.create(hub_id=uuid.uuid4(), title='Article 00 elsewhere', slug='elsewhere', content='x')
+        response = tool_output.list_response(self._qs(hub_id), 'title', _serialize, 'articles', {'limit': 100})
+        assert len(response['articles']) == 12
+
+    def test_requested_fields(self):
+        """Test requested fields keep id and drop unknown names."""
+        fields = tool_output.requested_fields({'fields': ['title', 'secret', 'id']}, {'title': None}, ['title'])
+        assert fields == ['id', 'title']
+
+    def test_clip(self):
+        """Test long text is clipped to the configured length."""
+        assert len(tool_output.clip('a' * 500)) == tool_output.MAX_TEXT_LENGTH
+        assert tool_output.clip(None) == ''
@@ -0,0 +1,155 @@
+"""Tests for nested categories stored as materialized paths."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from knowledge_base import bulk, tree
+from knowledge_base.models import KBArticle, KBCategory
+
+
+def _category(hub_id, name, parent=None):
+    return KBCategory.objects.create(hub_id=hub_id, name=name, slug=name.lower(), parent=parent)
+
+
+def _article(hub_id, title, category, **kwargs):
+    return KBArticle.objects.create(hub_id=hub_id, title=title, slug=title.lower(), content='Body', category=category, **kwargs)
+
+
+@pytest.fixture
+def sections(db, hub_id):
+    """guide > setup > network, plus an unrelated root."""
+    guide = _category(hub_id, 'Guide')
+    setup = _category(hub_id, 'Setup', guide)
+    network = _category(hub_id, 'Network', setup)
+    other = _category(hub_id, 'Other')
+    return {'guide': guide, 'setup': setup, 'network': network, 'other': other}
+
+
+@pytest.mark.django_db
+class TestCategoryPaths:
+    """Paths, subtrees and breadcrumbs."""
+
+    def test_paths_and_depth(self, sections):
+        """Test a child's path extends its parent's."""
+        guide, setup, network = sections['guide'], sections['setup'], sections['network']
+        assert guide.depth == 0 and setup.depth == 1 and network.depth == 2
+        assert network.path == guide.path + setup.pk.hex + '/' + network.pk.hex + '/'
+        assert tree.ancestor_ids(network.path) == [guide.pk, setup.pk]
+
+    def test_subtree_articles_in_one_query(self, hub_id, sections):
+        """Test articles of every level below a category come back from one query."""
+        _article(hub_id, 'Top', sections['guide'], is_published=True, view_count=3)
+        _article(hub_id, 'Deep', sections['network'], view_count=4)
+        _article(hub_id, 'Elsewhere', sections['other'])
+        with CaptureQueriesContext(connection) as ctx:
+            titles = sorted(tree.subtree_articles(sections['guide']).values_list('title', flat=True))
+        assert titles == ['Deep', 'Top']
+        assert len(ctx.captured_queries) == 1
+        assert tree.subtree_counts(sections['guide']) == {'total': 2, 'published': 1, 'views': 7}
+        assert tree.subtree_counts(sections['setup'])['total'] == 1
+
+    def test_subtree_skips_deleted_categories(self, auth_client, hub_id, sections):
+        """Test articles left in a deleted category no longer count towards its ancestors."""
+        _article(hub_id, 'Kept', sections['network'])
+        _article(hub_id, 'Orphaned', sections['setup'])
+        auth_client.post(reverse('knowledge_base:kb_category_delete', args=[sections['setup'].pk]))
+        titles = list(tree.subtree_articles(sections['guide']).values_list('title', flat=True))
+        assert titles == ['Kept']
+        assert tree.subtree_counts(sections['guide'])['total'] == 1
+
+    def test_edit_view_shows_subtree_counts(self, auth_client, hub_id, sections):
+        """Test the edit form reports the articles of the whole subtree."""
+        _article(hub_id, 'Deep', sections['network'], is_published=True, view_count=4)
+        response = auth_client.get(reverse('knowledge_base:kb_category_edit', args=[sections['guide'].pk]))
+        assert response.context['subtree_counts'] == {'total': 1, 'published': 1, 'views': 4}
+
+    def test_breadcrumbs(self, sections):
+        """Test breadcrumbs list the ancestors root first."""
+        assert [c.name for c in tree.breadcrumbs(sections['network'])] == ['Guide', 'Setup', 'Network']
+
+    def test_choices_are_in_tree_order(self, hub_id, sections):
+        """Test select choices list children under their parent and skip the excluded subtree."""
+        labels = [label for _category, label in tree.choices(hub_id)]
+        assert labels == ['Guide', '— Setup', '— — Network', 'Other']
+        excluded = [label for _category, label in tree.choices(hub_id, exclude=sections['setup'])]
+        assert excluded == ['Guide', 'Other']
+
+
+@pytest.mark.django_db
+class TestCategoryMoves:
+    """Re-parenting and deleting categories."""
+
+    def test_move_repaths_subtree(self, sections):
+        """Test moving a category rewrites its whole subtree."""
+        moved = tree.move(sections['setup'], sections['other'])
+        assert moved == 2
+        network = KBCategory.objects.get(pk=sections['network'].pk)
+        assert network.path.startswith(sections['other'].path)
+        assert network.depth == 2
+        assert KBCategory.objects.get(pk=sections['setup'].pk).parent_id == sections['other'].pk
+
+    def test_move_to_root(self, sections):
+        """Test moving a category to the top level."""
+        tree.move(sections['setup'], None)
+        network = KBCategory.objects.get(pk=sections['network'].pk)
+        assert network.depth == 1
+        assert network.path == sections['setup'].pk.hex + '/' + network.pk.hex + '/'
+
+    def test_cannot_move_under_itself(self, sections):
+        """Test a category cannot become its own descendant."""
+        with pytest.raises(tree.TreeError):
+            tree.move(sections['guide'], sections['network'])
+
+    def test_depth_limit(self, hub_id):
+        """Test nesting beyond the maximum depth is refused."""
+        parent = None
+        for level in range(tree.MAX_DEPTH + 1):
+            parent = _category(hub_id, f'Level {level}', parent)
+        with pytest.raises(tree.TreeError):
+            tree.check_depth(parent)
+
+    def test_delete_lifts_children(self, auth_client, sections):
+        """Test deleting a category moves its children up a level."""
+        auth_client.post(reverse('knowledge_base:kb_category_delete', args=[sections['setup'].pk]))
+        network = KBCategory.objects.get(pk=sections['network'].pk)
+        assert network.parent_id == sections['guide'].pk
+        assert network.depth == 1
+        assert network.path == sections['guide'].path + network.pk.hex + '/'
+
+    def test_bulk_delete_lifts_children(self, hub_id, sections):
+        """Test bulk deletes re-path the children of every deleted category."""
+        qs = bulk.target_queryset(KBCategory, hub_id, [sections['guide'].pk, sections['setup'].pk])
+        bulk.category_action(hub_id, 'delete', qs)
+        network = KBCategory.objects.get(pk=sections['network'].pk)
+        assert network.parent_id is None
+        assert network.path == network.pk.hex + '/'
+
+    def test_edit_view_moves_category(self, auth_client, sections):
+        """Test choosing another parent in the edit form moves the subtree."""
+        setup = sections['setup']
+        url = reverse('knowledge_base:kb_category_edit', args=[setup.pk])
+        auth_client.post(url, {'name': 'Setup', 'slug': 'setup', 'order': 0, 'is_active': 'on', 'parent': str(sections['other'].pk)})
+        assert KBCategory.objects.get(pk=sections['network'].pk).path.startswith(sections['other'].path)
+
+    def test_edit_view_rejects_cycle(self, auth_client, sections):
+        """Test the edit form reports a move under the category itself."""
+        guide = sections['guide']
+        url = reverse('knowledge_base:kb_category_edit', args=[guide.pk])
+        response = auth_client.post(url, {'name': 'Guide', 'slug': 'guide', 'parent': str(sections['network'].pk)})
+        assert response.status_code == 200
+        assert KBCategory.objects.get(pk=guide.pk).parent_id is None
+
+
+@pytest.mark.django_db
+class TestSubtreeArticleList:
+    """Article datatable limited to a category subtree."""
+
+    def test_list_filters_by_subtree(self, auth_client, hub_id, sections):
+        """Test ``?category=`` lists the articles of the whole subtree."""
+        _article(hub_id, 'Deep', sections['network'])
+        _article(hub_id, 'Elsewhere', sections['other'])
+        response = auth_client.get(reverse('knowledge_base:kb_articles_list'), {'category': str(sections['guide'].pk)})
+        assert response.status_code == 200
+        assert b'Deep' in response.content
+        assert b'Elsewhere' not in response.content
@@ -103,7 +103,8 @@ class TestKBCategoryViews:
             'is_active': '',
         }
         response = auth_client.post(url, data)
-        assert response.status_code == 200
+        assert response.status_code == 302
+        assert response['Location'] == reverse('knowledge_base:kb_categories_list')
 
     def test_delete(self, auth_client, kb_category):
         """Test soft delete via POST."""
@@ -122,6 +123,24 @@ class TestKBCategoryViews:
         kb_category.refresh_from_db()
         assert kb_category.is_active != original
 
+    def test_toggle_returns_only_the_row(self, auth_client, kb_category):
+        """Test toggling swaps the single row instead of the whole list."""
+        url = reverse('knowledge_base:kb_category_toggle_status', args=[kb_category.pk])
+        response = auth_client.post(url, HTTP_HX_REQUEST='true')
+        html = response.content.decode()
+        assert f'id="kb_category-row-{kb_category.pk}"' in html
+        assert 'datatable-footer' not in html
+
+    def test_delete_removes_row_out_of_band(self, auth_client, kb_category):
+        """Test deleting answers with the updated total only."""
+        url = reverse('knowledge_base:kb_category_delete', args=[kb_category.pk])
+        response = auth_client.post(url, HTTP_HX_REQUEST='true')
+        html = response.content.decode()
+        assert 'id="kb_categories-total"' in html
+        assert 'hx-swap-oob="true"' in html
+        assert '<tr' not in html
+        assert response.context['total'] == 0
+
     def test_bulk_delete(self, auth_client, kb_category):
         """Test bulk delete."""
         url = reverse('knowledge_base:kb_categories_bulk_action')
@@ -165,6 +184,16 @@ class TestKBArticleViews:
         response = auth_client.get(url, {'sort': 'created_at', 'dir': 'desc'})
         assert response.status_code == 200
 
+    def test_list_renders_excerpt_only(self, auth_client, kb_article):
+        """Test the datatable shows the excerpt instead of the full body."""
+        kb_article.content = 'Intro. ' + 'tail ' * 400 + 'UNIQUE-ENDING'
+        kb_article.save()
+        url = reverse('knowledge_base:kb_articles_list')
+        response = auth_client.get(url, {'sort': 'content'})
+        assert response.status_code == 200
+        assert b'Intro.' in response.content
+        assert b'UNIQUE-ENDING' not in response.content
+
     def test_export_csv(self, auth_client):
         """Test CSV export."""
         url = reverse('knowledge_base:kb_articles_list')
@@ -172,6 +201,17 @@ class TestKBArticleViews:
         assert response.status_code == 200
         assert 'text/csv' in response['Content-Type']
 
+    def test_export_csv_streams_rows(self, auth_client, kb_category, kb_article):
+        """Test the CSV export is streamed and includes category names."""
+        kb_article.category = kb_category
+        kb_article.save()
+        url = reverse('knowledge_base:kb_articles_list')
+        response = auth_client.get(url, {'export': 'csv'})
+        assert response.streaming
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines[0] == 'Title,KBCategory,Is Published,View Count,Slug,Content'
+        assert lines[1].startswith('Test Title,Test Name,True,5,')
+
     def test_export_excel(self, auth_client):
         """Test Excel export."""
         url = reverse('knowledge_base:kb_articles_list')
@@ -203,7 +243,7 @@ class TestKBArticleViews:
         assert response.status_code == 200
 
     def test_edit_post(self, auth_client, kb_article):
-        """Test editing via POST."""
+        """Test a plain (non-htmx) edit POST redirects back to the list."""
         url = reverse('knowledge_base:kb_article_edit', args=[kb_article.pk])
         data = {
             'title': 'Updated Title',
@@ -212,7 +252,8 @@ class TestKBArticleViews:
             'is_published': '',
         }
         response = auth_client.post(url, data)
-        assert response.status_code == 200
+        assert response.status_code == 302
+        assert response['Location'] == reverse('knowledge_base:kb_articles_list')
 
     def test_delete(self, auth_client, kb_article):
         """Test soft delete via POST."""
@@ -222,6 +263,36 @@ class TestKBArticleViews:
         kb_article.refresh_from_db()
         assert kb_article.is_deleted is True
 
+    def test_edit_from_row_returns_row(self, auth_client, kb_article):
+        """Test saving from the datatable panel re-renders only that row."""
+        url = reverse('knowledge_base:kb_article_edit', args=[kb_article.pk])
+        data = {'title': 'Renamed', 'slug': 'renamed', 'content': 'Body', 'is_published': 'on'}
+        response = auth_client.post(
+            url, data, HTTP_HX_REQUEST='true', HTTP_HX_TARGET=f'kb_article-row-{kb_article.pk}',
+        )
+        html = response.content.decode()
+        assert f'id="kb_article-row-{kb_article.pk}"' in html
+        assert 'Renamed' in html
+        assert 'datatable-footer' not in html
+
+    def test_edit_from_page_redirects_to_list(self, auth_client, kb_article):
+        """Test the full-page edit form returns to the list."""
+        url = reverse('knowledge_base:kb_article_edit', args=[kb_article.pk])
+        data = {'title': 'Renamed', 'slug': 'renamed', 'content': 'Body'}
+        response = auth_client.post(url, data, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='main-content-area')
+        assert response['HX-Redirect'] == reverse('knowledge_base:kb_articles_list')
+
+    def test_delete_keeps_search_total(self, auth_client, kb_article, hub_id):
+        """Test the out-of-band total follows the list's current search."""
+        from knowledge_base import search
+        from knowledge_base.models import KBArticle
+
+        other = KBArticle.objects.create(hub_id=hub_id, title='Unrelated', slug='unrelated', content='Nothing')
+        search.index_articles([kb_article, other])
+        url = reverse('knowledge_base:kb_article_delete', args=[kb_article.pk])
+        response = auth_client.post(url, {'q': 'test'}, HTTP_HX_REQUEST='true')
+        assert response.context['total'] == 0
+
     def test_bulk_delete(self, auth_client, kb_article):
         """Test bulk delete."""
         url = reverse('knowledge_base:kb_articles_bulk_action')
@@ -0,0 +1,66 @@
+"""
+Size-bounded list responses for the assistant tools.
+
+Tool results are pasted into the model's context, so list tools page with
+keyset cursors, return only the requested fields, clip long text and stop
+adding rows once the serialized response reaches
+``KNOWLEDGE_BASE_AI_RESPONSE_MAX_BYTES``. A truncated response carries the
+cursor to continue from, so nothing is silently lost.
+"""
+import json
+
+from django.conf import settings
+
+from .pagination import keyset_page, row_cursor
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# Long text fields are clipped to this many characters
+MAX_TEXT_LENGTH = 200
+
+
+def response_budget():
+    """Upper bound, in bytes of JSON, of a list tool response (about 4 bytes per token)."""
+    return getattr(settings, 'KNOWLEDGE_BASE_AI_RESPONSE_MAX_BYTES', 16000)
+
+
+def clip(text, max_length=MAX_TEXT_LENGTH):
+    text = text or ''
+    return text if len(text) <= max_length else text[:max_length - 1] + '…'
+
+
+def requested_fields(args, available, default):
+    """The ``fields`` argument restricted to ``available``, or ``default``; ``id`` is always included."""
+    fields = [field for field in args.get('fields') or default if field in available]
+    return ['id'] + [field for field in fields if field != 'id']
+
+
+def _size(value):
+    return len(json.dumps(value, default=str, ensure_ascii=False).encode())
+
+
+def list_response(queryset, order_field, serialize, key, args, budget=None):
+    """
+    Serialize one keyset page of ``queryset`` (ordered by ``order_field``)
+    within the byte budget. ``args`` supplies ``cursor`` and ``limit``.
+    """
+    limit = max(1, min(int(args.get('limit') or DEFAULT_LIMIT), MAX_LIMIT))
+    budget = response_budget() if budget is None else budget
+    page = keyset_page(queryset, order_field, False, args.get('cursor'), limit)
+
+    items = []
+    used = _size({key: [], 'next_cursor': 'x' * 200, 'truncated': True})
+    for row in page:
+        item = serialize(row)
+        size = _size(item) + 1
+        if items and used + size > budget:
+            break
+        items.append(item)
+        used += size
+
+    truncated = len(items) < len(page)
+    if truncated:
+        next_cursor = row_cursor(queryset, order_field, False, page[len(items) - 1], page.offset + len(items))
+    else:
+        next_cursor = page.next_cursor
+    return {key: items, 'next_cursor': next_cursor, 'truncated': truncated}
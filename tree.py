@@ -0,0 +1,161 @@
+"""
+Nested knowledge base categories stored as materialized paths.
+
+``KBCategory.path`` holds the hex ids of the category's ancestors and of the
+category itself, each followed by ``/``; ``depth`` is the number of
+ancestors. A whole subtree is therefore a single prefix match on the indexed
+``(hub_id, path)`` column, ancestors are read straight out of the path, and
+moving a category rewrites the paths of its entire subtree with one UPDATE.
+"""
+import uuid
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum, Value
+from django.db.models.functions import Concat, Substr
+from django.utils.translation import gettext as _
+
+# One path segment: 32 hex characters and the separator
+SEGMENT_LENGTH = 33
+PATH_MAX_LENGTH = 512
+MAX_DEPTH = PATH_MAX_LENGTH // SEGMENT_LENGTH - 1
+
+
+class TreeError(ValueError):
+    """Raised for a move that would break the category tree."""
+
+
+def check_depth(parent, height=0):
+    """Raise ``TreeError`` unless a subtree ``height`` levels tall fits under ``parent``."""
+    depth = 0 if parent is None else parent.depth + 1
+    if depth + height > MAX_DEPTH:
+        raise TreeError(_('Categories cannot be nested more than %(levels)d levels deep.') % {'levels': MAX_DEPTH + 1})
+
+
+def path_for(category, parent=None):
+    return (parent.path if parent is not None else '') + category.pk.hex + '/'
+
+
+def as_root(category):
+    """Give an unsaved category its root path, for rows created with ``bulk_create``."""
+    category.path, category.depth = path_for(category), 0
+    return category
+
+
+def ancestor_ids(path):
+    """Ids of the ancestors encoded in ``path``, root first."""
+    return [uuid.UUID(segment) for segment in path.split('/')[:-2]]
+
+
+def breadcrumbs(category):
+    """The category's ancestors, root first, followed by the category itself."""
+    from .models import KBCategory
+
+    ids = ancestor_ids(category.path)
+    if not ids:
+        return [category]
+    ancestors = KBCategory.objects.filter(hub_id=category.hub_id, pk__in=ids).order_by('depth')
+    return list(ancestors) + [category]
+
+
+def subtree_articles(category):
+    """
+    Live articles filed anywhere under ``category``. Deleting a category
+    lifts its children (see ``detach``) but leaves its own articles and path
+    in place, so articles of deleted categories are left out explicitly.
+    """
+    from .models import KBArticle
+
+    return KBArticle.objects.filter(
+        hub_id=category.hub_id, is_deleted=False,
+        category__path__startswith=category.path, category__is_deleted=False,
+    )
+
+
+def subtree_counts(category):
+    """``{'total', 'published', 'views'}`` of the articles under ``category``."""
+    counts = subtree_articles(category).aggregate(
+        total=Count('id'), published=Count('id', filter=Q(is_published=True)), views=Sum('view_count'),
+    )
+    counts['views'] = counts['views'] or 0
+    return counts
+
+
+def choices(hub_id, exclude=None):
+    """
+    ``[(category, label)]`` of the hub's live categories in tree order (by name
+    within each level), leaving out the subtree of ``exclude``. Labels are
+    indented with one dash per level, for select boxes.
+    """
+    from .models import KBCategory
+
+    qs = KBCategory.objects.filter(hub_id=hub_id, is_deleted=False).only('id', 'name', 'path', 'depth')
+    if exclude is not None:
+        qs = qs.exclude(path__startswith=exclude.path)
+    categories = list(qs)
+    names = {category.pk: category.name.lower() for category in categories}
+
+    def sort_key(category):
+        return [names.get(pk, '') for pk in ancestor_ids(category.path)] + [category.name.lower()]
+
+    return [(category, '\u2014 ' * category.depth + category.name) for category in sorted(categories, key=sort_key)]
+
+
+def _repath(hub_id, old_prefix, new_prefix, depth_delta, exclude_pk=None):
+    """Rewrite the ``old_prefix`` of every path in a subtree to ``new_prefix``."""
+    from .models import KBCategory
+
+    rows = KBCategory.objects.filter(hub_id=hub_id, path__startswith=old_prefix)
+    if exclude_pk is not None:
+        rows = rows.exclude(pk=exclude_pk)
+    return rows.update(
+        path=Concat(Value(new_prefix), Substr('path', len(old_prefix) + 1)),
+        depth=F('depth') + depth_delta,
+    )
+
+
+def move(category, parent):
+    """
+    Re-parent ``category`` (``parent=None`` makes it a root) and re-path its
+    subtree in bulk. Returns the number of re-pathed categories.
+    """
+    from .models import KBCategory
+
+    if parent is not None and parent.path.startswith(category.path):
+        raise TreeError(_('A category cannot be moved under itself.'))
+    old_path = category.path
+    new_path = path_for(category, parent)
+    if new_path == old_path:
+        category.parent = parent
+        return 0
+    depth_delta = new_path.count('/') - old_path.count('/')
+    deepest = KBCategory.objects.filter(
+        hub_id=category.hub_id, path__startswith=old_path,
+    ).aggregate(deepest=Max('depth'))['deepest']
+    check_depth(parent, (deepest or category.depth) - category.depth)
+    with transaction.atomic():
+        moved = _repath(category.hub_id, old_path, new_path, depth_delta)
+        KBCategory.objects.filter(pk=category.pk).update(parent=parent)
+    category.parent = parent
+    category.path = new_path
+    category.depth += depth_delta
+    return moved
+
+
+def detach(category):
+    """Lift the children of a deleted category to its parent, re-pathing their subtrees."""
+    from .models import KBCategory
+
+    with transaction.atomic():
+        KBCategory.objects.filter(parent_id=category.pk).update(parent_id=category.parent_id)
+        parent_path = category.path[:-SEGMENT_LENGTH]
+        return _repath(category.hub_id, category.path, parent_path, -1, exclude_pk=category.pk)
+
+
+def detach_many(hub_id, ids):
+    """``detach`` every category in ``ids`` that still has children."""
+    from .models import KBCategory
+
+    parents = set(KBCategory.objects.filter(hub_id=hub_id, parent_id__in=ids).values_list('parent_id', flat=True))
+    for parent_id in parents:
+        # Paths change as ancestors are detached, so read each one fresh
+        detach(KBCategory.objects.only('id', 'hub_id', 'parent_id', 'path').get(pk=parent_id))
@@ -23,10 +23,21 @@ urlpatterns = [
     # KBArticle
     path('kb_articles/', views.kb_articles_list, name='kb_articles_list'),
     path('kb_articles/add/', views.kb_article_add, name='kb_article_add'),
+    path('kb_articles/<uuid:pk>/', views.kb_article_detail, name='kb_article_detail'),
+    path('kb_articles/by-slug/<slug:slug>/', views.kb_article_by_slug, name='kb_article_by_slug'),
     path('kb_articles/<uuid:pk>/edit/', views.kb_article_edit, name='kb_article_edit'),
     path('kb_articles/<uuid:pk>/delete/', views.kb_article_delete, name='kb_article_delete'),
+    path('kb_articles/<uuid:pk>/revisions/', views.kb_article_revisions, name='kb_article_revisions'),
+    path('kb_articles/<uuid:pk>/revisions/<int:number>/', views.kb_article_revision_diff, name='kb_article_revision_diff'),
     path('kb_articles/bulk/', views.kb_articles_bulk_action, name='kb_articles_bulk_action'),
 
+    # Bulk import
+    path('import/', views.kb_import, name='kb_import'),
+
+    # Background exports
+    path('exports/<uuid:pk>/', views.kb_export_job_status, name='kb_export_job_status'),
+    path('exports/<uuid:pk>/download/', views.kb_export_job_download, name='kb_export_job_download'),
+
     # Settings
     path('settings/', views.settings_view, name='settings'),
 ]
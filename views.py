@@ -1,23 +1,153 @@
 """
 Knowledge Base & Wiki Module Views
 """
+import uuid
+
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
-from django.http import HttpResponse
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse
 from django.urls import reverse
-from django.shortcuts import get_object_or_404, render as django_render
+from django.shortcuts import get_object_or_404, redirect, render as django_render
+from django.template.loader import render_to_string
 from django.utils import timezone
-from django.utils.translation import gettext_lazy as _
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language, gettext_lazy as _
 from django.views.decorators.http import require_POST
 
 from apps.accounts.decorators import login_required, permission_required
 from apps.core.htmx import htmx_view
-from apps.core.services import export_to_csv, export_to_excel
 from apps.modules_runtime.navigation import with_module_nav
 
-from .models import KBCategory, KBArticle
+from . import bulk, caching, counters, exports, imports, jobs, reader, revisions, search, slugs, stats, tree
+from .conditional import conditional_hub_view
+from .models import KBCategory, KBArticle, KBArticleRevision, KBExportJob
+from .pagination import keyset_page
+from .queries import kb_articles_queryset, kb_categories_queryset, subtree_category, with_article_counts
 
 PER_PAGE_CHOICES = [10, 25, 50, 100]
+DASHBOARD_TOP_CATEGORIES = 5
+
+
+def _paginate(request, qs, order_field, sort_dir, per_page, total):
+    """
+    Keyset-paginate ``qs`` on ``order_field`` (plus ``id``).
+
+    Falls back to numbered OFFSET pages when an explicit ``page`` is requested
+    or the ordering is not a column (``order_field`` is None). ``total`` is the
+    ``(count, exact)`` pair from ``caching.cached_count`` so the paginator never
+    runs its own COUNT.
+    """
+    count, exact = total
+    if order_field is None or 'page' in request.GET:
+        paginator = Paginator(qs, per_page)
+        paginator.count = count
+        page_obj = paginator.get_page(request.GET.get('page', 1))
+        page_obj.page_range = paginator.get_elided_page_range(page_obj.number)
+    else:
+        page_obj = keyset_page(qs, order_field, sort_dir == 'desc', request.GET.get('cursor'), per_page)
+        page_obj.count = count
+    page_obj.count_approximate = not exact
+    return page_obj
+
+
+def _list_total(qs, hub_id, kind, search_query, *key_parts):
+    return caching.cached_count(
+        qs, hub_id, kind, search_query, *key_parts,
+        approximate=bool(search_query) and caching.approximate_counts_enabled(),
+    )
+
+
+def _category_filter(data, hub_id):
+    """The category whose subtree the article datatable is limited to, if any."""
+    category_id = data.get('category', '').strip()
+    return subtree_category(hub_id, category_id) if category_id else None
+
+
+def _fragment_key(request, hub_id, kind, *params):
+    """Fragment cache key of a datatable body: hub version plus every parameter that shapes it."""
+    return caching.hub_key(
+        hub_id, 'fragment', kind, get_language(),
+        request.GET.get('cursor', ''), request.GET.get('page', ''), *params,
+    )
+
+
+def _cached_list_response(request, fragment_key, template, build_context):
+    """
+    Serve a datatable body from the fragment cache, rendering and storing it
+    on a miss. ``build_context`` only runs on a miss, so a hit costs no list
+    queries.
+
+    Returns an ``HttpResponse`` for HTMX datatable requests, otherwise the
+    page context with the body pre-rendered as ``list_html``.
+    """
+    is_partial = request.htmx and request.htmx.target == 'datatable-body'
+    html = caching.get_fragment(fragment_key)
+    if html is not None:
+        if is_partial:
+            return HttpResponse(html)
+        return {'list_html': mark_safe(html)}
+    context = build_context()
+    if is_partial:
+        response = django_render(request, template, context)
+        caching.set_fragment(fragment_key, response.content.decode())
+        return response
+    html = render_to_string(template, context, request)
+    caching.set_fragment(fragment_key, html)
+    return dict(context, list_html=mark_safe(html))
+
+
+def _reader_response(request, html):
+    """The cached reader fragment as the HTMX response, or pre-rendered into the full page."""
+    if request.htmx:
+        return HttpResponse(html)
+    return {'detail_html': mark_safe(html)}
+
+
+def _bulk_ids(request):
+    """Selected ids of a bulk action, or None when it targets every row matching the search."""
+    if request.POST.get('scope') == 'all':
+        return None
+    return [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
+
+
+def _row_response(request, row_kind, obj):
+    """Render just the datatable row of ``obj`` (swapped over the old row)."""
+    if row_kind == 'kb_category':
+        obj = with_article_counts(KBCategory.objects.filter(pk=obj.pk).select_related('parent')).get()
+    return django_render(request, f'knowledge_base/partials/{row_kind}_row.html', {'item': obj})
+
+
+def _row_removed_response(request, hub_id, kind):
+    """
+    Empty body (the row's ``outerHTML`` swap removes it) plus an out-of-band
+    update of the datatable total for the list's current search.
+    """
+    search_query = request.POST.get('q', '').strip()
+    category = _category_filter(request.POST, hub_id) if kind == 'kb_articles' else None
+    if category is not None:
+        qs = kb_articles_queryset(hub_id, search_query, category=category)[0]
+        total, exact = _list_total(qs, hub_id, kind, search_query, category.pk)
+    elif search_query:
+        build_queryset = kb_articles_queryset if kind == 'kb_articles' else kb_categories_queryset
+        total, exact = _list_total(build_queryset(hub_id, search_query)[0], hub_id, kind, search_query)
+    else:
+        hub_stats = stats.get_stats(hub_id)
+        total = hub_stats.total_articles if kind == 'kb_articles' else hub_stats.total_categories
+        exact = True
+    return django_render(request, 'knowledge_base/partials/datatable_total.html', {
+        'total_id': f'{kind}-total', 'total': total, 'approximate': not exact, 'oob': True,
+    })
+
+
+def _edit_saved_response(request, row_kind, obj, list_url_name):
+    """Row partial for datatable edits; the full-page edit form (htmx or plain POST) goes back to the list."""
+    if not request.htmx:
+        return redirect(list_url_name)
+    if request.htmx.target != f'{row_kind}-row-{obj.pk}':
+        response = HttpResponse(status=204)
+        response['HX-Redirect'] = reverse(list_url_name)
+        return response
+    return _row_response(request, row_kind, obj)
 
 
 # ======================================================================
@@ -25,13 +155,20 @@ PER_PAGE_CHOICES = [10, 25, 50, 100]
 # ======================================================================
 
 @login_required
+@conditional_hub_view
 @with_module_nav('knowledge_base', 'dashboard')
 @htmx_view('knowledge_base/pages/index.html', 'knowledge_base/partials/dashboard_content.html')
 def dashboard(request):
     hub_id = request.session.get('hub_id')
+    hub_stats = stats.get_stats(hub_id)
+    top_categories = with_article_counts(
+        KBCategory.objects.filter(hub_id=hub_id, is_deleted=False).only('id', 'name'),
+    ).order_by('-article_count', 'name')[:DASHBOARD_TOP_CATEGORIES]
     return {
-        'total_kb_categories': KBCategory.objects.filter(hub_id=hub_id, is_deleted=False).count(),
-        'total_kb_articles': KBArticle.objects.filter(hub_id=hub_id, is_deleted=False).count(),
+        'stats': hub_stats,
+        'total_kb_categories': hub_stats.total_categories,
+        'total_kb_articles': hub_stats.total_articles,
+        'top_categories': top_categories,
     }
 
 
@@ -39,34 +176,24 @@ def dashboard(request):
 # KBCategory
 # ======================================================================
 
-KB_CATEGORY_SORT_FIELDS = {
-    'name': 'name',
-    'is_active': 'is_active',
-    'order': 'order',
-    'slug': 'slug',
-    'description': 'description',
-    'created_at': 'created_at',
-}
-
-def _build_kb_categories_context(hub_id, per_page=10):
-    qs = KBCategory.objects.filter(hub_id=hub_id, is_deleted=False).order_by('name')
-    paginator = Paginator(qs, per_page)
-    page_obj = paginator.get_page(1)
-    return {
-        'kb_categories': page_obj,
-        'page_obj': page_obj,
-        'search_query': '',
-        'sort_field': 'name',
-        'sort_dir': 'asc',
-        'current_view': 'table',
-        'per_page': per_page,
-    }
-
-def _render_kb_categories_list(request, hub_id, per_page=10):
-    ctx = _build_kb_categories_context(hub_id, per_page)
-    return django_render(request, 'knowledge_base/partials/kb_categories_list.html', ctx)
+def _render_kb_categories_list(request, hub_id, bulk_affected=None):
+    """First page of the datatable for the search/sort posted along with a bulk action."""
+    search_query = request.POST.get('q', '').strip()
+    sort_dir = request.POST.get('dir', 'asc')
+    per_page = int(request.POST.get('per_page', 10) or 10)
+    if per_page not in PER_PAGE_CHOICES:
+        per_page = 10
+    qs, order_field, sort_field = kb_categories_queryset(hub_id, search_query, request.POST.get('sort', 'name'), sort_dir)
+    page_obj = _paginate(request, qs, order_field, sort_dir, per_page, _list_total(qs, hub_id, 'kb_categories', search_query))
+    return django_render(request, 'knowledge_base/partials/kb_categories_list.html', {
+        'kb_categories': page_obj, 'page_obj': page_obj,
+        'search_query': search_query, 'sort_field': sort_field, 'sort_dir': sort_dir,
+        'current_view': request.POST.get('view', 'table'), 'per_page': per_page,
+        'bulk_affected': bulk_affected,
+    })
 
 @login_required
+@conditional_hub_view
 @with_module_nav('knowledge_base', 'articles')
 @htmx_view('knowledge_base/pages/kb_categories.html', 'knowledge_base/partials/kb_categories_content.html')
 def kb_categories_list(request):
@@ -74,46 +201,48 @@ def kb_categories_list(request):
     search_query = request.GET.get('q', '').strip()
     sort_field = request.GET.get('sort', 'name')
     sort_dir = request.GET.get('dir', 'asc')
-    page_number = request.GET.get('page', 1)
     current_view = request.GET.get('view', 'table')
     per_page = int(request.GET.get('per_page', 10))
     if per_page not in PER_PAGE_CHOICES:
         per_page = 10
 
-    qs = KBCategory.objects.filter(hub_id=hub_id, is_deleted=False)
-
-    if search_query:
-        qs = qs.filter(Q(name__icontains=search_query) | Q(slug__icontains=search_query) | Q(description__icontains=search_query))
-
-    order_by = KB_CATEGORY_SORT_FIELDS.get(sort_field, 'name')
-    if sort_dir == 'desc':
-        order_by = f'-{order_by}'
-    qs = qs.order_by(order_by)
-
     export_format = request.GET.get('export')
     if export_format in ('csv', 'excel'):
-        fields = ['name', 'is_active', 'order', 'slug', 'description']
-        headers = ['Name', 'Is Active', 'Order', 'Slug', 'Description']
+        qs, _order_field, sort_field = kb_categories_queryset(hub_id, search_query, sort_field, sort_dir)
+        if request.GET.get('background'):
+            return _start_export_job(request, hub_id, 'kb_categories', export_format, search_query, sort_field, sort_dir)
         if export_format == 'csv':
-            return export_to_csv(qs, fields=fields, headers=headers, filename='kb_categories.csv')
-        return export_to_excel(qs, fields=fields, headers=headers, filename='kb_categories.xlsx')
-
-    paginator = Paginator(qs, per_page)
-    page_obj = paginator.get_page(page_number)
+            return exports.csv_response(qs, exports.KB_CATEGORY_EXPORT_FIELDS, 'kb_categories.csv')
+        return exports.excel_response(qs, exports.KB_CATEGORY_EXPORT_FIELDS, 'kb_categories.xlsx')
 
-    if request.htmx and request.htmx.target == 'datatable-body':
-        return django_render(request, 'knowledge_base/partials/kb_categories_list.html', {
-            'kb_categories': page_obj, 'page_obj': page_obj,
-            'search_query': search_query, 'sort_field': sort_field,
-            'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
-        })
-
-    return {
-        'kb_categories': page_obj, 'page_obj': page_obj,
+    params = {
         'search_query': search_query, 'sort_field': sort_field,
         'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
     }
 
+    def build_context():
+        qs, order_field, effective_sort = kb_categories_queryset(hub_id, search_query, sort_field, sort_dir)
+        page_obj = _paginate(request, qs, order_field, sort_dir, per_page, _list_total(qs, hub_id, 'kb_categories', search_query))
+        return dict(params, kb_categories=page_obj, page_obj=page_obj, sort_field=effective_sort)
+
+    views_version = caching.views_version(hub_id) if sort_field == 'view_sum' else ''
+    fragment_key = _fragment_key(request, hub_id, 'kb_categories', *params.values(), views_version)
+    result = _cached_list_response(request, fragment_key, 'knowledge_base/partials/kb_categories_list.html', build_context)
+    if isinstance(result, HttpResponse):
+        return result
+    return dict(params, **result)
+
+def _posted_parent(request, hub_id):
+    """The live category named by the POSTed ``parent`` field, or None for a root."""
+    parent_id = request.POST.get('parent', '').strip()
+    if not parent_id:
+        return None
+    try:
+        uuid.UUID(parent_id)
+    except ValueError:
+        raise Http404
+    return get_object_or_404(KBCategory, pk=parent_id, hub_id=hub_id, is_deleted=False)
+
 @login_required
 @htmx_view('knowledge_base/pages/kb_category_add.html', 'knowledge_base/partials/kb_category_add_content.html')
 def kb_category_add(request):
@@ -124,17 +253,23 @@ def kb_category_add(request):
         description = request.POST.get('description', '').strip()
         order = int(request.POST.get('order', 0) or 0)
         is_active = request.POST.get('is_active') == 'on'
-        obj = KBCategory(hub_id=hub_id)
+        parent = _posted_parent(request, hub_id)
+        try:
+            tree.check_depth(parent)
+        except tree.TreeError as exc:
+            return {'error': str(exc), 'parent_choices': tree.choices(hub_id)}
+        obj = KBCategory(hub_id=hub_id, parent=parent)
         obj.name = name
-        obj.slug = slug
         obj.description = description
         obj.order = order
         obj.is_active = is_active
-        obj.save()
+        slugs.save_unique(obj, slugs.base_slug(slug or name, 100))
+        stats.apply(hub_id, after=stats.category_contribution(obj))
+        caching.bump_hub_version(hub_id)
         response = HttpResponse(status=204)
         response['HX-Redirect'] = reverse('knowledge_base:categories')
         return response
-    return {}
+    return {'parent_choices': tree.choices(hub_id)}
 
 @login_required
 @htmx_view('knowledge_base/pages/kb_category_edit.html', 'knowledge_base/partials/kb_category_edit_content.html')
@@ -142,14 +277,25 @@ def kb_category_edit(request, pk):
     hub_id = request.session.get('hub_id')
     obj = get_object_or_404(KBCategory, pk=pk, hub_id=hub_id, is_deleted=False)
     if request.method == 'POST':
+        before = stats.category_contribution(obj)
         obj.name = request.POST.get('name', '').strip()
-        obj.slug = request.POST.get('slug', '').strip()
+        slug = request.POST.get('slug', '').strip()
         obj.description = request.POST.get('description', '').strip()
         obj.order = int(request.POST.get('order', 0) or 0)
         obj.is_active = request.POST.get('is_active') == 'on'
-        obj.save()
-        return _render_kb_categories_list(request, hub_id)
-    return {'obj': obj}
+        with transaction.atomic():
+            if 'parent' in request.POST:
+                parent = _posted_parent(request, hub_id)
+                if parent != obj.parent:
+                    try:
+                        tree.move(obj, parent)
+                    except tree.TreeError as exc:
+                        return {'obj': obj, 'error': str(exc), 'parent_choices': tree.choices(hub_id, exclude=obj)}
+            slugs.save_unique(obj, slugs.base_slug(slug or obj.name, 100))
+        stats.apply(hub_id, before=before, after=stats.category_contribution(obj))
+        caching.bump_hub_version(hub_id)
+        return _edit_saved_response(request, 'kb_category', obj, 'knowledge_base:kb_categories_list')
+    return {'obj': obj, 'parent_choices': tree.choices(hub_id, exclude=obj), 'subtree_counts': tree.subtree_counts(obj)}
 
 @login_required
 @require_POST
@@ -158,8 +304,12 @@ def kb_category_delete(request, pk):
     obj = get_object_or_404(KBCategory, pk=pk, hub_id=hub_id, is_deleted=False)
     obj.is_deleted = True
     obj.deleted_at = timezone.now()
-    obj.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
-    return _render_kb_categories_list(request, hub_id)
+    with transaction.atomic():
+        obj.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+        tree.detach(obj)
+    stats.apply(hub_id, before=stats.category_contribution(obj))
+    caching.bump_hub_version(hub_id)
+    return _row_removed_response(request, hub_id, 'kb_categories')
 
 @login_required
 @require_POST
@@ -168,57 +318,43 @@ def kb_category_toggle_status(request, pk):
     obj = get_object_or_404(KBCategory, pk=pk, hub_id=hub_id, is_deleted=False)
     obj.is_active = not obj.is_active
     obj.save(update_fields=['is_active', 'updated_at'])
-    return _render_kb_categories_list(request, hub_id)
+    stats.adjust(hub_id, active_categories=1 if obj.is_active else -1)
+    caching.bump_hub_version(hub_id)
+    return _row_response(request, 'kb_category', obj)
 
 @login_required
 @require_POST
 def kb_categories_bulk_action(request):
     hub_id = request.session.get('hub_id')
-    ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
-    action = request.POST.get('action', '')
-    qs = KBCategory.objects.filter(hub_id=hub_id, is_deleted=False, id__in=ids)
-    if action == 'activate':
-        qs.update(is_active=True)
-    elif action == 'deactivate':
-        qs.update(is_active=False)
-    elif action == 'delete':
-        qs.update(is_deleted=True, deleted_at=timezone.now())
-    return _render_kb_categories_list(request, hub_id)
+    qs = bulk.target_queryset(KBCategory, hub_id, _bulk_ids(request), request.POST.get('q', '').strip())
+    affected = bulk.category_action(hub_id, request.POST.get('action', ''), qs)
+    return _render_kb_categories_list(request, hub_id, affected)
 
 
 # ======================================================================
 # KBArticle
 # ======================================================================
 
-KB_ARTICLE_SORT_FIELDS = {
-    'title': 'title',
-    'category': 'category',
-    'is_published': 'is_published',
-    'view_count': 'view_count',
-    'slug': 'slug',
-    'content': 'content',
-    'created_at': 'created_at',
-}
-
-def _build_kb_articles_context(hub_id, per_page=10):
-    qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False).order_by('title')
-    paginator = Paginator(qs, per_page)
-    page_obj = paginator.get_page(1)
-    return {
-        'kb_articles': page_obj,
-        'page_obj': page_obj,
-        'search_query': '',
-        'sort_field': 'title',
-        'sort_dir': 'asc',
-        'current_view': 'table',
-        'per_page': per_page,
-    }
-
-def _render_kb_articles_list(request, hub_id, per_page=10):
-    ctx = _build_kb_articles_context(hub_id, per_page)
-    return django_render(request, 'knowledge_base/partials/kb_articles_list.html', ctx)
+def _render_kb_articles_list(request, hub_id, bulk_affected=None):
+    """First page of the datatable for the search/sort posted along with a bulk action."""
+    search_query = request.POST.get('q', '').strip()
+    sort_dir = request.POST.get('dir', 'asc')
+    per_page = int(request.POST.get('per_page', 10) or 10)
+    if per_page not in PER_PAGE_CHOICES:
+        per_page = 10
+    category = _category_filter(request.POST, hub_id)
+    qs, order_field, sort_field = kb_articles_queryset(hub_id, search_query, request.POST.get('sort', 'title'), sort_dir, category=category)
+    total = _list_total(qs, hub_id, 'kb_articles', search_query, category.pk if category else '')
+    page_obj = _paginate(request, qs.defer('content'), order_field, sort_dir, per_page, total)
+    return django_render(request, 'knowledge_base/partials/kb_articles_list.html', {
+        'kb_articles': page_obj, 'page_obj': page_obj, 'category_filter': category.pk if category else '',
+        'search_query': search_query, 'sort_field': sort_field, 'sort_dir': sort_dir,
+        'current_view': request.POST.get('view', 'table'), 'per_page': per_page,
+        'bulk_affected': bulk_affected,
+    })
 
 @login_required
+@conditional_hub_view
 @with_module_nav('knowledge_base', 'articles')
 @htmx_view('knowledge_base/pages/kb_articles.html', 'knowledge_base/partials/kb_articles_content.html')
 def kb_articles_list(request):
@@ -226,46 +362,48 @@ def kb_articles_list(request):
     search_query = request.GET.get('q', '').strip()
     sort_field = request.GET.get('sort', 'title')
     sort_dir = request.GET.get('dir', 'asc')
-    page_number = request.GET.get('page', 1)
     current_view = request.GET.get('view', 'table')
     per_page = int(request.GET.get('per_page', 10))
     if per_page not in PER_PAGE_CHOICES:
         per_page = 10
 
-    qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False)
-
-    if search_query:
-        qs = qs.filter(Q(title__icontains=search_query) | Q(slug__icontains=search_query) | Q(content__icontains=search_query))
-
-    order_by = KB_ARTICLE_SORT_FIELDS.get(sort_field, 'title')
-    if sort_dir == 'desc':
-        order_by = f'-{order_by}'
-    qs = qs.order_by(order_by)
+    category = _category_filter(request.GET, hub_id)
 
     export_format = request.GET.get('export')
     if export_format in ('csv', 'excel'):
-        fields = ['title', 'category', 'is_published', 'view_count', 'slug', 'content']
-        headers = ['Title', 'KBCategory', 'Is Published', 'View Count', 'Slug', 'Content']
+        qs, _order_field, sort_field = kb_articles_queryset(hub_id, search_query, sort_field, sort_dir, category=category)
+        if request.GET.get('background'):
+            return _start_export_job(
+                request, hub_id, 'kb_articles', export_format, search_query, sort_field, sort_dir,
+                category=category.pk if category else '',
+            )
         if export_format == 'csv':
-            return export_to_csv(qs, fields=fields, headers=headers, filename='kb_articles.csv')
-        return export_to_excel(qs, fields=fields, headers=headers, filename='kb_articles.xlsx')
-
-    paginator = Paginator(qs, per_page)
-    page_obj = paginator.get_page(page_number)
-
-    if request.htmx and request.htmx.target == 'datatable-body':
-        return django_render(request, 'knowledge_base/partials/kb_articles_list.html', {
-            'kb_articles': page_obj, 'page_obj': page_obj,
-            'search_query': search_query, 'sort_field': sort_field,
-            'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
-        })
+            return exports.csv_response(qs, exports.KB_ARTICLE_EXPORT_FIELDS, 'kb_articles.csv')
+        return exports.excel_response(qs, exports.KB_ARTICLE_EXPORT_FIELDS, 'kb_articles.xlsx')
 
-    return {
-        'kb_articles': page_obj, 'page_obj': page_obj,
+    params = {
         'search_query': search_query, 'sort_field': sort_field,
         'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
+        'category_filter': category.pk if category else '',
     }
 
+    def build_context():
+        qs, order_field, effective_sort = kb_articles_queryset(hub_id, search_query, sort_field, sort_dir, category=category)
+        total = _list_total(qs, hub_id, 'kb_articles', search_query, params['category_filter'])
+        page_obj = _paginate(request, qs.defer('content'), order_field, sort_dir, per_page, total)
+        return dict(params, kb_articles=page_obj, page_obj=page_obj, sort_field=effective_sort)
+
+    # A page ordered by views must follow flushed view counts
+    views_version = caching.views_version(hub_id) if sort_field == 'view_count' else ''
+    fragment_key = _fragment_key(request, hub_id, 'kb_articles', *params.values(), views_version)
+    result = _cached_list_response(request, fragment_key, 'knowledge_base/partials/kb_articles_list.html', build_context)
+    if isinstance(result, HttpResponse):
+        return result
+    # Move-to-category targets of the bulk bar (only queried when the page renders them)
+    bulk_categories = KBCategory.objects.filter(hub_id=hub_id, is_deleted=False).order_by('name').only('id', 'name')
+    category_breadcrumbs = tree.breadcrumbs(category) if category else []
+    return dict(params, bulk_categories=bulk_categories, category_breadcrumbs=category_breadcrumbs, **result)
+
 @login_required
 @htmx_view('knowledge_base/pages/kb_article_add.html', 'knowledge_base/partials/kb_article_add_content.html')
 def kb_article_add(request):
@@ -278,11 +416,14 @@ def kb_article_add(request):
         view_count = int(request.POST.get('view_count', 0) or 0)
         obj = KBArticle(hub_id=hub_id)
         obj.title = title
-        obj.slug = slug
         obj.content = content
         obj.is_published = is_published
         obj.view_count = view_count
-        obj.save()
+        slugs.save_unique(obj, slugs.base_slug(slug or title, 255))
+        revisions.record(obj, request.session.get('local_user_id'))
+        search.index_article(obj)
+        stats.apply(hub_id, after=stats.article_contribution(obj), touched=True)
+        caching.bump_hub_version(hub_id)
         response = HttpResponse(status=204)
         response['HX-Redirect'] = reverse('knowledge_base:kb_articles_list')
         return response
@@ -292,17 +433,68 @@ def kb_article_add(request):
 @htmx_view('knowledge_base/pages/kb_article_edit.html', 'knowledge_base/partials/kb_article_edit_content.html')
 def kb_article_edit(request, pk):
     hub_id = request.session.get('hub_id')
-    obj = get_object_or_404(KBArticle, pk=pk, hub_id=hub_id, is_deleted=False)
+    obj = get_object_or_404(KBArticle.objects.select_related('category'), pk=pk, hub_id=hub_id, is_deleted=False)
     if request.method == 'POST':
+        before = stats.article_contribution(obj)
         obj.title = request.POST.get('title', '').strip()
-        obj.slug = request.POST.get('slug', '').strip()
+        slug = request.POST.get('slug', '').strip()
         obj.content = request.POST.get('content', '').strip()
         obj.is_published = request.POST.get('is_published') == 'on'
         obj.view_count = int(request.POST.get('view_count', 0) or 0)
-        obj.save()
-        return _render_kb_articles_list(request, hub_id)
+        slugs.save_unique(obj, slugs.base_slug(slug or obj.title, 255))
+        reader.forget(hub_id, [obj.pk])
+        revisions.record(obj, request.session.get('local_user_id'))
+        search.index_article(obj)
+        stats.apply(hub_id, before=before, after=stats.article_contribution(obj), touched=True)
+        caching.bump_hub_version(hub_id)
+        return _edit_saved_response(request, 'kb_article', obj, 'knowledge_base:kb_articles_list')
     return {'obj': obj}
 
+@login_required
+@conditional_hub_view
+@with_module_nav('knowledge_base', 'articles')
+@htmx_view('knowledge_base/pages/kb_article_detail.html', 'knowledge_base/partials/kb_article_detail_content.html')
+def kb_article_detail(request, pk):
+    hub_id = request.session.get('hub_id')
+    html = reader.article_html(hub_id, pk)
+    if html is None:
+        raise Http404
+    # A revalidation answered with 304 by conditional_hub_view is not a new view
+    counters.record_view(hub_id, pk)
+    return _reader_response(request, html)
+
+@login_required
+@conditional_hub_view
+@with_module_nav('knowledge_base', 'articles')
+@htmx_view('knowledge_base/pages/kb_article_detail.html', 'knowledge_base/partials/kb_article_detail_content.html')
+def kb_article_by_slug(request, slug):
+    hub_id = request.session.get('hub_id')
+    obj = slugs.resolve_article(hub_id, slug, KBArticle.objects.select_related('category').filter(is_published=True))
+    if obj is None:
+        raise Http404
+    counters.record_view(obj.hub_id, obj.pk)
+    return _reader_response(request, reader.article_html(hub_id, obj.pk, obj))
+
+@login_required
+@with_module_nav('knowledge_base', 'articles')
+@htmx_view('knowledge_base/pages/kb_article_revisions.html', 'knowledge_base/partials/kb_article_revisions_content.html')
+def kb_article_revisions(request, pk):
+    hub_id = request.session.get('hub_id')
+    obj = get_object_or_404(KBArticle.objects.only('id', 'title', 'hub_id'), pk=pk, hub_id=hub_id, is_deleted=False)
+    history = obj.revisions.order_by('-number').defer('data')
+    return {'obj': obj, 'revisions': history}
+
+@login_required
+def kb_article_revision_diff(request, pk, number):
+    hub_id = request.session.get('hub_id')
+    revision = get_object_or_404(
+        KBArticleRevision.objects.defer('data'),
+        article_id=pk, article__hub_id=hub_id, article__is_deleted=False, number=number,
+    )
+    return django_render(request, 'knowledge_base/partials/kb_article_revision_diff.html', {
+        'revision': revision, 'diff_lines': revisions.diff(pk, number),
+    })
+
 @login_required
 @require_POST
 def kb_article_delete(request, pk):
@@ -311,18 +503,80 @@ def kb_article_delete(request, pk):
     obj.is_deleted = True
     obj.deleted_at = timezone.now()
     obj.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
-    return _render_kb_articles_list(request, hub_id)
+    search.remove_articles([obj.pk])
+    reader.forget(hub_id, [obj.pk])
+    stats.apply(hub_id, before=stats.article_contribution(obj), touched=True)
+    caching.bump_hub_version(hub_id)
+    return _row_removed_response(request, hub_id, 'kb_articles')
 
 @login_required
 @require_POST
 def kb_articles_bulk_action(request):
     hub_id = request.session.get('hub_id')
-    ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
-    action = request.POST.get('action', '')
-    qs = KBArticle.objects.filter(hub_id=hub_id, is_deleted=False, id__in=ids)
-    if action == 'delete':
-        qs.update(is_deleted=True, deleted_at=timezone.now())
-    return _render_kb_articles_list(request, hub_id)
+    qs = bulk.target_queryset(
+        KBArticle, hub_id, _bulk_ids(request), request.POST.get('q', '').strip(),
+        category=_category_filter(request.POST, hub_id),
+    )
+    category_id = None
+    if request.POST.get('action') == 'move' and request.POST.get('category_id'):
+        category_id = get_object_or_404(KBCategory, pk=request.POST['category_id'], hub_id=hub_id, is_deleted=False).pk
+    affected = bulk.article_action(hub_id, request.POST.get('action', ''), qs, category_id)
+    return _render_kb_articles_list(request, hub_id, affected)
+
+
+# ======================================================================
+# Bulk import
+# ======================================================================
+
+@login_required
+@with_module_nav('knowledge_base', 'articles')
+@htmx_view('knowledge_base/pages/kb_import.html', 'knowledge_base/partials/kb_import_content.html')
+def kb_import(request):
+    hub_id = request.session.get('hub_id')
+    kind = request.POST.get('kind', request.GET.get('kind', 'kb_articles'))
+    if kind not in ('kb_articles', 'kb_categories'):
+        kind = 'kb_articles'
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if upload is None:
+            return django_render(request, 'knowledge_base/partials/kb_import_result.html', {'error': _('Choose a file to import.')})
+        result = imports.import_file(
+            hub_id, kind, upload.file, imports.detect_format(upload.name),
+            dry_run=request.POST.get('dry_run') == 'on',
+        )
+        return django_render(request, 'knowledge_base/partials/kb_import_result.html', {'result': result})
+    return {'kind': kind}
+
+
+# ======================================================================
+# Background exports
+# ======================================================================
+
+def _start_export_job(request, hub_id, kind, export_format, search_query, sort_field, sort_dir, category=''):
+    job = jobs.enqueue_export(hub_id, kind, export_format, {
+        'q': search_query, 'sort': sort_field, 'dir': sort_dir, 'category': str(category),
+    })
+    job.refresh_from_db()
+    return django_render(request, 'knowledge_base/partials/export_job_status.html', {'job': job})
+
+@login_required
+def kb_export_job_status(request, pk):
+    hub_id = request.session.get('hub_id')
+    job = get_object_or_404(KBExportJob, pk=pk, hub_id=hub_id, is_deleted=False)
+    if jobs.is_stale(job):
+        # Stop the client polling a job no worker will ever finish
+        jobs.fail_stale_exports(hub_id)
+        job.refresh_from_db()
+    return django_render(request, 'knowledge_base/partials/export_job_status.html', {'job': job})
+
+@login_required
+def kb_export_job_download(request, pk):
+    hub_id = request.session.get('hub_id')
+    job = get_object_or_404(KBExportJob, pk=pk, hub_id=hub_id, is_deleted=False, status=KBExportJob.STATUS_DONE)
+    storage = jobs.export_storage()
+    if not job.file_name or not storage.exists(job.file_name):
+        raise Http404
+    return FileResponse(storage.open(job.file_name, 'rb'), as_attachment=True, filename=job.download_name)
 
 
 @login_required